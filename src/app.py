@@ -1,7 +1,6 @@
 # --- Flask Core Modules ---
 from flask import Flask, render_template, redirect, url_for, flash
-from flask_sqlalchemy import SQLAlchemy
-from flask import request, session, jsonify
+from flask import request, session, jsonify, make_response, Response, stream_with_context
 
 # --- Flask Extensions ---
 from flask_wtf import FlaskForm
@@ -24,8 +23,9 @@ import os
 from dotenv import load_dotenv
 import subprocess
 import re
-import threading
 import sys
+import json
+import time
 from sqlalchemy import or_
 
 from werkzeug.utils import secure_filename
@@ -36,6 +36,10 @@ from config import cargar_configuracion, guardar_configuracion
 #Cargar el diccionario con los textos
 from textos import textos
 from mensajes_flash import mensajes_flash
+from trabajos import ColaTrabajos, TrabajoCancelado, ESTADOS_ACTIVOS
+from progreso import AlmacenProgreso, Progreso, ESTADO_INICIAL
+from persistencia import db, configurar_bd, User, Busqueda
+from cliente_llm import metricas as metricas_llm
 
 # Cargar variables desde .env
 load_dotenv()
@@ -48,27 +52,27 @@ app = Flask(__name__)
 
 # Protege la aplicación Flask contra manipulaciones y ataques
 app.secret_key = secrets.token_hex(32)
-app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv("DATABASE_URL")
-
-app.config['SQLALCHEMY_BINDS'] = {
-    'busqueda': os.getenv("DATABASE_BINDS")  
-}
-
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 # Configuración de OAuth con Google
 app.config["GOOGLE_OAUTH_CLIENT_ID"] = os.getenv("GOOGLE_CLIENT_ID")
 app.config["GOOGLE_OAUTH_CLIENT_SECRET"] = os.getenv("GOOGLE_CLIENT_SECRET")
 os.environ['OAUTHLIB_INSECURE_TRANSPORT'] = '1'
 
-db = SQLAlchemy(app)
+# Base de datos y modelos (paquete `persistencia`, compartido con los scripts)
+configurar_bd(app)
 
 
-# Variable global para el estado del proceso
-estado_proceso = {"en_proceso": False, "mensaje": "", "porcentaje": 0, "completado": False}
-lock = threading.Lock()  # Para controlar el acceso concurrente a estado_proceso
+# Cola persistente de los trabajos en segundo plano (búsquedas, API e informes)
+cola_trabajos = ColaTrabajos()
+# Progreso de cada trabajo, que escriben la aplicación y los scripts de los trabajos
+almacen_progreso = AlmacenProgreso()
 ERROR_CAMPOS_INCOMPLETOS = "Error: No se seleccionaron todos los campos"
 ERROR_FICHERO_NO_SUBIDO = "Error: No se ha subido ningún fichero."
 USER_MANUAL_SEARCH_URL = "https://github.com/Lorenah2022/GreenMetrics/wiki/User-manual#perform-a-search"
+# Stream de progreso (SSE): cada cuánto se comprueba si ha cambiado, cada cuánto se envía
+# un latido para mantener viva la conexión y tras cuántos milisegundos reconecta el navegador
+INTERVALO_STREAM = 0.5
+LATIDO_STREAM = 15
+REINTENTO_STREAM_MS = 3000
 
 
 # Crear el blueprint de Google OAuth
@@ -88,37 +92,6 @@ if not os.path.exists(UPLOAD_FOLDER):
  
 
 
-# ----------------------- BASES DE DATOS -----------------------------------------------------
-class User(db.Model):
-    """
-    Modelo de base de datos para los usuarios.
-    """
-    id = db.Column(db.Integer, primary_key=True)
-    google_id = db.Column(db.String(50), unique=True, nullable=True)  # Campo opcional
-    username = db.Column(db.String(50), nullable=False , unique=True)
-    email = db.Column(db.String(100), nullable=True, unique=True)
-    password = db.Column(db.String(200), nullable=False)
-    rol = db.Column(db.String(50), nullable=False, default='visitante')  # Default es 'usuario'
-
-class Busqueda(db.Model):
-    """
-    Modelo de base de datos para almacenar los resultados de las búsquedas de guías docentes.
-    """
-    __bind_key__ = 'busqueda'
-    id = db.Column(db.Integer, primary_key=True)
-    anho = db.Column(db.String(20), nullable=False)
-    codigo_asignatura = db.Column(db.String(100), nullable=True)
-    tipo_programa = db.Column(db.String(100), nullable=True)
-    nombre_archivo=db.Column(db.String(100), nullable=True)
-    modalidad=db.Column(db.String(100), nullable=True)
-    sostenibilidad = db.Column(db.String(10), nullable=True)
-
-    
-    __table_args__ = (
-        db.UniqueConstraint('anho','codigo_asignatura','modalidad', name='unique_modalidad_anho_codigo'),
-    )
-
-
 # ----------------------- FORMULARIOS -----------------------------------------------------
 class ProfileForm(FlaskForm):
     """
@@ -637,21 +610,22 @@ def verificar_datos():
 def procesar_anho():
     """
     Maneja la solicitud POST para procesar un año académico y tipo de estudio.
-    Inicia un hilo para ejecutar los scripts de descarga y procesamiento de guías.
+    Encola un trabajo que ejecuta los scripts de descarga y procesamiento de guías.
 
     Si la solicitud es POST:
     - Obtiene el año y tipo de estudio del formulario.
     - Valida el formato del año y el tipo de estudio.
     - Verifica si los datos para esa combinación ya existen en la base de datos.
-    - Si no existen y las validaciones pasan, actualiza el estado global del proceso
-      e inicia un nuevo hilo para ejecutar los scripts externos (`ejecutar_procesos`).
+    - Si no existen y las validaciones pasan, encola el trabajo `pipeline` (`ejecutar_procesos`),
+      inicializa su progreso y guarda su id en la sesión para que `/estado_proceso` lo muestre.
+      Si ya hay un trabajo para el mismo año y tipo de estudio pendiente o en curso, no se
+      encola otro y se muestra el progreso de ese.
     - Redirige a la página de solicitud de datos de IA.
     Si la solicitud es GET, simplemente redirige a la página de solicitud de datos de IA.
 
     Returns:
         redirect: Redirige a la página de solicitud de datos de IA o a la página de solicitud de año si hay errores.
     """
-    global estado_proceso
     if request.method == "POST":
         anho = request.form.get("anho")
         idioma = session.get('idioma', 'es')  # Obtener el idioma actual
@@ -672,17 +646,17 @@ def procesar_anho():
         if verificar_si_existen_datos(anho, tipo_estudio):
             flash(mensajes_flash[idioma]['datos_ya_existen'], "info")
             return redirect(url_for('pagina_pedir_anho'))
-        with lock:
-            estado_proceso["en_proceso"] = True
-            estado_proceso["mensaje"] = textos[idioma]['mensaje_cargando']
-            estado_proceso["porcentaje"] = 0
-            estado_proceso["completado"] = False
 
-        
-        # Crear y lanzar un hilo para ejecutar ambos scripts con los parámetros
-        hilo = threading.Thread(target=ejecutar_procesos, args=(anho, tipo_estudio, idioma))
-        hilo.start()
-        
+        # Encolar el trabajo; la clave de duplicados no incluye el idioma
+        id_trabajo, nuevo = cola_trabajos.encolar("pipeline", {"anho": anho, "tipo_estudio": tipo_estudio, "idioma": idioma},
+                                                  clave={"anho": anho, "tipo_estudio": tipo_estudio})
+        session['id_trabajo'] = id_trabajo
+        if not nuevo:
+            flash(mensajes_flash[idioma]['trabajo_en_curso'], "info")
+            return redirect(url_for('pagina_pedir_ia'))
+
+        actualizar_estado(id_trabajo, textos[idioma]['mensaje_cargando'], 0, en_proceso=True)
+
         return redirect(url_for('pagina_pedir_ia'))
 
     return redirect(url_for('pagina_pedir_ia'))
@@ -703,59 +677,77 @@ def anho_pattern(anho):
 
 
 # Función que ejecuta los scripts en el orden correcto.
-def ejecutar_procesos(anho, tipo_estudio="ambos", idioma='es'):
+def ejecutar_script(comando, funcion=None, argumentos=None):
     """
-    Ejecuta los scripts de descarga y procesamiento de guías docentes en un hilo separado.
+    Ejecuta un script como subproceso y lanza `subprocess.CalledProcessError` si falla.
+    `funcion` y `argumentos` (la función equivalente al script) solo los usa la cola
+    de trabajos, que puede ejecutar los scripts en el propio proceso.
+    """
+    subprocess.run(comando, check=True)
+
+
+# Funciones equivalentes a los scripts, para ejecutarlos en el proceso de la aplicación.
+# Los módulos se importan al llamarlas (o al precargarlos la cola de trabajos), de modo
+# que la aplicación no carga pandas, selenium ni docx si los trabajos son subprocesos.
+def ejecutar_pipeline_en_proceso(id_trabajo, anho, tipo_estudio):
+    """Hace lo mismo que `python sostenibilidad/pipeline.py <anho> <tipo_estudio>`."""
+    from sostenibilidad.pipeline import ejecutar_pipeline, FASES_PROGRESO
+    progreso = Progreso(id_trabajo, FASES_PROGRESO, inicio=10, fin=90, almacen=almacen_progreso)
+    ejecutar_pipeline(anho, tipo_estudio, progreso=progreso)
+
+
+def ejecutar_api_en_proceso(id_trabajo):
+    """Hace lo mismo que `python sostenibilidad/API.py`."""
+    from sostenibilidad.API import main, FASES_PROGRESO
+    main(progreso=Progreso(id_trabajo, FASES_PROGRESO, almacen=almacen_progreso))
+
+
+def ejecutar_informe_en_proceso(anho, informe, excel):
+    """Hace lo mismo que `python generar_informe/general.py <anho> <informe> <excel>`."""
+    from generar_informe.general import generar_informe
+    generar_informe(anho, informe, excel)
+
+
+def ejecutar_procesos(anho, tipo_estudio="ambos", idioma='es', ejecutar_comando=ejecutar_script, id_trabajo=None):
+    """
+    Ejecuta los scripts de descarga y procesamiento de guías docentes (trabajo `pipeline`).
     Actualiza el estado global del proceso durante la ejecución.
 
-    Esta función se ejecuta en un hilo separado para no bloquear la aplicación Flask.
-    Llama a scripts externos (`grados.py`, `guias_docentes.py`, `procesadoAsignaturas.py`)
-    usando `subprocess.run` y actualiza el estado global (`estado_proceso`)
-    con mensajes y porcentajes de progreso. Maneja posibles errores en la ejecución de los scripts.
+    La ejecuta un worker de la cola de trabajos para no bloquear la aplicación Flask.
+    Llama al script `pipeline.py`, que encadena en streaming la obtención de titulaciones,
+    la descarga de guías y su procesado, y actualiza el progreso del trabajo con mensajes
+    y porcentajes; entre el 10 % y el 90 % lo notifica el propio script, por fases. Si el
+    script falla, deja el error en el progreso y vuelve a lanzar la excepción para que el
+    trabajo quede marcado con error.
 
     Args:
         anho (str): El año académico a procesar.
         tipo_estudio (str, optional): El tipo de estudio ("grado", "master", "ambos"). Por defecto es "ambos".
         idioma (str, optional): El idioma actual para los mensajes de estado. Por defecto es 'es'.
+        ejecutar_comando (Callable, optional): Función que ejecuta el script; la cola de trabajos
+            pasa una que permite cancelarlo.
+        id_trabajo (int | None, optional): Id del trabajo cuyo progreso se actualiza.
     """
-    global estado_proceso
     try:
-        # Ejecutar guias_docentes.py
-        ruta_grados = os.path.join(os.getcwd(), 'sostenibilidad', 'grados.py')
-        actualizar_estado(textos[idioma]['ejecutando_grados'], 10)
-
-        # Ejecutar guias_docentes.py (un solo paso si no se necesita dividir)
-        subprocess.run(['python', ruta_grados, anho, tipo_estudio], check=True)
-        actualizar_estado(textos[idioma]['ejecutando_grados'], 20)
-
-        
-        # Ejecutar guias_docentes.py
-        ruta_guias = os.path.join(os.getcwd(), 'sostenibilidad', 'guias_docentes.py')
-        actualizar_estado(textos[idioma]['ejecutando_guias'], 30)
-
-        # Ejecutar guias_docentes.py (un solo paso si no se necesita dividir)
-        subprocess.run(['python', ruta_guias, anho, tipo_estudio], check=True)
-        actualizar_estado(textos[idioma]['ejecutando_guias'], 60)
-
-        # Ejecutar procesadoAsignaturas.py
-        ruta_procesado = os.path.join(os.getcwd(), 'sostenibilidad', 'procesadoAsignaturas.py')
-        actualizar_estado(textos[idioma]['ejecutando_asignaturas'], 70)
+        # Ejecutar el pipeline que obtiene las titulaciones, descarga las guías y las procesa
+        ruta_pipeline = os.path.join(os.getcwd(), 'sostenibilidad', 'pipeline.py')
+        actualizar_estado(id_trabajo, textos[idioma]['ejecutando_guias'], 10, en_proceso=True)
 
-        # Ejecutar procesadoAsignaturas.py
-        subprocess.run(['python', ruta_procesado, tipo_estudio], check=True)
-        actualizar_estado(textos[idioma]['ejecutando_asignaturas'], 90)
+        ejecutar_comando(['python', ruta_pipeline, anho, tipo_estudio], ejecutar_pipeline_en_proceso,
+                         {'id_trabajo': id_trabajo, 'anho': anho, 'tipo_estudio': tipo_estudio})
+        actualizar_estado(id_trabajo, textos[idioma]['ejecutando_asignaturas'], 90, en_proceso=True)
 
         # Marcar el proceso como completado
-        actualizar_estado(textos[idioma]['proceso_completado'], 100)
-
-        with lock:
-            estado_proceso["completado"] = True  # Marcar el proceso como completado
-    except subprocess.CalledProcessError as e:
-        with lock:
-            estado_proceso["mensaje"] = f"{textos[idioma]['error_script']} {e}"
+        actualizar_estado(id_trabajo, textos[idioma]['proceso_completado'], 100, completado=True)
+    except TrabajoCancelado:
+        raise
+    except Exception as e:
+        # En el modo "proceso" de la cola llegan también los errores del propio pipeline
+        actualizar_estado(id_trabajo, f"{textos[idioma]['error_script']} {e}")
+        raise
     finally:
-        with lock:
-            estado_proceso["en_proceso"] = False
+        if id_trabajo is not None:
+            almacen_progreso.actualizar(id_trabajo, en_proceso=False)
         
 
 #  ----------------------- PÁGINA PARA EJECUTAR LA API ----------------------------------------------------
@@ -839,18 +831,18 @@ def validar_campos_por_informe(informe):
             return ERROR_FICHERO_NO_SUBIDO, 400       
         return None
 
-def manejar_informe_con_hilo(informe):
+def manejar_informe_en_cola(informe):
     """
-    Inicia un hilo para ejecutar el script de generación de informe con los parámetros necesarios.
+    Encola el trabajo de generación de informe con los parámetros necesarios.
 
     Valida los campos necesarios para el informe, obtiene los parámetros de la sesión
-    y lanza un nuevo hilo que ejecuta la función `ejecutar_informe`.
+    y encola un trabajo `informe`, que ejecuta la función `ejecutar_informe`.
 
     Args:
         informe (str): El tipo de informe a generar.
 
     Returns:
-        redirect | tuple: Redirige a la página principal si el hilo se inicia correctamente,
+        redirect | tuple: Redirige a la página principal si el trabajo se encola correctamente,
                           o retorna una tupla (mensaje de error, código HTTP) si la validación falla.
     """
     anho_seleccionado = ''
@@ -864,8 +856,7 @@ def manejar_informe_con_hilo(informe):
     elif informe == "6_4":
         excel = session.get('ruta_excel')
 
-    hilo = threading.Thread(target=ejecutar_informe, args=(anho_seleccionado, informe, excel))
-    hilo.start()
+    encolar_trabajo("informe", {"anho": anho_seleccionado, "informe": informe, "excel": excel})
     return redirect(url_for('pagina_principal'))
 
 @app.route('/actualizar_api', methods=['GET','POST'])
@@ -874,8 +865,8 @@ def actualizar_api():
     Maneja la solicitud POST para actualizar la configuración de la API y generar informes.
 
     Carga la configuración actual, obtiene la configuración actualizada del formulario,
-    la guarda, determina el tipo de informe a generar y llama a la función
-    correspondiente (`ejecutar_api` o `manejar_informe_con_hilo`) en un hilo separado.
+    la guarda, determina el tipo de informe a generar y encola el trabajo
+    correspondiente (`api`, que ejecuta `ejecutar_api`, o `manejar_informe_en_cola`).
 
     Returns:
         redirect | tuple: Redirige a la página principal si la operación es exitosa,
@@ -889,12 +880,11 @@ def actualizar_api():
         guardar_configuracion(nueva_config)
 
         if informe_seleccionado == "6_1":
-            hilo = threading.Thread(target=ejecutar_api)
-            hilo.start()
+            encolar_trabajo("api", {"idioma": session.get('idioma', 'es')}, clave={})
             return redirect(url_for('pagina_principal'))
 
         # Para otros informes: 1_19, 6_8, 6_4...
-        response = manejar_informe_con_hilo(informe_seleccionado)
+        response = manejar_informe_en_cola(informe_seleccionado)
         if isinstance(response, tuple):  # Error con código HTTP
             return response
         return response
@@ -903,24 +893,41 @@ def actualizar_api():
         return f"Error al actualizar la API o generar el informe: {str(e)}", 500
 
 
-def ejecutar_api():
+def ejecutar_api(idioma='es', ejecutar_comando=ejecutar_script, id_trabajo=None):
     """
-    Ejecuta el script `API.py` en un hilo separado.
+    Ejecuta el script `API.py` (trabajo `api` de la cola de trabajos).
 
     Este script es responsable de procesar las guías docentes y actualizar la base de datos
     con información de sostenibilidad utilizando la API de IA.
 
-    Imprime mensajes de éxito o error en la consola.
+    Imprime mensajes de éxito o error en la consola; los errores se vuelven a lanzar
+    para que el trabajo quede marcado con error. El avance de la clasificación lo
+    notifica el propio script en el progreso del trabajo.
+
+    Args:
+        idioma (str, optional): El idioma del mensaje de error del progreso. Por defecto es 'es'.
+        ejecutar_comando (Callable, optional): Función que ejecuta el script.
+        id_trabajo (int | None, optional): Id del trabajo cuyo progreso se actualiza.
     """
     try:
         ruta_api = os.path.join(os.getcwd(), 'sostenibilidad', 'API.py')
+        if id_trabajo is not None:
+            almacen_progreso.actualizar(id_trabajo, en_proceso=True)
         # Ejecutar el archivo API.py (esto puede tomar tiempo)
-        subprocess.run(['python', ruta_api], check=True)
+        ejecutar_comando(['python', ruta_api], ejecutar_api_en_proceso, {'id_trabajo': id_trabajo})
+        if id_trabajo is not None:
+            almacen_progreso.actualizar(id_trabajo, porcentaje=100, completado=True)
         print("Proceso completado correctamente.")
-    except subprocess.CalledProcessError as e:
-        print(f"Error ejecutando el script: {str(e)}")
+    except TrabajoCancelado:
+        raise
     except Exception as e:
-        print(f"Error en el hilo de ejecución: {str(e)}")
+        # En el modo "proceso" de la cola llegan también los errores de la clasificación
+        print(f"Error ejecutando el script: {str(e)}")
+        actualizar_estado(id_trabajo, f"{textos[idioma]['error_script']} {e}")
+        raise
+    finally:
+        if id_trabajo is not None:
+            almacen_progreso.actualizar(id_trabajo, en_proceso=False)
 
 
 #  ----------------------- PÁGINA PARA VISUALIZAR LA BASE DE DATOS ----------------------------------------------------
@@ -1187,44 +1194,145 @@ def confirmar_eliminacion(id):
 
 #  ----------------------- BARRA DE PROGRESO  ----------------------------------------------------
 # Función para actualizar el estado del proceso
-def actualizar_estado(mensaje, porcentaje, en_proceso=False, completado=False):
+def actualizar_estado(id_trabajo, mensaje, porcentaje=None, en_proceso=False, completado=False):
     """
-    Actualiza el estado global del proceso en segundo plano.
+    Actualiza el progreso de un trabajo en segundo plano.
 
     Esta función se utiliza para comunicar el progreso de una tarea de larga duración
-    (como la descarga y procesamiento de guías) al hilo principal de la aplicación web.
-    Utiliza un bloqueo (lock) para asegurar que solo un hilo pueda modificar
-    la variable global `estado_proceso` a la vez, evitando condiciones de carrera.
+    (como la descarga y procesamiento de guías) a la aplicación web. Cada trabajo tiene
+    su propio progreso en `almacen_progreso`, de modo que dos usuarios no se pisan.
 
     Args:
+        id_trabajo (int | None): Id del trabajo. Si es None (la función no se ejecuta desde
+            la cola de trabajos) no se hace nada.
         mensaje (str): Un mensaje descriptivo del estado actual (ej. "Descargando guías...").
-        porcentaje (int): El porcentaje de progreso de la tarea (0-100).
+        porcentaje (int | None, optional): El porcentaje de progreso de la tarea (0-100); si es None, se conserva.
         en_proceso (bool, optional): Indica si la tarea está actualmente en ejecución. Por defecto es False.
         completado (bool, optional): Indica si la tarea ha finalizado con éxito. Por defecto es False.
     """
-    global estado_proceso
-    with lock:
-        estado_proceso["mensaje"] = mensaje
-        estado_proceso["porcentaje"] = porcentaje
-        estado_proceso["en_proceso"] = en_proceso
-        estado_proceso["completado"] = completado
+    if id_trabajo is None:
+        return
+    campos = {"mensaje": mensaje, "en_proceso": en_proceso, "completado": completado}
+    if porcentaje is not None:
+        campos["porcentaje"] = porcentaje
+    almacen_progreso.actualizar(id_trabajo, **campos)
 
 
 @app.route('/estado_proceso')
 def estado_proceso_api():
     """
-    Endpoint API que devuelve el estado actual del proceso en formato JSON.
+    Endpoint API que devuelve el progreso de un trabajo en formato JSON.
 
     Esta ruta es consultada periódicamente por el frontend (JavaScript) para
-    obtener las actualizaciones del estado del proceso en segundo plano y
-    actualizar la barra de progreso en la interfaz de usuario.
-    Utiliza un bloqueo (lock) para asegurar un acceso seguro a la variable global.
+    obtener las actualizaciones del proceso en segundo plano y actualizar la
+    barra de progreso en la interfaz de usuario. El trabajo es el indicado en el
+    parámetro `id` o, si no se indica, el último que el usuario ha lanzado.
+
+    La respuesta lleva un ETag con la versión del progreso: si el cliente envía
+    `If-None-Match` y el progreso no ha cambiado, se responde 304 sin cuerpo y sin
+    leer el resto de la fila.
+
+    Returns:
+        json: mensaje, porcentaje, en_proceso, completado, fases (hechos y total de
+              cada fase), id_trabajo y estado del trabajo en la cola; o una respuesta 304.
+    """
+    id_trabajo = request.args.get('id', type=int) or session.get('id_trabajo')
+    if id_trabajo is None:
+        respuesta = jsonify(dict(ESTADO_INICIAL, id_trabajo=None, estado=None))
+        respuesta.headers['Cache-Control'] = 'no-cache'
+        return respuesta
+
+    etag, estado = version_progreso(id_trabajo)
+    if request.if_none_match.contains(etag):
+        respuesta = make_response('', 304)
+    else:
+        datos, _ = almacen_progreso.obtener(id_trabajo)
+        respuesta = jsonify(dict(datos, id_trabajo=id_trabajo, estado=estado))
+    respuesta.set_etag(etag)
+    respuesta.headers['Cache-Control'] = 'no-cache'
+    return respuesta
+
+def version_progreso(id_trabajo):
+    """
+    Devuelve la versión del progreso de un trabajo, que cambia con cada actualización
+    del progreso y con cada cambio de estado del trabajo en la cola.
+
+    Args:
+        id_trabajo (int): Id del trabajo.
 
     Returns:
-        json: Un objeto JSON que contiene el diccionario `estado_proceso` actual.
+        tuple[str, str | None]: La versión (se usa como ETag y como id de evento SSE)
+            y el estado del trabajo en la cola (None si no existe).
+    """
+    trabajo = cola_trabajos.obtener(id_trabajo)
+    estado = trabajo["estado"] if trabajo else None
+    return f"{id_trabajo}-{almacen_progreso.version(id_trabajo)}-{estado}", estado
+
+
+def evento_sse(evento, datos, id_evento=None):
+    """Da formato de Server-Sent Events a un evento con datos JSON."""
+    lineas = [f"event: {evento}"]
+    if id_evento is not None:
+        lineas.append(f"id: {id_evento}")
+    lineas.append(f"data: {json.dumps(datos, ensure_ascii=False)}")
+    return "\n".join(lineas) + "\n\n"
+
+
+@app.route('/estado_proceso/stream')
+def estado_proceso_stream():
     """
-    with lock:
-        return jsonify(estado_proceso)
+    Endpoint Server-Sent Events con el progreso de un trabajo.
+
+    Sustituye a la consulta periódica de `/estado_proceso`: el navegador mantiene una
+    sola conexión abierta y el servidor envía un evento `progreso` solo cuando el
+    progreso cambia, con los campos que han cambiado (el primero, con todos). Cada
+    LATIDO_STREAM segundos sin cambios se envía un comentario para que no se cierre
+    la conexión. Cuando el trabajo termina se envía un evento `fin` y se cierra.
+
+    Si el navegador reconecta con la cabecera `Last-Event-ID` y el progreso no ha
+    cambiado desde ese evento, no se repite. Si todavía no hay trabajo (la ventana
+    de progreso se abre antes de encolarlo) se cierra la conexión para que el
+    navegador reconecte a los REINTENTO_STREAM_MS milisegundos.
+
+    Returns:
+        Response: La respuesta `text/event-stream`.
+    """
+    # Se leen antes de empezar el stream: la sesión no cambia mientras dura la conexión
+    id_trabajo = request.args.get('id', type=int) or session.get('id_trabajo')
+    ultimo_evento = request.headers.get('Last-Event-ID')
+
+    def generar():
+        yield f"retry: {REINTENTO_STREAM_MS}\n\n"
+        if id_trabajo is None:
+            yield evento_sse("progreso", dict(ESTADO_INICIAL, id_trabajo=None, estado=None))
+            return
+
+        enviado = {}
+        version_enviada = ultimo_evento
+        ultimo_envio = time.monotonic()
+        while True:
+            version, estado = version_progreso(id_trabajo)
+            if version != version_enviada:
+                datos, _ = almacen_progreso.obtener(id_trabajo)
+                datos = dict(datos, id_trabajo=id_trabajo, estado=estado)
+                # Tras reconectar no se sabe qué tiene el navegador: se envía todo
+                cambios = {clave: valor for clave, valor in datos.items() if enviado.get(clave) != valor}
+                yield evento_sse("progreso", cambios, version)
+                enviado, version_enviada, ultimo_envio = datos, version, time.monotonic()
+            elif time.monotonic() - ultimo_envio >= LATIDO_STREAM:
+                yield ": latido\n\n"
+                ultimo_envio = time.monotonic()
+
+            if estado not in ESTADOS_ACTIVOS:
+                yield evento_sse("fin", {"estado": estado})
+                return
+            time.sleep(INTERVALO_STREAM)
+
+    respuesta = Response(stream_with_context(generar()), mimetype='text/event-stream')
+    respuesta.headers['Cache-Control'] = 'no-cache'
+    # Evita que un proxy (nginx) acumule los eventos antes de enviarlos
+    respuesta.headers['X-Accel-Buffering'] = 'no'
+    return respuesta
 
 @app.route('/progreso')
 def progreso():
@@ -1256,12 +1364,12 @@ def generar_informe():
 
     Determina el tipo de informe a generar basándose en la sesión,
     obtiene los parámetros necesarios (año, archivo Excel) del formulario
-    si son requeridos por el informe, e inicia un hilo separado para
-    ejecutar el script de generación del informe. Redirige a la página
-    principal después de iniciar el proceso.
+    si son requeridos por el informe, y encola un trabajo `informe` que
+    ejecuta el script de generación del informe. Redirige a la página
+    principal después de encolarlo.
 
     Returns:
-        redirect | tuple: Redirige a la página principal si el hilo se inicia correctamente,
+        redirect | tuple: Redirige a la página principal si el trabajo se encola correctamente,
                           o retorna un mensaje de error y código HTTP si faltan campos
                           o si ocurre una excepción.
     """
@@ -1281,9 +1389,8 @@ def generar_informe():
             if not anho_seleccionado:
                 return ERROR_CAMPOS_INCOMPLETOS, 400
 
-        # Iniciar un hilo para ejecutar el informe con el año como argumento
-        hilo = threading.Thread(target=ejecutar_informe, args=(anho_seleccionado,informe_seleccionado,excel))
-        hilo.start()
+        # Encolar el informe con el año como argumento
+        encolar_trabajo("informe", {"anho": anho_seleccionado, "informe": informe_seleccionado, "excel": excel})
 
         # Redirigir a la página principal después de iniciar el proceso
         return redirect(url_for('pagina_principal'))
@@ -1291,19 +1398,21 @@ def generar_informe():
     except Exception as e:
         return f"Error al generar el informe: {str(e)}", 500
 
-def ejecutar_informe(anho,informe,excel):
+def ejecutar_informe(anho,informe,excel,ejecutar_comando=ejecutar_script,id_trabajo=None):
     """
-    Ejecuta el script de generación de informe general en un hilo separado.
+    Ejecuta el script de generación de informe general (trabajo `informe` de la cola de trabajos).
 
-    Construye la ruta al script `general.py` y lo ejecuta como un subproceso
-    de Python, pasando el año, el tipo de informe y la ruta del archivo Excel
-    como argumentos de línea de comandos. Imprime mensajes de éxito o error
-    en la consola.
+    Construye la ruta al script `general.py` y lo ejecuta con `ejecutar_comando`
+    (como subproceso o, en la cola de trabajos, en el propio proceso), pasando el
+    año, el tipo de informe y la ruta del archivo Excel como argumentos. Imprime mensajes de error en la consola
+    y los vuelve a lanzar para que el trabajo quede marcado con error.
 
     Args:
         anho (str): El año seleccionado para el informe (puede ser una cadena vacía si no aplica).
         informe (str): El código del informe a generar (ej. "6_1", "6_4").
         excel (str): La ruta al archivo Excel (puede ser una cadena vacía si no aplica).
+        ejecutar_comando (Callable, optional): Función que ejecuta el script.
+        id_trabajo (int | None, optional): Id del trabajo (la cola de trabajos lo pasa siempre).
     """
     try:
         ruta_informe = os.path.join(os.getcwd(), 'generar_informe', 'general.py')
@@ -1313,12 +1422,11 @@ def ejecutar_informe(anho,informe,excel):
             raise FileNotFoundError(f"El archivo {ruta_informe} no existe.")
         
         # Ejecutar el script con el año seleccionado como argumento
-        subprocess.run(['python', ruta_informe, anho, informe,excel], check=True)
-    except subprocess.CalledProcessError as e:
+        ejecutar_comando(['python', ruta_informe, anho, informe,excel], ejecutar_informe_en_proceso,
+                         {'anho': anho, 'informe': informe, 'excel': excel})
+    except (subprocess.CalledProcessError, FileNotFoundError) as e:
         print(f"Error ejecutando el script: {str(e)}")
-    except Exception as e:
-        
-        print(f"Error en el hilo de ejecución: {str(e)}")
+        raise
         
 def determinar_tipo_informe():
     """
@@ -1898,6 +2006,108 @@ def comprobar_permisos(usuario, idioma,nuevo_rol,email, username):
     else:
         flash(mensajes_flash[idioma]['rol_ya_tiene'], 'info')
     return None
+#  ----------------------- TRABAJOS EN SEGUNDO PLANO ----------------------------------------------------
+# Tipos de trabajo, cuántos de cada tipo se pueden ejecutar a la vez y los módulos que
+# se precargan para ejecutarlos en el proceso de la aplicación (TRABAJOS_MODO=proceso)
+cola_trabajos.registrar("pipeline", ejecutar_procesos, limite=1, modulos=["sostenibilidad.pipeline"])
+cola_trabajos.registrar("api", ejecutar_api, limite=1, modulos=["sostenibilidad.API"])
+cola_trabajos.registrar("informe", ejecutar_informe, limite=2, modulos=["generar_informe.general"])
+
+
+@app.before_request
+def iniciar_trabajos():
+    """
+    Arranca los workers de la cola de trabajos con la primera petición.
+
+    Se hace aquí y no al importar el módulo para que solo los arranque el proceso
+    que atiende las peticiones (y no el proceso vigilante del recargador de Flask).
+    """
+    cola_trabajos.iniciar()
+
+
+def encolar_trabajo(tipo, argumentos, clave=None):
+    """
+    Encola un trabajo y avisa al usuario si ya había uno idéntico pendiente o en curso.
+    El id del trabajo se guarda en la sesión para que `/estado_proceso` muestre su progreso.
+
+    Args:
+        tipo (str): Tipo de trabajo ("pipeline", "api" o "informe").
+        argumentos (dict): Argumentos del trabajo.
+        clave (dict | None): Argumentos que identifican el trabajo al buscar duplicados;
+            por defecto, todos.
+
+    Returns:
+        int: El id del trabajo encolado o del trabajo idéntico existente.
+    """
+    id_trabajo, nuevo = cola_trabajos.encolar(tipo, argumentos, clave)
+    session['id_trabajo'] = id_trabajo
+    if not nuevo:
+        flash(mensajes_flash[session.get('idioma', 'es')]['trabajo_en_curso'], "info")
+    return id_trabajo
+
+
+@app.route('/jobs')
+def listar_trabajos():
+    """
+    Endpoint API que devuelve los trabajos más recientes.
+
+    Admite los parámetros `estado` (pendiente, en_curso, completado, error o cancelado)
+    y `limite` (por defecto 100).
+
+    Returns:
+        json: La lista de trabajos, del más reciente al más antiguo.
+    """
+    estado = request.args.get('estado')
+    limite = request.args.get('limite', 100, type=int)
+    return jsonify(cola_trabajos.listar(estado, limite))
+
+
+@app.route('/jobs/<int:id>')
+def consultar_trabajo(id):
+    """
+    Endpoint API que devuelve un trabajo: tipo, argumentos, estado, mensaje, fechas y progreso.
+
+    Returns:
+        json: El trabajo, o un error 404 si no existe.
+    """
+    trabajo = cola_trabajos.obtener(id)
+    if trabajo is None:
+        return jsonify({"error": "Trabajo no encontrado"}), 404
+    trabajo["progreso"], _ = almacen_progreso.obtener(id)
+    return jsonify(trabajo)
+
+
+@app.route('/jobs/<int:id>/cancelar', methods=['POST'])
+def cancelar_trabajo(id):
+    """
+    Endpoint API que cancela un trabajo pendiente o en curso.
+
+    Returns:
+        json: El trabajo tras cancelarlo; un error 404 si no existe o 409 si ya había terminado.
+    """
+    if cola_trabajos.obtener(id) is None:
+        return jsonify({"error": "Trabajo no encontrado"}), 404
+    if not cola_trabajos.cancelar(id):
+        return jsonify({"error": "El trabajo ya ha terminado"}), 409
+    return jsonify(cola_trabajos.obtener(id))
+
+
+#  ----------------------- MÉTRICAS ----------------------------------------------------
+@app.route('/metrics')
+def metricas():
+    """
+    Endpoint para Prometheus con las métricas de las llamadas al modelo.
+
+    Incluye las llamadas hechas en el proceso de la aplicación: las de los trabajos
+    ejecutados en el modo "proceso" de la cola (el modo por defecto), pero no las de
+    los que se ejecutan como subprocesos, que tienen sus propias métricas.
+
+    Returns:
+        Response: Las métricas en el formato de texto de Prometheus.
+    """
+    return Response(metricas_llm.exportar(), mimetype='text/plain; version=0.0.4')
+
+
 #  ----------------------- MAIN  ----------------------------------------------------
 if __name__ == '__main__':
     # Crear las tablas de la base de datos
@@ -0,0 +1,85 @@
+"""
+Compara la latencia de arranque de los trabajos de la cola en sus dos modos.
+
+- Subproceso (en frío): cada trabajo lanza `python <script>`, que arranca un
+  intérprete e importa de nuevo el módulo del script y sus dependencias (pandas,
+  selenium, docx, Flask-SQLAlchemy...).
+- Proceso (en caliente): los workers llaman a la función del script en el propio
+  proceso, con los módulos ya importados por la precarga.
+
+Cada trabajo de la medida solo importa el módulo de su script y termina, de modo
+que su duración (desde que se encola hasta que queda completado) es la latencia
+de arranque. También se muestra el coste de la precarga, que en el modo proceso
+se paga una sola vez al arrancar los workers.
+
+Uso (desde el directorio `src`):
+    python benchmarks/bench_arranque_trabajos.py [repeticiones]
+"""
+
+import importlib
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from trabajos import ColaTrabajos, COMPLETADO, ESTADOS_ACTIVOS, MODO_PROCESO, MODO_SUBPROCESO
+
+# Módulo que importa el script de cada tipo de trabajo
+MODULOS = {
+    "pipeline": "sostenibilidad.pipeline",
+    "api": "sostenibilidad.API",
+    "informe": "generar_informe.general",
+}
+
+
+def arrancar(id_trabajo, ejecutar_comando, modulo):
+    """Trabajo que solo importa el módulo de un script, en un subproceso o en el propio proceso."""
+    ejecutar_comando([sys.executable, "-c", f"import {modulo}"], importlib.import_module, {"name": modulo})
+
+
+def medir(modo, modulo, repeticiones, ruta):
+    """Devuelve los segundos que tarda cada trabajo vacío, desde que se encola hasta que termina."""
+    cola = ColaTrabajos(ruta=ruta, workers=1, modo=modo)
+    cola.registrar("arranque", arrancar)
+    cola.iniciar()
+    tiempos = []
+    try:
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            id_trabajo, _ = cola.encolar("arranque", {"modulo": modulo})
+            while (trabajo := cola.obtener(id_trabajo))["estado"] in ESTADOS_ACTIVOS:
+                time.sleep(0.005)
+            if trabajo["estado"] != COMPLETADO:
+                raise RuntimeError(trabajo["mensaje"])
+            tiempos.append(time.perf_counter() - inicio)
+    finally:
+        cola.detener()
+    return tiempos
+
+
+def precargar(modulo):
+    """Devuelve los segundos que tarda la primera importación del módulo en este proceso."""
+    inicio = time.perf_counter()
+    importlib.import_module(modulo)
+    return time.perf_counter() - inicio
+
+
+if __name__ == "__main__":
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    with tempfile.TemporaryDirectory() as directorio:
+        for tipo, modulo in MODULOS.items():
+            print(f"Trabajo {tipo} ({modulo}):")
+            try:
+                frio = medir(MODO_SUBPROCESO, modulo, repeticiones, os.path.join(directorio, f"{tipo}_frio.db"))
+                segundos_precarga = precargar(modulo)
+                caliente = medir(MODO_PROCESO, modulo, repeticiones, os.path.join(directorio, f"{tipo}_caliente.db"))
+            except Exception as e:
+                print(f"  No se pudo medir: {e}")
+                continue
+            print(f"  Subproceso (en frío):   {statistics.median(frio) * 1000:8.1f} ms por trabajo (mediana)")
+            print(f"  Proceso (en caliente):  {statistics.median(caliente) * 1000:8.1f} ms por trabajo (mediana)")
+            print(f"  Precarga (una vez):     {segundos_precarga * 1000:8.1f} ms")
+            print(f"  Aceleración: x{statistics.median(frio) / statistics.median(caliente):.0f}")
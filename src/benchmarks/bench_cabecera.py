@@ -0,0 +1,103 @@
+"""
+Compara la extracción de la cabecera de las guías antes y después de `cabecera_guia.py`
+y comprueba que ambas dan el mismo resultado sobre el corpus de guías descargadas.
+
+- Antes: tres expresiones regulares con búsqueda hacia atrás, compiladas y
+  buscadas por separado en cada llamada.
+- Después: `extraer_cabecera`, un único patrón precompilado y una sola pasada.
+
+Además de las guías descargadas se comprueban los textos de ejemplo con variantes
+de maquetación de `tests/test_cabecera_guia.py`, que el método anterior no reconocía.
+
+El script termina con código 1 si algún campo que el método anterior extraía
+cambia con el nuevo, de modo que sirve como prueba de regresión del corpus.
+
+Uso (desde el directorio `src`, con las guías ya descargadas):
+    python benchmarks/bench_cabecera.py [num_guias] [repeticiones]
+"""
+
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from sostenibilidad.cabecera_guia import extraer_cabecera
+from sostenibilidad.procesadoAsignaturas import analizar_guia
+from tests.test_cabecera_guia import EJEMPLOS, extraer_cabecera_antes
+
+
+def cargar_corpus(ruta_guias, num_guias):
+    """Devuelve el texto de la primera página con texto de hasta `num_guias` guías."""
+    corpus = []
+    for nombre in sorted(os.listdir(ruta_guias)):
+        if len(corpus) >= num_guias:
+            break
+        if not nombre.endswith(".pdf"):
+            continue
+        try:
+            paginas, info = analizar_guia(os.path.join(ruta_guias, nombre), contar_asteriscos=False, paginas_con_texto=0)
+        except Exception as e:
+            print(f"No se pudo leer {nombre}: {e}")
+            continue
+        if info is not None:
+            corpus.append((nombre, next(texto for texto in paginas if texto)))
+    return corpus
+
+
+def medir(funcion, textos, repeticiones):
+    """Devuelve los microsegundos por llamada de `funcion` sobre los textos."""
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        for texto in textos:
+            funcion(texto)
+    return 1e6 * (time.perf_counter() - inicio) / (repeticiones * len(textos))
+
+
+def comprobar_corpus(corpus):
+    """
+    Compara ambos métodos guía a guía.
+
+    Returns:
+        tuple[int, int]: Guías en las que el nuevo método pierde o cambia un campo que
+            el anterior extraía (regresiones) y guías en las que extrae campos nuevos.
+    """
+    regresiones = mejoras = 0
+    for nombre, texto in corpus:
+        antes, despues = extraer_cabecera_antes(texto), extraer_cabecera(texto)
+        if antes == despues:
+            continue
+        if any(a is not None and a != d for a, d in zip(antes, despues)):
+            regresiones += 1
+            print(f"Regresión en {nombre}: {antes} -> {despues}")
+        else:
+            mejoras += 1
+    return regresiones, mejoras
+
+
+if __name__ == "__main__":
+    num_guias = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    repeticiones = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    fallos_ejemplos = [(texto, esperado) for texto, esperado in EJEMPLOS if extraer_cabecera(texto) != esperado]
+    for texto, esperado in fallos_ejemplos:
+        print(f"Ejemplo incorrecto: {texto!r} -> {extraer_cabecera(texto)} (se esperaba {esperado})")
+    print(f"Ejemplos de maquetación: {len(EJEMPLOS) - len(fallos_ejemplos)}/{len(EJEMPLOS)} correctos")
+
+    ruta_guias = os.path.join("sostenibilidad", "data", "guias")
+    corpus = cargar_corpus(ruta_guias, num_guias) if os.path.isdir(ruta_guias) else []
+    regresiones = 0
+    if corpus:
+        regresiones, mejoras = comprobar_corpus(corpus)
+        print(f"Corpus: {len(corpus)} guías, {regresiones} regresiones, {mejoras} con campos nuevos")
+        textos = [texto for _, texto in corpus]
+    else:
+        print(f"No hay guías en {ruta_guias}; se mide solo con los ejemplos.")
+        textos = [texto for texto, _ in EJEMPLOS]
+
+    microsegundos_antes = medir(extraer_cabecera_antes, textos, repeticiones)
+    microsegundos_despues = medir(extraer_cabecera, textos, repeticiones)
+    print(f"Antes:   {microsegundos_antes:.1f} µs por guía")
+    print(f"Después: {microsegundos_despues:.1f} µs por guía")
+    print(f"Aceleración: x{microsegundos_antes / microsegundos_despues:.1f}")
+
+    sys.exit(1 if fallos_ejemplos or regresiones else 0)
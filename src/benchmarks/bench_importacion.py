@@ -0,0 +1,75 @@
+"""
+Compara lo que cuesta importar la base de datos desde un script antes y después
+del paquete `persistencia`.
+
+- Antes: `from app import app, Busqueda, db`, que carga la aplicación web entera
+  (Flask-Dance, la autenticación de Google, WTForms, todas las rutas, la cola de
+  trabajos) y crea la carpeta de subidas.
+- Después: `from persistencia import Busqueda, contexto_bd, db`.
+
+También se mide la importación completa de los scripts que usan la base de datos.
+Cada importación se hace en un intérprete nuevo, y se muestra la mediana del
+tiempo y el número de módulos cargados.
+
+Uso (desde el directorio `src`):
+    python benchmarks/bench_importacion.py [repeticiones]
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+IMPORTACIONES = {
+    "Antes (app)": "from app import app, Busqueda, db",
+    "Después (persistencia)": "from persistencia import Busqueda, contexto_bd, db",
+    "guias_docentes.py": "import sostenibilidad.guias_docentes",
+    "actualizar_sostenibilidad.py": "import sostenibilidad.actualizar_sostenibilidad",
+}
+
+# Programa que mide una importación en un intérprete nuevo
+_MEDIDA = """
+import json, sys, time
+modulos = len(sys.modules)
+inicio = time.perf_counter()
+{importacion}
+print(json.dumps([time.perf_counter() - inicio, len(sys.modules) - modulos]))
+"""
+
+
+def medir(importacion, repeticiones):
+    """
+    Mide una importación en `repeticiones` intérpretes nuevos.
+
+    Returns:
+        tuple[float, int]: La mediana de los segundos y el número de módulos cargados.
+    """
+    tiempos = []
+    modulos = 0
+    for _ in range(repeticiones):
+        salida = subprocess.run([sys.executable, "-c", _MEDIDA.format(importacion=importacion)],
+                                capture_output=True, text=True, check=True)
+        segundos, modulos = json.loads(salida.stdout.strip().splitlines()[-1])
+        tiempos.append(segundos)
+    return statistics.median(tiempos), modulos
+
+
+if __name__ == "__main__":
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    # Los scripts se ejecutan desde `src`, con `src` en el path
+    os.environ["PYTHONPATH"] = os.pathsep.join(filter(None, [os.getcwd(), os.getenv("PYTHONPATH")]))
+
+    resultados = {}
+    for nombre, importacion in IMPORTACIONES.items():
+        try:
+            resultados[nombre] = medir(importacion, repeticiones)
+        except subprocess.CalledProcessError as e:
+            print(f"{nombre}: no se pudo importar\n{e.stderr.strip().splitlines()[-1]}")
+            continue
+        segundos, modulos = resultados[nombre]
+        print(f"{nombre:32} {segundos * 1000:8.1f} ms  {modulos:5d} módulos")
+
+    if "Antes (app)" in resultados and "Después (persistencia)" in resultados:
+        antes, despues = resultados["Antes (app)"][0], resultados["Después (persistencia)"][0]
+        print(f"Aceleración de la importación de la base de datos: x{antes / despues:.1f}")
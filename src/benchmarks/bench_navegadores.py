@@ -0,0 +1,63 @@
+"""
+Compara el tiempo por titulación del descubrimiento de guías antes y después del pool de navegadores.
+
+- Antes: un navegador nuevo por titulación y una espera fija de 5 segundos.
+- Después: un `PoolNavegadores` iniciado una vez y esperas explícitas sobre los enlaces.
+
+Uso (desde el directorio `src`, tras ejecutar `grados.py`):
+    python benchmarks/bench_navegadores.py [num_grados] [num_navegadores]
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+from selenium.webdriver.common.by import By
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from sostenibilidad.navegador import PoolNavegadores, setup_chrome_driver, XPATH_ENLACES_GUIAS
+
+
+def descubrir_antes(basic_link):
+    """Descubrimiento tal y como se hacía antes del pool de navegadores."""
+    driver = setup_chrome_driver()
+    try:
+        driver.get(f"{basic_link}/informacion-basica/guias-docentes")
+        time.sleep(5)
+        return [e.get_attribute('href') for e in driver.find_elements(By.XPATH, XPATH_ENLACES_GUIAS)]
+    finally:
+        driver.quit()
+
+
+def medir_antes(basic_links):
+    """Devuelve el tiempo total y el número de enlaces encontrados con el método anterior."""
+    inicio = time.perf_counter()
+    total_enlaces = sum(len(descubrir_antes(link)) for link in basic_links)
+    return time.perf_counter() - inicio, total_enlaces
+
+
+def medir_despues(basic_links, num_navegadores):
+    """Devuelve el tiempo total (incluido el arranque del pool) y el número de enlaces encontrados."""
+    inicio = time.perf_counter()
+    with PoolNavegadores(num_navegadores) as pool, ThreadPoolExecutor(max_workers=num_navegadores) as executor:
+        total_enlaces = sum(len(enlaces) for enlaces in executor.map(pool.obtener_enlaces_guias, basic_links))
+    return time.perf_counter() - inicio, total_enlaces
+
+
+if __name__ == "__main__":
+    num_grados = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    num_navegadores = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+
+    ruta_excel = os.path.join("sostenibilidad", "data", "enlaces_filtrados_grados_ubu.xlsx")
+    basic_links = [str(link) for link in pd.read_excel(ruta_excel).iloc[:num_grados, 0]]
+
+    segundos_antes, enlaces_antes = medir_antes(basic_links)
+    segundos_despues, enlaces_despues = medir_despues(basic_links, num_navegadores)
+
+    print(f"Titulaciones medidas: {len(basic_links)}")
+    print(f"Antes:   {segundos_antes / len(basic_links):.2f} s por titulación ({enlaces_antes} enlaces)")
+    print(f"Después: {segundos_despues / len(basic_links):.2f} s por titulación ({enlaces_despues} enlaces, "
+          f"{num_navegadores} navegadores)")
+    print(f"Aceleración: x{segundos_antes / segundos_despues:.1f}")
@@ -0,0 +1,84 @@
+"""
+Compara el coste de reunir los resultados de `API.py` antes y después del escritor en streaming.
+
+- Antes: `pd.concat` del DataFrame acumulado con cada nuevo resultado (coste cuadrático).
+- Registros: lista de diccionarios convertida en DataFrame una sola vez.
+- Streaming: `EscritorResultados`, que además añade cada resultado a un diario JSONL
+  y lo vuelca a disco (fsync) antes de continuar.
+
+No hace peticiones al modelo: las respuestas son sintéticas.
+
+Uso (desde el directorio `src`):
+    python benchmarks/bench_resultados_api.py [num_guias ...]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from sostenibilidad.resultados_guias import EscritorResultados, COLUMNAS_RESULTADOS
+
+
+def filas_sinteticas(num_guias):
+    """Genera resultados con el mismo formato que `interpretar_respuesta`."""
+    for i in range(num_guias):
+        yield {
+            "Name": f"Asignatura {i}",
+            "Degree_Master": "Grado en Ingeniería Informática",
+            "Code": str(5000 + i),
+            "Competences": "SDG 4 (Educación de calidad) - CT01" if i % 3 == 0 else "None",
+            "Sostenibilidad": i % 3 == 0,
+            "FileName": f"guia_{i}.pdf",
+        }
+
+
+def medir_antes(num_guias):
+    """Acumulación con `pd.concat`, tal y como se hacía antes."""
+    resultados = pd.DataFrame(columns=["Name", "Degree_Master", "Code", "Competences"])
+    for fila in filas_sinteticas(num_guias):
+        resultados = pd.concat([resultados, pd.DataFrame([fila])], ignore_index=True)
+    return resultados
+
+
+def medir_registros(num_guias):
+    """Registros en una lista y un único DataFrame al final."""
+    return pd.DataFrame(list(filas_sinteticas(num_guias)), columns=COLUMNAS_RESULTADOS)
+
+
+def medir_streaming(num_guias, ruta_diario):
+    """Escritor en streaming con diario JSONL."""
+    with EscritorResultados(ruta_diario, reanudar=False) as escritor:
+        guias = []
+        for fila in filas_sinteticas(num_guias):
+            guias.append((fila["FileName"], fila["Code"]))
+            escritor.escribir(fila, *guias[-1])
+        return escritor.dataframe(guias)
+
+
+def cronometrar(funcion, *args):
+    """Devuelve los segundos que tarda `funcion` y el número de filas obtenidas."""
+    inicio = time.perf_counter()
+    resultados = funcion(*args)
+    return time.perf_counter() - inicio, len(resultados)
+
+
+if __name__ == "__main__":
+    tamanos = [int(arg) for arg in sys.argv[1:]] or [5000, 20000]
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta_diario = os.path.join(carpeta, "resultados_guias.jsonl")
+        for num_guias in tamanos:
+            segundos_antes, filas_antes = cronometrar(medir_antes, num_guias)
+            segundos_registros, filas_registros = cronometrar(medir_registros, num_guias)
+            segundos_streaming, filas_streaming = cronometrar(medir_streaming, num_guias, ruta_diario)
+            assert filas_antes == filas_registros == filas_streaming == num_guias
+
+            print(f"{num_guias} guías:")
+            print(f"  pd.concat:  {segundos_antes:.2f} s")
+            print(f"  Registros:  {segundos_registros:.2f} s (x{segundos_antes / segundos_registros:.0f})")
+            print(f"  Streaming:  {segundos_streaming:.2f} s (x{segundos_antes / segundos_streaming:.0f}, "
+                  f"diario de {os.path.getsize(ruta_diario) / 1024:.0f} KiB)")
@@ -0,0 +1,574 @@
+"""
+Cliente común para las peticiones al modelo de lenguaje (`/v1/chat/completions`).
+
+`API.py` y los informes 1.19, 6.4 y 6.8 construían cada uno su petición con
+`requests.post`, sin reutilizar conexiones, sin tiempo máximo de espera y sin
+control del ritmo de peticiones; además quitaban el razonamiento previo a
+`</think>` partiendo la cadena y analizaban a mano una respuesta separada por
+comas, de modo que un nombre con una coma estropeaba el resultado.
+
+Este módulo centraliza:
+    - Un cliente compartido (`obtener_cliente`) construido con `cargar_configuracion`,
+      con un pool de conexiones, reintentos con espera exponencial ante 429/5xx,
+      un límite de peticiones simultáneas y un limitador de ritmo (cubo de fichas).
+    - Llamadas síncronas y asíncronas (`allamar`, `apedir_json`).
+    - Respuestas restringidas con un esquema JSON (`response_format` de tipo `json_schema`).
+    - La limpieza de la respuesta (razonamiento `</think>`, bloques de código Markdown).
+    - Un validador pequeño para el subconjunto de JSON Schema que usan los llamadores.
+    - Una reparación automática: si la respuesta no es válida se pide una sola vez
+      al modelo que la corrija, indicándole los errores encontrados.
+    - Métricas por llamador al estilo de Prometheus: llamadas, errores, tokens,
+      respuestas no válidas y reparadas, espera en el limitador e histograma de latencia.
+
+Configuración (variables de entorno):
+    - LLM_MAX_CONEXIONES: peticiones simultáneas al servidor (por defecto 4).
+    - LLM_PETICIONES_POR_SEGUNDO: ritmo máximo de peticiones; 0 lo desactiva (por defecto 2).
+    - LLM_RAFAGA: peticiones que se pueden enviar seguidas sin esperar (por defecto 4).
+    - LLM_TIMEOUT: segundos máximos de espera de cada respuesta (por defecto 300).
+    - LLM_REINTENTOS: reintentos ante 429/5xx o errores de conexión (por defecto 3). Una
+      respuesta que no llega antes de LLM_TIMEOUT no se reintenta.
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config import CONFIG_PATH, cargar_configuracion
+
+LLM_MAX_CONEXIONES = int(os.getenv("LLM_MAX_CONEXIONES", 4))
+LLM_PETICIONES_POR_SEGUNDO = float(os.getenv("LLM_PETICIONES_POR_SEGUNDO", 2))
+LLM_RAFAGA = int(os.getenv("LLM_RAFAGA", 4))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", 300))
+LLM_REINTENTOS = int(os.getenv("LLM_REINTENTOS", 3))
+TIMEOUT_CONEXION = 10
+# Esperas entre reintentos: 1 s, 2 s, 4 s... (o lo que indique la cabecera Retry-After)
+FACTOR_ESPERA = 1
+ESTADOS_REINTENTABLES = (429, 500, 502, 503, 504)
+
+TEMPERATURA = 0.2
+
+# Límites superiores (en segundos) de los intervalos del histograma de latencia
+INTERVALOS_LATENCIA = (0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+_TIPOS = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "integer": int,
+    "number": (int, float),
+    "boolean": bool,
+}
+
+
+class ErrorLLM(Exception):
+    """Error al obtener una respuesta del modelo."""
+
+
+class RespuestaInvalida(ErrorLLM):
+    """La respuesta del modelo no cumple el esquema pedido, ni siquiera tras repararla."""
+
+    def __init__(self, mensaje, contenido):
+        super().__init__(mensaje)
+        self.contenido = contenido
+
+
+class MetricasLLM:
+    """
+    Contadores por llamador de las peticiones al modelo. Se pueden usar desde varios hilos.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._llamadores = {}
+
+    def _contadores(self, llamador):
+        return self._llamadores.setdefault(llamador, {
+            "llamadas": 0, "errores": 0, "invalidas": 0, "reparadas": 0,
+            "tokens_entrada": 0, "tokens_salida": 0, "segundos_espera": 0.0,
+            "segundos": 0.0, "segundos_max": 0.0, "latencia": [0] * len(INTERVALOS_LATENCIA),
+        })
+
+    def registrar_llamada(self, llamador, segundos, error=False, tokens_entrada=0, tokens_salida=0):
+        """Registra una petición HTTP al modelo, su latencia y los tokens que ha consumido."""
+        with self._lock:
+            contadores = self._contadores(llamador)
+            contadores["llamadas"] += 1
+            contadores["errores"] += int(error)
+            contadores["tokens_entrada"] += tokens_entrada
+            contadores["tokens_salida"] += tokens_salida
+            contadores["segundos"] += segundos
+            contadores["segundos_max"] = max(contadores["segundos_max"], segundos)
+            for i, limite in enumerate(INTERVALOS_LATENCIA):
+                if segundos <= limite:
+                    contadores["latencia"][i] += 1
+
+    def registrar_espera(self, llamador, segundos):
+        """Registra el tiempo que una petición ha esperado en el limitador de ritmo."""
+        with self._lock:
+            self._contadores(llamador)["segundos_espera"] += segundos
+
+    def registrar_invalida(self, llamador, reparada):
+        """Registra una respuesta que no cumplía el esquema y si la reparación funcionó."""
+        with self._lock:
+            contadores = self._contadores(llamador)
+            contadores["invalidas"] += 1
+            contadores["reparadas"] += int(reparada)
+
+    def obtener(self, llamador=None):
+        """Devuelve una copia de los contadores de un llamador, o de todos si es None."""
+        with self._lock:
+            if llamador is not None:
+                contadores = self._contadores(llamador)
+                return {**contadores, "latencia": list(contadores["latencia"])}
+            return {nombre: {**contadores, "latencia": list(contadores["latencia"])}
+                    for nombre, contadores in self._llamadores.items()}
+
+    def resumen(self, llamador=None):
+        """Devuelve un texto con la tasa de respuestas no válidas, los tokens y la latencia de cada llamador."""
+        lineas = []
+        for nombre, c in sorted(self.obtener().items()):
+            if llamador is not None and nombre != llamador:
+                continue
+            media = c["segundos"] / c["llamadas"] if c["llamadas"] else 0
+            tasa = 100 * c["invalidas"] / c["llamadas"] if c["llamadas"] else 0
+            lineas.append(
+                f"LLM [{nombre}]: {c['llamadas']} llamadas, {c['errores']} con error, "
+                f"{c['invalidas']} respuestas no válidas ({tasa:.1f}%, {c['reparadas']} reparadas), "
+                f"{c['tokens_entrada']} tokens de entrada y {c['tokens_salida']} de salida, "
+                f"latencia media {media:.2f} s, máxima {c['segundos_max']:.2f} s, "
+                f"{c['segundos_espera']:.1f} s de espera en el limitador"
+            )
+        return "\n".join(lineas) or "LLM: sin llamadas"
+
+    def exportar(self):
+        """
+        Devuelve las métricas en el formato de texto de Prometheus, con el llamador como etiqueta.
+
+        Returns:
+            str: Las métricas `llm_peticiones_total`, `llm_errores_total`, `llm_tokens_total`,
+                `llm_respuestas_invalidas_total`, `llm_respuestas_reparadas_total`,
+                `llm_espera_segundos_total` y el histograma `llm_latencia_segundos`.
+        """
+        todos = sorted(self.obtener().items())
+        lineas = []
+
+        def contador(nombre, ayuda, clave, etiquetas=""):
+            lineas.append(f"# HELP {nombre} {ayuda}")
+            lineas.append(f"# TYPE {nombre} counter")
+            for llamador, c in todos:
+                lineas.append(f'{nombre}{{llamador="{llamador}"{etiquetas}}} {c[clave]}')
+
+        contador("llm_peticiones_total", "Peticiones enviadas al modelo.", "llamadas")
+        contador("llm_errores_total", "Peticiones al modelo que han fallado.", "errores")
+        contador("llm_respuestas_invalidas_total", "Respuestas que no cumplían el esquema.", "invalidas")
+        contador("llm_respuestas_reparadas_total", "Respuestas no válidas corregidas con una reparación.", "reparadas")
+        contador("llm_espera_segundos_total", "Segundos de espera en el limitador de ritmo.", "segundos_espera")
+        lineas.append("# HELP llm_tokens_total Tokens consumidos, según el campo usage de la respuesta.")
+        lineas.append("# TYPE llm_tokens_total counter")
+        for llamador, c in todos:
+            lineas.append(f'llm_tokens_total{{llamador="{llamador}",tipo="entrada"}} {c["tokens_entrada"]}')
+            lineas.append(f'llm_tokens_total{{llamador="{llamador}",tipo="salida"}} {c["tokens_salida"]}')
+
+        lineas.append("# HELP llm_latencia_segundos Latencia de las peticiones al modelo.")
+        lineas.append("# TYPE llm_latencia_segundos histogram")
+        for llamador, c in todos:
+            for limite, cuenta in zip(INTERVALOS_LATENCIA, c["latencia"]):
+                lineas.append(f'llm_latencia_segundos_bucket{{llamador="{llamador}",le="{limite}"}} {cuenta}')
+            lineas.append(f'llm_latencia_segundos_bucket{{llamador="{llamador}",le="+Inf"}} {c["llamadas"]}')
+            lineas.append(f'llm_latencia_segundos_sum{{llamador="{llamador}"}} {c["segundos"]}')
+            lineas.append(f'llm_latencia_segundos_count{{llamador="{llamador}"}} {c["llamadas"]}')
+        return "\n".join(lineas) + "\n"
+
+
+class LimitadorRitmo:
+    """
+    Cubo de fichas: permite ráfagas de hasta `capacidad` peticiones y, después,
+    `por_segundo` peticiones por segundo. Se puede usar desde varios hilos.
+    """
+
+    def __init__(self, por_segundo, capacidad):
+        self.por_segundo = por_segundo
+        self.capacidad = max(1, capacidad)
+        self._fichas = float(self.capacidad)
+        self._ultima = time.monotonic()
+        self._lock = threading.Lock()
+
+    def adquirir(self):
+        """
+        Espera hasta que haya una ficha disponible y la consume.
+
+        Returns:
+            float: Segundos esperados.
+        """
+        if self.por_segundo <= 0:
+            return 0.0
+        inicio = time.monotonic()
+        while True:
+            with self._lock:
+                ahora = time.monotonic()
+                self._fichas = min(self.capacidad, self._fichas + (ahora - self._ultima) * self.por_segundo)
+                self._ultima = ahora
+                if self._fichas >= 1:
+                    self._fichas -= 1
+                    return ahora - inicio
+                espera = (1 - self._fichas) / self.por_segundo
+            time.sleep(espera)
+
+
+metricas = MetricasLLM()
+
+
+def _contenido_mensaje(respuesta):
+    """
+    Devuelve el contenido del primer mensaje de una respuesta de chat/completions.
+
+    Raises:
+        ErrorLLM: Si la respuesta no tiene la forma esperada.
+    """
+    choices = respuesta.get("choices")
+    if not isinstance(choices, list) or not choices or not isinstance(choices[0], dict):
+        raise ErrorLLM("respuesta sin choices")
+    mensaje = choices[0].get("message")
+    contenido = mensaje.get("content") if isinstance(mensaje, dict) else None
+    if contenido is not None and not isinstance(contenido, str):
+        raise ErrorLLM("respuesta con un contenido que no es texto")
+    return (contenido or "").strip()
+
+
+def quitar_razonamiento(contenido):
+    """
+    Elimina de la respuesta el razonamiento previo a `</think>` y los bloques de código Markdown.
+
+    Args:
+        contenido (str): Contenido de la respuesta del modelo.
+
+    Returns:
+        str: El contenido limpio.
+    """
+    if "</think>" in contenido:
+        contenido = contenido.split("</think>")[-1]
+    contenido = contenido.strip()
+    if contenido.startswith("```"):
+        contenido = contenido.strip("`").strip()
+        if contenido.lower().startswith("json"):
+            contenido = contenido[4:].strip()
+    return contenido
+
+
+def extraer_json(contenido):
+    """
+    Obtiene el objeto JSON de la respuesta del modelo, ignorando el texto que lo rodee.
+
+    Args:
+        contenido (str): Contenido de la respuesta del modelo.
+
+    Returns:
+        dict: El objeto JSON.
+
+    Raises:
+        ValueError: Si la respuesta no contiene un objeto JSON válido.
+    """
+    contenido = quitar_razonamiento(contenido)
+    inicio, fin = contenido.find("{"), contenido.rfind("}")
+    if inicio == -1 or fin < inicio:
+        raise ValueError("la respuesta no contiene un objeto JSON")
+    try:
+        datos = json.loads(contenido[inicio:fin + 1])
+    except json.JSONDecodeError as e:
+        raise ValueError(f"JSON mal formado: {e}") from e
+    if not isinstance(datos, dict):
+        raise ValueError("la respuesta no es un objeto JSON")
+    return datos
+
+
+def validar(datos, esquema, ruta="$"):
+    """
+    Valida un valor contra un esquema JSON.
+
+    Admite el subconjunto de JSON Schema que usan los llamadores: `type`,
+    `properties`, `required`, `items`, `enum`, `minimum` y `maximum`.
+
+    Args:
+        datos: El valor que se valida.
+        esquema (dict): El esquema.
+        ruta (str): Ruta del valor dentro del documento, para los mensajes de error.
+
+    Returns:
+        list[str]: Los errores encontrados (vacía si el valor es válido).
+    """
+    tipo = esquema.get("type")
+    if tipo:
+        # bool es subclase de int: no se acepta como número
+        if not isinstance(datos, _TIPOS[tipo]) or (tipo in ("integer", "number") and isinstance(datos, bool)):
+            return [f"{ruta}: se esperaba {tipo}"]
+
+    errores = []
+    if "enum" in esquema and datos not in esquema["enum"]:
+        errores.append(f"{ruta}: valor no permitido {datos!r}")
+    if "minimum" in esquema and datos < esquema["minimum"]:
+        errores.append(f"{ruta}: menor que {esquema['minimum']}")
+    if "maximum" in esquema and datos > esquema["maximum"]:
+        errores.append(f"{ruta}: mayor que {esquema['maximum']}")
+
+    if tipo == "object":
+        for campo in esquema.get("required", ()):
+            if campo not in datos:
+                errores.append(f"{ruta}.{campo}: falta el campo")
+        for campo, subesquema in esquema.get("properties", {}).items():
+            if campo in datos:
+                errores.extend(validar(datos[campo], subesquema, f"{ruta}.{campo}"))
+    elif tipo == "array" and "items" in esquema:
+        for i, elemento in enumerate(datos):
+            errores.extend(validar(elemento, esquema["items"], f"{ruta}[{i}]"))
+    return errores
+
+
+def construir_peticion_json(modelo, mensajes, esquema, nombre_esquema, temperatura=TEMPERATURA):
+    """Devuelve el cuerpo de una petición cuya respuesta debe cumplir `esquema`."""
+    return {
+        "model": modelo,
+        "messages": mensajes,
+        "temperature": temperatura,
+        "response_format": {
+            "type": "json_schema",
+            "json_schema": {"name": nombre_esquema, "strict": True, "schema": esquema},
+        },
+    }
+
+
+def crear_sesion_llm(api_key, max_conexiones=LLM_MAX_CONEXIONES, reintentos=LLM_REINTENTOS):
+    """
+    Crea una sesión HTTP para el servidor del modelo con pool de conexiones y reintentos.
+
+    Los reintentos se aplican también a POST (las peticiones al modelo no modifican
+    nada en el servidor) y respetan la cabecera Retry-After de las respuestas 429.
+    Solo se reintentan los errores de conexión y las respuestas 429/5xx: un timeout
+    de lectura no, porque cada intento podría volver a esperar LLM_TIMEOUT segundos.
+
+    Args:
+        api_key (str): Clave de la API.
+        max_conexiones (int): Conexiones que se mantienen abiertas con el servidor.
+        reintentos (int): Número máximo de reintentos por petición.
+
+    Returns:
+        requests.Session: La sesión configurada.
+    """
+    retry = Retry(
+        total=reintentos,
+        connect=reintentos,
+        read=0,
+        status=reintentos,
+        backoff_factor=FACTOR_ESPERA,
+        status_forcelist=ESTADOS_REINTENTABLES,
+        allowed_methods=frozenset({"POST"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_conexiones, max_retries=retry)
+    sesion = requests.Session()
+    sesion.mount("http://", adapter)
+    sesion.mount("https://", adapter)
+    sesion.headers.update({"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"})
+    return sesion
+
+
+class ClienteLLM:
+    """
+    Cliente del servidor del modelo con pool de conexiones, límite de peticiones
+    simultáneas y limitador de ritmo. Se puede usar desde varios hilos.
+
+    Uso:
+        cliente = obtener_cliente()
+        datos = cliente.pedir_json(sistema, usuario, esquema, "nombre", llamador="informe")
+        datos = await cliente.apedir_json(sistema, usuario, esquema, "nombre", llamador="informe")
+    """
+
+    def __init__(self, config=None, max_conexiones=LLM_MAX_CONEXIONES, peticiones_por_segundo=LLM_PETICIONES_POR_SEGUNDO,
+                 rafaga=LLM_RAFAGA, reintentos=LLM_REINTENTOS, timeout=LLM_TIMEOUT, metricas_llm=None):
+        self.config = dict(config or cargar_configuracion())
+        self.url = f"{self.config['base_url']}/v1/chat/completions"
+        self.max_conexiones = max(1, max_conexiones)
+        self.timeout = timeout
+        self.metricas = metricas_llm or metricas
+        self.sesion = crear_sesion_llm(self.config["api_key"], self.max_conexiones, reintentos)
+        self.limitador = LimitadorRitmo(peticiones_por_segundo, rafaga)
+        # Las peticiones que superan el límite esperan aquí, en lugar de saturar el servidor
+        self._en_vuelo = threading.BoundedSemaphore(self.max_conexiones)
+
+    def llamar(self, cuerpo, timeout=None, llamador="general"):
+        """
+        Envía una petición a `/v1/chat/completions` y devuelve el contenido de la respuesta.
+
+        Args:
+            cuerpo (dict): Cuerpo de la petición.
+            timeout (float | None): Segundos máximos de espera de la respuesta;
+                por defecto, los del cliente.
+            llamador (str): Nombre con el que se registran las métricas.
+
+        Returns:
+            str: El contenido del mensaje de respuesta.
+
+        Raises:
+            ErrorLLM: Si la petición falla tras los reintentos o el servidor responde con un error.
+        """
+        with self._en_vuelo:
+            self.metricas.registrar_espera(llamador, self.limitador.adquirir())
+            inicio = time.perf_counter()
+            error = True
+            uso = {}
+            try:
+                response = self.sesion.post(self.url, json=cuerpo,
+                                            timeout=(TIMEOUT_CONEXION, timeout or self.timeout))
+                if response.status_code != 200:
+                    raise ErrorLLM(f"{response.status_code} - {response.text}")
+                respuesta = response.json()
+                if not isinstance(respuesta, dict):
+                    raise ErrorLLM("respuesta sin choices")
+                uso = respuesta.get("usage") if isinstance(respuesta.get("usage"), dict) else {}
+                contenido = _contenido_mensaje(respuesta)
+                error = False
+                return contenido
+            except (requests.exceptions.RequestException, ValueError) as e:
+                raise ErrorLLM(str(e)) from e
+            finally:
+                self.metricas.registrar_llamada(llamador, time.perf_counter() - inicio, error,
+                                                uso.get("prompt_tokens", 0), uso.get("completion_tokens", 0))
+
+    def pedir_json(self, sistema, usuario, esquema, nombre_esquema, temperatura=TEMPERATURA, timeout=None,
+                   llamador="general", reparar=True):
+        """
+        Pide al modelo una respuesta JSON que cumpla `esquema` y la devuelve validada.
+
+        Si la respuesta no es válida y `reparar` es True, se envía una única petición de
+        reparación con la respuesta anterior y los errores encontrados.
+
+        Args:
+            sistema (str): Prompt de sistema.
+            usuario (str): Mensaje de usuario.
+            esquema (dict): Esquema JSON que debe cumplir la respuesta.
+            nombre_esquema (str): Nombre del esquema en `response_format`.
+            temperatura (float): Temperatura de la petición.
+            timeout (float | None): Segundos máximos de espera de cada respuesta.
+            llamador (str): Nombre con el que se registran las métricas.
+            reparar (bool): Si se intenta reparar una respuesta no válida.
+
+        Returns:
+            dict: La respuesta del modelo, validada.
+
+        Raises:
+            ErrorLLM: Si alguna petición falla.
+            RespuestaInvalida: Si la respuesta sigue sin ser válida.
+        """
+        modelo = self.config["model"]
+        mensajes = [{"role": "system", "content": sistema}, {"role": "user", "content": usuario}]
+        contenido = self.llamar(construir_peticion_json(modelo, mensajes, esquema, nombre_esquema, temperatura),
+                                timeout, llamador)
+
+        datos, errores = _interpretar(contenido, esquema)
+        if not errores:
+            return datos
+        if not reparar:
+            self.metricas.registrar_invalida(llamador, reparada=False)
+            raise RespuestaInvalida("; ".join(errores), contenido)
+
+        mensajes_reparacion = mensajes + [
+            {"role": "assistant", "content": contenido},
+            {"role": "user", "content": (
+                "Your previous answer is not valid for the required JSON schema: " + "; ".join(errores) +
+                ". Return ONLY the corrected JSON object, without any other text."
+            )},
+        ]
+        contenido_reparado = self.llamar(
+            construir_peticion_json(modelo, mensajes_reparacion, esquema, nombre_esquema, temperatura),
+            timeout, llamador
+        )
+
+        datos, errores = _interpretar(contenido_reparado, esquema)
+        self.metricas.registrar_invalida(llamador, reparada=not errores)
+        if errores:
+            raise RespuestaInvalida("; ".join(errores), contenido_reparado)
+        return datos
+
+    async def allamar(self, cuerpo, timeout=None, llamador="general"):
+        """Versión asíncrona de `llamar`: la petición se hace en un hilo aparte."""
+        return await asyncio.to_thread(self.llamar, cuerpo, timeout, llamador)
+
+    async def apedir_json(self, sistema, usuario, esquema, nombre_esquema, temperatura=TEMPERATURA, timeout=None,
+                          llamador="general", reparar=True):
+        """Versión asíncrona de `pedir_json`: las peticiones se hacen en un hilo aparte."""
+        return await asyncio.to_thread(self.pedir_json, sistema, usuario, esquema, nombre_esquema,
+                                       temperatura, timeout, llamador, reparar)
+
+    def cerrar(self):
+        """Cierra la sesión HTTP."""
+        self.sesion.close()
+
+
+_cliente = None
+_lock_cliente = threading.Lock()
+# Configuración leída de config.json y la marca (fecha de modificación y tamaño) del fichero
+_config_guardada = None
+_marca_config = None
+
+
+def _configuracion_actual():
+    """Devuelve la configuración de `cargar_configuracion`, releyéndola solo si config.json ha cambiado."""
+    global _config_guardada, _marca_config
+    try:
+        estado = os.stat(CONFIG_PATH)
+        marca = (estado.st_mtime_ns, estado.st_size)
+    except OSError:
+        marca = None
+    if _config_guardada is None or marca != _marca_config:
+        _config_guardada, _marca_config = cargar_configuracion(), marca
+    return _config_guardada
+
+
+def obtener_cliente(config=None):
+    """
+    Devuelve el cliente compartido por todo el proceso.
+
+    Si la configuración (la indicada o la de `cargar_configuracion`, que solo se
+    vuelve a leer cuando cambia config.json) ha cambiado desde que se creó, se crea
+    un cliente nuevo con la configuración actual.
+
+    Args:
+        config (dict | None): Configuración de la API (base_url, api_key, model).
+
+    Returns:
+        ClienteLLM: El cliente compartido.
+    """
+    global _cliente
+    with _lock_cliente:
+        config = dict(config or _configuracion_actual())
+        if _cliente is None or _cliente.config != config:
+            # El cliente anterior no se cierra: puede tener peticiones en curso en otros hilos
+            _cliente = ClienteLLM(config)
+        return _cliente
+
+
+def llamar_modelo(cuerpo, config=None, timeout=None, llamador="general"):
+    """Envía una petición al modelo con el cliente compartido (ver `ClienteLLM.llamar`)."""
+    return obtener_cliente(config).llamar(cuerpo, timeout, llamador)
+
+
+def pedir_json(sistema, usuario, esquema, nombre_esquema, config=None, temperatura=TEMPERATURA, timeout=None,
+               llamador="general", reparar=True):
+    """Pide una respuesta JSON con el cliente compartido (ver `ClienteLLM.pedir_json`)."""
+    return obtener_cliente(config).pedir_json(sistema, usuario, esquema, nombre_esquema, temperatura, timeout,
+                                              llamador, reparar)
+
+
+def _interpretar(contenido, esquema):
+    """Devuelve el objeto JSON de la respuesta y la lista de errores de validación."""
+    try:
+        datos = extraer_json(contenido)
+    except ValueError as e:
+        return None, [str(e)]
+    return datos, validar(datos, esquema)
@@ -4,9 +4,46 @@ from docx.shared import Inches
 import os
 import sys
 import importlib  # Importar dinámicamente el código de los informes
+import threading
 import tkinter as tk
 from tkinter import ttk
 
+# Los informes se importan por su nombre también cuando la aplicación llama a este módulo
+DIRECTORIO_INFORMES = os.path.dirname(os.path.abspath(__file__))
+if DIRECTORIO_INFORMES not in sys.path:
+    sys.path.append(DIRECTORIO_INFORMES)
+
+# Un bloqueo por informe: en la aplicación se pueden ejecutar a la vez dos trabajos del
+# mismo informe, y recargar su módulo reiniciaría las variables globales del que está en curso
+_bloqueos_informes = {}
+_lock_bloqueos = threading.Lock()
+
+
+def bloqueo_informe(nombre):
+    """Devuelve el bloqueo con el que se carga y se genera un informe."""
+    with _lock_bloqueos:
+        return _bloqueos_informes.setdefault(nombre, threading.Lock())
+
+
+def cargar_informe(nombre):
+    """
+    Importa el módulo de un informe. Si ya estaba importado (la aplicación ejecuta
+    los informes en su propio proceso), se recarga para que lea de nuevo la
+    configuración, sin volver a importar sus dependencias.
+
+    Se debe llamar con `bloqueo_informe(nombre)` adquirido, y mantenerlo hasta que
+    termine de generarse el informe.
+
+    Args:
+        nombre (str): Nombre del módulo (ej. "informe_6_1").
+
+    Returns:
+        module: El módulo del informe.
+    """
+    if nombre in sys.modules:
+        return importlib.reload(sys.modules[nombre])
+    return importlib.import_module(nombre)
+
 def crear_word_documento():
     """
     Crea el documento Word utilizando la plantilla 'modelo_base.docx',
@@ -113,28 +150,29 @@ def ejecutar_informe_especifico(anho, informe, excel):
                    e imprime un mensaje de error.
     """
     try:
-         # Importa dinámicamente los ficheros py
-        if  informe == "1_19":
-            informe_1_19 = importlib.import_module('informe_1_19') 
-            informe_1_19.generar()
-        elif informe == "6_1":
-            informe_6_1 = importlib.import_module('informe_6_1') 
-            informe_6_1.generar(anho)  
-        elif informe == "6_2":
-            informe_6_2 = importlib.import_module('informe_6_2') 
-            informe_6_2.generar(anho) 
-        elif informe == "6_3":
-            informe_6_3 = importlib.import_module('informe_6_3') 
-            informe_6_3.generar(anho) 
-        elif informe == "6_4":
-            informe_6_4 = importlib.import_module('informe_6_4') 
-            informe_6_4.generar(excel) 
-        elif informe == "6_7":
-            informe_6_7 = importlib.import_module('informe_6_7')  
-            informe_6_7.generar(anho)
-        elif informe == "6_8":
-            informe_6_8 = importlib.import_module('informe_6_8') 
-            informe_6_8.generar(anho)
+        with bloqueo_informe(f"informe_{informe}"):
+             # Importa dinámicamente los ficheros py
+            if  informe == "1_19":
+                informe_1_19 = cargar_informe('informe_1_19') 
+                informe_1_19.generar()
+            elif informe == "6_1":
+                informe_6_1 = cargar_informe('informe_6_1') 
+                informe_6_1.generar(anho)  
+            elif informe == "6_2":
+                informe_6_2 = cargar_informe('informe_6_2') 
+                informe_6_2.generar(anho) 
+            elif informe == "6_3":
+                informe_6_3 = cargar_informe('informe_6_3') 
+                informe_6_3.generar(anho) 
+            elif informe == "6_4":
+                informe_6_4 = cargar_informe('informe_6_4') 
+                informe_6_4.generar(excel) 
+            elif informe == "6_7":
+                informe_6_7 = cargar_informe('informe_6_7')  
+                informe_6_7.generar(anho)
+            elif informe == "6_8":
+                informe_6_8 = cargar_informe('informe_6_8') 
+                informe_6_8.generar(anho)
        
     except Exception as e:
         print(f"Error al cargar informe_{informe}.py: {e}")
@@ -1,6 +1,3 @@
-import csv
-import io
-import json
 import os
 import sys
 import time
@@ -36,6 +33,7 @@ if SRC_DIR not in sys.path:
     sys.path.append(SRC_DIR)
 
 from config import cargar_configuracion
+from cliente_llm import ErrorLLM, metricas, pedir_json
 
 
 # Variable global
@@ -106,12 +104,25 @@ def limpiar_html(html_content):
     texto_limpio = soup.get_text(separator="\n", strip=True)
     return " ".join(texto_limpio.split()[:3500])
     
+# Esquema de la respuesta del modelo con los datos de un contrato
+ESQUEMA_DATOS_CONTRATO = {
+    "type": "object",
+    "properties": {
+        "building": {"type": "string"},
+        "contract": {"type": "string"},
+        "maintenance_type": {"type": "string"},
+        "file": {"type": "string"},
+    },
+    "required": ["building", "contract", "maintenance_type", "file"],
+}
+
 def extraer_datos_llm(html_texto, url):
     """
     Extrae datos estructurados de texto HTML utilizando un modelo de lenguaje grande (LLM).
 
     Envía el texto HTML a la API del LLM con instrucciones específicas para extraer
-    campos como Edificio, Contrato, Tipo de Mantenimiento, Expediente y Enlace.
+    campos como Edificio, Contrato, Tipo de Mantenimiento y Expediente, y pide la
+    respuesta en JSON con `ESQUEMA_DATOS_CONTRATO`. El enlace es la propia URL.
 
     Args:
         html_texto (str): El texto limpio extraído del HTML.
@@ -119,95 +130,51 @@ def extraer_datos_llm(html_texto, url):
 
     Returns:
         dict or None: Un diccionario con los datos extraídos si la API responde correctamente
-                      y los datos tienen el formato esperado, de lo contrario, None.
+                      y los datos cumplen el esquema (tras un intento de reparación), de lo contrario, None.
     """
     if not html_texto:
         return None
 
-    body = {
-        "model": myModel,
-        "messages": [
-            {
-                "role": "system",
-                "content": (
-                    "Extract and return only the following fields:\n"
-                    "1. Building: Extracted from Objeto. If the text mentions 'buildings', return 'All university buildings'.\n"
-                    "2. Contract: Extracted from the CPV section, including the text after the number [CPV Code]. This will be the detailed description of the contract, e.g., 'Servicios de reparación y mantenimiento de equipos eléctricos de edificios'.\n"
-                    "3. Maintenance Type:  Return the information following the format X(Y), where X is the type and Y the number\n"
-                        "Base on the type of contract chose to which one it belongs."
-                        "1. Preventive Maintenance --- Routine maintenance tasks performed to prevent equipment failures and extend the lifespan of building systems\n"
-                        "2. Corrective Maintenance --- Reactive maintenance tasks performed to correct issues as they arise\n"
-                        "3. Predictive Maintenance --- Maintenance activities based on the analysis of data and condition monitoring to predict and prevent potential failures \n"
-                        "4. Routine Maintenance --- Regular, often daily or weekly, maintenance tasks that ensure the smooth operation and cleanliness of campus buildings\n"
-                        "5. Emergency Maintenance --- Urgent maintenance tasks performed in response to unexpected breakdowns or safety hazards that require immediate attention\n"
-                        "6. Deferred Maintenance --- Maintenance tasks that are postponed due to budget constraints, resource limitations, or scheduling issues\n"
-                        "7. Sustainable Maintenance --- Maintenance activities focused on sustainability and energy efficiency to reduce environmental impact\n"
-                        "8. Capital Maintenance --- Large-scale maintenance projects that involve significant investments and are often planned and budgeted for in advance \n"
-                        "9. Seasonal Maintenance --- Maintenance tasks specific to certain times of the year to prepare buildings for seasonal changes \n"
-                        "10. Compliance Maintenance --- Maintenance activities conducted to ensure compliance with legal, safety, and regulatory standards\n"
-                        "11. Custodial Maintenance --- Daily cleaning and janitorial tasks that maintain the cleanliness and hygiene of campus buildings\n"
-                        "12. Technical Maintenance --- Specialized maintenance tasks that require technical knowledge and skills\n"
-                        "13. Grounds Maintenance --- Maintenance tasks focused on the outdoor areas and landscaping of the campus \n"
-                        "14. Building Services Maintenance --- Maintenance of essential building services and utilities \n"
-
-                    "4. File: Extracted from 'Expediente'. If the text appears in the format 'Expediente X UBU/2023/0018 (Company Name)', return only 'UBU/2023/0018' and ignore the company name inside parentheses.\n"
-                    "5. Link:"
-                    "Extract and return only the following fields in a single line, separated by commas in this format:\n"
-                    "Building,Contract,Maintenance Type,File,Link\n"
-                    "Do NOT include extra text (like the format), explanations, or headers.\n"
-                    "Ensure that you return ONLY these five fields in a single line, without extra text."
-
-                        )
-            },
-            {
-                "role": "user",
-                "content": html_texto
-            }
-        ],
-        "temperature": 0.2
-    }
-
-    body_json = json.dumps(body)
-
-    response = requests.post(
-        f"{base_url}/v1/chat/completions",
-        headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
-        data=body_json
+    prompt = (
+        "Extract and return only the following fields:\n"
+        "1. Building: Extracted from Objeto. If the text mentions 'buildings', return 'All university buildings'.\n"
+        "2. Contract: Extracted from the CPV section, including the text after the number [CPV Code]. This will be the detailed description of the contract, e.g., 'Servicios de reparación y mantenimiento de equipos eléctricos de edificios'.\n"
+        "3. Maintenance Type:  Return the information following the format X(Y), where X is the type and Y the number\n"
+            "Base on the type of contract chose to which one it belongs."
+            "1. Preventive Maintenance --- Routine maintenance tasks performed to prevent equipment failures and extend the lifespan of building systems\n"
+            "2. Corrective Maintenance --- Reactive maintenance tasks performed to correct issues as they arise\n"
+            "3. Predictive Maintenance --- Maintenance activities based on the analysis of data and condition monitoring to predict and prevent potential failures \n"
+            "4. Routine Maintenance --- Regular, often daily or weekly, maintenance tasks that ensure the smooth operation and cleanliness of campus buildings\n"
+            "5. Emergency Maintenance --- Urgent maintenance tasks performed in response to unexpected breakdowns or safety hazards that require immediate attention\n"
+            "6. Deferred Maintenance --- Maintenance tasks that are postponed due to budget constraints, resource limitations, or scheduling issues\n"
+            "7. Sustainable Maintenance --- Maintenance activities focused on sustainability and energy efficiency to reduce environmental impact\n"
+            "8. Capital Maintenance --- Large-scale maintenance projects that involve significant investments and are often planned and budgeted for in advance \n"
+            "9. Seasonal Maintenance --- Maintenance tasks specific to certain times of the year to prepare buildings for seasonal changes \n"
+            "10. Compliance Maintenance --- Maintenance activities conducted to ensure compliance with legal, safety, and regulatory standards\n"
+            "11. Custodial Maintenance --- Daily cleaning and janitorial tasks that maintain the cleanliness and hygiene of campus buildings\n"
+            "12. Technical Maintenance --- Specialized maintenance tasks that require technical knowledge and skills\n"
+            "13. Grounds Maintenance --- Maintenance tasks focused on the outdoor areas and landscaping of the campus \n"
+            "14. Building Services Maintenance --- Maintenance of essential building services and utilities \n"
+
+        "4. File: Extracted from 'Expediente'. If the text appears in the format 'Expediente X UBU/2023/0018 (Company Name)', return only 'UBU/2023/0018' and ignore the company name inside parentheses.\n"
+        "Return ONLY a JSON object with the keys 'building', 'contract', 'maintenance_type' and 'file', "
+        "without extra text, explanations, or headers."
     )
 
-    if response.status_code != 200:
-        print(f"Error en la API para {url}: {response.status_code} - {response.text}")
-        return None
-
-
-    #  Obtener respuesta limpia
-    message_content = response.json().get('choices', [{}])[0].get('message', {}).get('content', '').strip()
-
-    #  Eliminar `</think>` si existe
-    if "</think>" in message_content:
-        message_content = message_content.split("</think>")[-1].strip()
-
-    #  Procesar como CSV usando `csv.reader`
     try:
-        csv_reader = csv.reader(io.StringIO(message_content))  # Convertir texto a archivo virtual
-        contenido_separado = next(csv_reader)  # Obtener la primera (y única) línea
-
-    except Exception as e:
-        print(f"Error al leer CSV: {e}\nTexto recibido:\n{message_content}")
+        datos = pedir_json(prompt, html_texto, ESQUEMA_DATOS_CONTRATO, "contrato", config=config,
+                           llamador="informe_1_19")
+    except ErrorLLM as e:
+        print(f"Error en la API para {url}: {e}")
         return None
 
-    #  Validar si tiene los 5 elementos requeridos
-    if len(contenido_separado) >= 5:
-        return {
-            "Building": contenido_separado[0].strip(),
-            "Contract": contenido_separado[1].strip(),
-            "Maintenance Type": contenido_separado[2].strip(),
-            "File": contenido_separado[3].strip(),
-            "Link": url
-        }
-    else:
-        print(f" Error: La respuesta de la IA no tiene el formato correcto.\nRecibido:\n{message_content}")
-        return None
+    return {
+        "Building": datos["building"].strip(),
+        "Contract": datos["contract"].strip(),
+        "Maintenance Type": datos["maintenance_type"].strip(),
+        "File": datos["file"].strip(),
+        "Link": url
+    }
         
 def ejecutar_API(enlaces):
     """
@@ -560,6 +527,7 @@ def generar():
     docx_path =os.path.join(base_dir, 'Campus_Building_Maintenance.docx')
     enlaces= ejecutar_busquedas(docx_path)
     datos = ejecutar_API(enlaces)
+    print(metricas.resumen("informe_1_19"))
     generar_informe(datos)
 
 
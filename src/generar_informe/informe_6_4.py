@@ -1,5 +1,4 @@
 
-import json
 import os
 import sys
 import re
@@ -16,6 +15,7 @@ from openpyxl.styles import Font, PatternFill, Alignment
 from openpyxl.utils import get_column_letter
 from openpyxl import load_workbook
 from config import cargar_configuracion
+from cliente_llm import ErrorLLM, metricas, pedir_json
 
 
 
@@ -157,11 +157,19 @@ def imputar_por_anho(df):
 
     return df
 
+# Esquema de la respuesta del modelo al clasificar un proyecto
+ESQUEMA_SOSTENIBLE = {
+    "type": "object",
+    "properties": {"sostenible": {"type": "string", "enum": ["yes", "no"]}},
+    "required": ["sostenible"],
+}
+
 def es_sostenible_api(excel):
     """
     Determina si un proyecto es sostenible utilizando una API externa.
 
-    Envía el título del proyecto a una API de clasificación y devuelve 'yes' o 'no'.
+    Envía el título del proyecto a una API de clasificación, con la respuesta restringida
+    por `ESQUEMA_SOSTENIBLE`, y devuelve 'yes' o 'no'.
 
     Args:
         excel (str): El título del proyecto a clasificar.
@@ -173,59 +181,36 @@ def es_sostenible_api(excel):
     if not excel:
         return None
 
-    body = {
-        "model": myModel,
-        "messages": [
-            {
-                "role": "system",
-                "content": (
-                    "You are a helpful assistant that classifies if a project is related to sustainability. Answer only 'yes' or 'no'\n"
-                    "1. Fin de la pobreza\n"
-                    "2. Hambre cero\n"
-                    "3. Salud y bienestar\n"
-                    "4. Educación de calidad\n"
-                    "5. Igualdad de género\n"
-                    "6. Agua limpia y saneamiento\n"
-                    "7. Energía asequible y no contaminante\n"
-                    "8. Trabajo decente y crecimiento económico\n"
-                    "9. Industria, innovación e infraestructura\n"
-                    "10. Reducción de las desigualdades\n"
-                    "11. Ciudades y comunidades sostenibles\n"
-                    "12. Producción y consumo responsables\n"
-                    "13. Acción por el clima\n"
-                    "14. Vida submarina\n"
-                    "15. Vida de ecosistemas terrestres\n"
-                    "16. Paz, justicia e instituciones sólidas\n"
-                    "17. Alianzas para lograr los objetivos\n"
-                )
-            },
-            {
-                "role": "user",
-                "content": excel
-            }
-        ],
-        "temperature": 0.2
-    }
-
-    body_json = json.dumps(body)
-
-    response = requests.post(
-            f"{base_url}/v1/chat/completions",
-            headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
-            data=body_json
-        )
+    prompt = (
+        "You are a helpful assistant that classifies if a project is related to sustainability. "
+        "Return ONLY a JSON object with the key 'sostenible' set to 'yes' or 'no'. "
+        "It is related to sustainability if it contributes to any of these objectives:\n"
+        "1. Fin de la pobreza\n"
+        "2. Hambre cero\n"
+        "3. Salud y bienestar\n"
+        "4. Educación de calidad\n"
+        "5. Igualdad de género\n"
+        "6. Agua limpia y saneamiento\n"
+        "7. Energía asequible y no contaminante\n"
+        "8. Trabajo decente y crecimiento económico\n"
+        "9. Industria, innovación e infraestructura\n"
+        "10. Reducción de las desigualdades\n"
+        "11. Ciudades y comunidades sostenibles\n"
+        "12. Producción y consumo responsables\n"
+        "13. Acción por el clima\n"
+        "14. Vida submarina\n"
+        "15. Vida de ecosistemas terrestres\n"
+        "16. Paz, justicia e instituciones sólidas\n"
+        "17. Alianzas para lograr los objetivos\n"
+    )
 
-    if response.status_code != 200:
-        print(f"Error en la API para {excel}: {response.status_code} - {response.text}")
+    try:
+        datos = pedir_json(prompt, excel, ESQUEMA_SOSTENIBLE, "sostenible", config=config,
+                           llamador="informe_6_4")
+    except ErrorLLM as e:
+        print(f"Error en la API para {excel}: {e}")
         return "no"
-       
-
-    #  Obtener respuesta limpia
-    message_content = response.json()['choices'][0]['message']['content'].strip().lower()
-    # Filtrar solo el contenido posterior a </think>
-    if "</think>" in message_content:
-        message_content = message_content.split("</think>")[-1].strip()  # Solo lo que sigue después de </think>
-    return message_content
+    return datos["sostenible"]
 
 def marcar_sostenibles_api(df, columna_titulo='Título'):
     """
@@ -928,6 +913,7 @@ def generar(excel):
     df = calcular_imputacion_diaria(df)
     df = imputar_por_anho(df)
     df = marcar_sostenibles_api(df)
+    print(metricas.resumen("informe_6_4"))
     df = duplicar_valores_sostenibles(df)
     df = anhadir_fila_total(df)
     path_salida_temp = exportar_resultado(df, "resultados_finales.xlsx")
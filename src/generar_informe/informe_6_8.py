@@ -1,13 +1,12 @@
 
-import json
 import os
 import sys
 import re
 from nbformat import convert
-import requests
 from docx import Document
 from dotenv import load_dotenv
 from config import cargar_configuracion
+from cliente_llm import ErrorLLM, metricas, pedir_json
 
 
 SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -154,12 +153,20 @@ def fill_description(doc, year_range, resultados):
 
 
  
+# Esquema de la respuesta del modelo con el número de actividades sostenibles
+ESQUEMA_NUMERO_ACTIVIDADES = {
+    "type": "object",
+    "properties": {"numero": {"type": "integer", "minimum": 0}},
+    "required": ["numero"],
+}
+
 def extraer_datos_llm(texto):
     """
     Extrae el número de actividades relacionadas con la sostenibilidad de un texto usando un modelo LLM.
 
     Envía el texto a un modelo de lenguaje a través de una API y le pide que cuente
-    las actividades relacionadas con los ODS.
+    las actividades relacionadas con los ODS, con la respuesta restringida por
+    `ESQUEMA_NUMERO_ACTIVIDADES`.
 
     Args:
         texto (str): El texto que contiene la lista de actividades.
@@ -171,62 +178,37 @@ def extraer_datos_llm(texto):
     if not texto:
        return None
 
-    body = {
-        "model": myModel,
-        "messages": [
-            {
-                "role": "system",
-                "content": (
-                    "You will receive a text containing a list of activities. "
-                    "Identify which activities are related to environmental sustainability, based on if they align with: "
-                    "1. Fin de la pobreza\n"
-                    "2. Hambre cero\n"
-                    "3. Salud y bienestar\n"
-                    "4. Educación de calidad\n"
-                    "5. Igualdad de género\n"
-                    "6. Agua limpia y saneamiento\n"
-                    "7. Energía asequible y no contaminante\n"
-                    "8. Trabajo decente y crecimiento económico\n"
-                    "9. Industria, innovación e infraestructura\n"
-                    "10. Reducción de las desigualdades\n"
-                    "11. Ciudades y comunidades sostenibles\n"
-                    "12. Producción y consumo responsables\n"
-                    "13. Acción por el clima\n"
-                    "14. Vida submarina\n"
-                    "15. Vida de ecosistemas terrestres\n"
-                    "16. Paz, justicia e instituciones sólidas\n"
-                    "17. Alianzas para lograr los objetivos\n"
-                    "Count only those activities and return the number.\n\n"
-                    "Return ONLY the number, with no extra text, explanation, or formatting."
-                )
-            },
-            {
-                "role": "user",
-                "content": texto
-            }
-        ],
-        "temperature": 0.2
-    }
-        
-    body_json = json.dumps(body)
-
-    response = requests.post(
-        f"{base_url}/v1/chat/completions",
-        headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
-        data=body_json
-    )    
+    prompt = (
+        "You will receive a text containing a list of activities. "
+        "Identify which activities are related to environmental sustainability, based on if they align with: "
+        "1. Fin de la pobreza\n"
+        "2. Hambre cero\n"
+        "3. Salud y bienestar\n"
+        "4. Educación de calidad\n"
+        "5. Igualdad de género\n"
+        "6. Agua limpia y saneamiento\n"
+        "7. Energía asequible y no contaminante\n"
+        "8. Trabajo decente y crecimiento económico\n"
+        "9. Industria, innovación e infraestructura\n"
+        "10. Reducción de las desigualdades\n"
+        "11. Ciudades y comunidades sostenibles\n"
+        "12. Producción y consumo responsables\n"
+        "13. Acción por el clima\n"
+        "14. Vida submarina\n"
+        "15. Vida de ecosistemas terrestres\n"
+        "16. Paz, justicia e instituciones sólidas\n"
+        "17. Alianzas para lograr los objetivos\n"
+        "Count only those activities.\n\n"
+        "Return ONLY a JSON object with the key 'numero' set to that count, with no extra text or explanation."
+    )
 
-    #  Obtener respuesta limpia
-    message_content = response.json().get('choices', [{}])[0].get('message', {}).get('content', '').strip()
-        
-    #  Eliminar `</think>` si existe
-    if "</think>" in message_content:
-        message_content = message_content.split("</think>")[-1].strip()
-    match = re.search(r"\d+", message_content)
-    if match:
-        return int(match.group())
-    print(f"No se encontró un número válido en la respuesta del modelo:\n{message_content}")
-    return None
+    try:
+        datos = pedir_json(prompt, texto, ESQUEMA_NUMERO_ACTIVIDADES, "actividades", config=config,
+                           llamador="informe_6_8")
+    except ErrorLLM as e:
+        print(f"No se pudo obtener un número válido de la respuesta del modelo: {e}")
+        return None
+    return datos["numero"]
 
        
 
@@ -277,6 +259,7 @@ def generar(anho):
     """
     
     resultados = procesar_documentos(anho, carpeta)
+    print(metricas.resumen("informe_6_8"))
 
 
     template_path = os.path.join(base_dir, 'informe_general.docx')
@@ -22,6 +22,7 @@ mensajes_flash = {
         'cerrada_sesion':'Sesión cerrada',
         'correo_no_encontrado':'No existe un usuario con ese correo.',
         'datos_ya_existen': "Ya existen datos para ese año y tipo de estudio.",
+        'trabajo_en_curso': "Ya hay un trabajo igual pendiente o en curso.",
         'debes_iniciar_sesion':'Debe iniciar sesión',
         'error_actualizar': "Error al actualizar el perfil: ",
         'error_guardar': 'Error al guardar el usuario: ',
@@ -67,6 +68,7 @@ mensajes_flash = {
         'correo_no_encontrado':'There is no user with that email.',
         'cerrada_sesion':'Logout sucessfully',
         'datos_ya_existen': "Data already exists for that year and type of study.",
+        'trabajo_en_curso': "An identical job is already pending or running.",
         'debes_iniciar_sesion':'You must login.',
         'error_actualizar': "Error updating profile: ",
         'error_guardar': 'Error saving user: ',
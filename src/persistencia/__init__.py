@@ -0,0 +1,24 @@
+"""
+Persistencia de la aplicación: la conexión a la base de datos y sus modelos.
+
+Los scripts de los trabajos (`guias_docentes.py`, `actualizar_sostenibilidad.py`...)
+importaban `app` solo para llegar a `db` y `Busqueda`, y con ello cargaban
+Flask-Dance, la autenticación de Google, los formularios WTForms, todas las rutas
+y creaban la carpeta de subidas. Este paquete no depende de la aplicación web:
+
+    - `bd.py`: la instancia `db` de Flask-SQLAlchemy, `configurar_bd` (que usa la
+      aplicación web) y `contexto_bd`, que da a los scripts un contexto con acceso
+      a la base de datos.
+    - `modelos.py`: los modelos `User` y `Busqueda`.
+
+Uso desde un script:
+    from persistencia import Busqueda, contexto_bd, db
+
+    with contexto_bd():
+        db.session.query(Busqueda).filter_by(anho="2023-2024").count()
+"""
+
+from persistencia.bd import db, configurar_bd, crear_app, contexto_bd
+from persistencia.modelos import User, Busqueda
+
+__all__ = ["db", "configurar_bd", "crear_app", "contexto_bd", "User", "Busqueda"]
@@ -0,0 +1,82 @@
+"""
+Conexión a la base de datos, compartida por la aplicación web y los scripts.
+
+Las URL de las bases de datos se leen del entorno (o del fichero .env):
+    - DATABASE_URL: base de datos principal (usuarios).
+    - DATABASE_BINDS: base de datos de las búsquedas de guías (`Busqueda`).
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+
+from dotenv import load_dotenv
+from flask import Flask, current_app, has_app_context
+from flask_sqlalchemy import SQLAlchemy
+
+db = SQLAlchemy()
+
+# Aplicación cuyo contexto usa `contexto_bd`: la aplicación web si la ha
+# configurado con `configurar_bd`, o una mínima creada la primera vez que se necesita
+_app = None
+_lock = threading.RLock()
+
+
+def configurar_bd(app):
+    """
+    Configura una aplicación Flask para usar la base de datos y la registra como
+    la aplicación de `contexto_bd`, de modo que los scripts que se ejecutan dentro
+    de ella compartan sus conexiones.
+
+    Args:
+        app (Flask): La aplicación.
+    """
+    global _app
+    load_dotenv()
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv("DATABASE_URL")
+    app.config['SQLALCHEMY_BINDS'] = {
+        'busqueda': os.getenv("DATABASE_BINDS")
+    }
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    with _lock:
+        if _app is None:
+            _app = app
+
+
+def crear_app():
+    """
+    Crea una aplicación Flask sin rutas ni extensiones, solo con la base de datos.
+
+    Returns:
+        Flask: La aplicación configurada.
+    """
+    app = Flask(__name__)
+    configurar_bd(app)
+    return app
+
+
+def _app_registrada():
+    """Devuelve la aplicación de `contexto_bd`, creándola si no hay ninguna registrada."""
+    with _lock:
+        if _app is None:
+            crear_app()
+        return _app
+
+
+@contextmanager
+def contexto_bd():
+    """
+    Contexto con acceso a la base de datos. Si ya hay un contexto de aplicación
+    activo se reutiliza; si no, se usa el de la aplicación registrada (o el de una
+    mínima creada con `crear_app`).
+
+    Yields:
+        Flask: La aplicación del contexto.
+    """
+    if has_app_context():
+        yield current_app._get_current_object()
+        return
+    app = _app_registrada()
+    with app.app_context():
+        yield app
@@ -0,0 +1,35 @@
+"""
+Modelos de la base de datos.
+"""
+
+from persistencia.bd import db
+
+
+class User(db.Model):
+    """
+    Modelo de base de datos para los usuarios.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    google_id = db.Column(db.String(50), unique=True, nullable=True)  # Campo opcional
+    username = db.Column(db.String(50), nullable=False , unique=True)
+    email = db.Column(db.String(100), nullable=True, unique=True)
+    password = db.Column(db.String(200), nullable=False)
+    rol = db.Column(db.String(50), nullable=False, default='visitante')  # Default es 'usuario'
+
+class Busqueda(db.Model):
+    """
+    Modelo de base de datos para almacenar los resultados de las búsquedas de guías docentes.
+    """
+    __bind_key__ = 'busqueda'
+    id = db.Column(db.Integer, primary_key=True)
+    anho = db.Column(db.String(20), nullable=False)
+    codigo_asignatura = db.Column(db.String(100), nullable=True)
+    tipo_programa = db.Column(db.String(100), nullable=True)
+    nombre_archivo=db.Column(db.String(100), nullable=True)
+    modalidad=db.Column(db.String(100), nullable=True)
+    sostenibilidad = db.Column(db.String(10), nullable=True)
+
+
+    __table_args__ = (
+        db.UniqueConstraint('anho','codigo_asignatura','modalidad', name='unique_modalidad_anho_codigo'),
+    )
@@ -0,0 +1,196 @@
+"""
+Progreso de cada trabajo en segundo plano, compartido entre la aplicación y sus scripts.
+
+`app.py` guardaba el progreso en un único diccionario global (`estado_proceso`):
+dos usuarios que lanzaban una búsqueda se pisaban el progreso, y este solo
+avanzaba a saltos entre un script y el siguiente. Aquí cada trabajo de la cola
+(ver `trabajos.py`) tiene su propia fila en una base de datos SQLite
+(`instance/progreso.db`), que escriben tanto la aplicación como los scripts que
+el trabajo ejecuta, y que `/estado_proceso` sirve con ETag.
+
+Los scripts reciben el id de su trabajo en la variable de entorno
+GREENMETRICS_JOB_ID y lo notifican por fases (guías descargadas, PDFs
+procesados, llamadas al modelo...) con `Progreso.desde_entorno`. Si el script se
+ejecuta a mano, sin esa variable, las notificaciones no hacen nada.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from trabajos import VARIABLE_ID_TRABAJO
+
+RUTA_PROGRESO = os.path.join("instance", "progreso.db")
+# Segundos mínimos entre dos escrituras del mismo proceso (salvo las forzadas)
+INTERVALO_ESCRITURA = 0.5
+
+ESTADO_INICIAL = {"mensaje": "", "porcentaje": 0, "en_proceso": False, "completado": False, "fases": {}}
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS progreso (
+    id_trabajo INTEGER PRIMARY KEY,
+    mensaje TEXT NOT NULL DEFAULT '',
+    porcentaje REAL NOT NULL DEFAULT 0,
+    en_proceso INTEGER NOT NULL DEFAULT 0,
+    completado INTEGER NOT NULL DEFAULT 0,
+    fases TEXT NOT NULL DEFAULT '{}',
+    version INTEGER NOT NULL DEFAULT 0,
+    actualizado REAL NOT NULL
+);
+"""
+
+_CAMPOS = ("mensaje", "porcentaje", "en_proceso", "completado", "fases")
+
+
+class AlmacenProgreso:
+    """
+    Acceso a la tabla de progreso. Cada cambio incrementa la versión de la fila,
+    que sirve de ETag. Se puede usar desde varios hilos y varios procesos.
+    """
+
+    def __init__(self, ruta=RUTA_PROGRESO):
+        self.ruta = ruta
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+        self._conexion = sqlite3.connect(ruta, timeout=30, check_same_thread=False)
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.executescript(_ESQUEMA)
+
+    def actualizar(self, id_trabajo, **campos):
+        """
+        Modifica el progreso de un trabajo. Los campos que no se indican se conservan.
+
+        Args:
+            id_trabajo (int): Id del trabajo.
+            **campos: mensaje (str), porcentaje (float), en_proceso (bool),
+                completado (bool) o fases (dict).
+        """
+        desconocidos = set(campos) - set(_CAMPOS)
+        if desconocidos:
+            raise ValueError(f"Campos de progreso desconocidos: {', '.join(sorted(desconocidos))}")
+        if "fases" in campos:
+            campos["fases"] = json.dumps(campos["fases"], ensure_ascii=False)
+        columnas = list(campos)
+        asignaciones = "".join(f", {columna} = excluded.{columna}" for columna in columnas)
+        with self._lock, self._conexion:
+            self._conexion.execute(
+                f"INSERT INTO progreso (id_trabajo, actualizado, version{''.join(', ' + c for c in columnas)}) "
+                f"VALUES (?, ?, 1{', ?' * len(columnas)}) "
+                f"ON CONFLICT (id_trabajo) DO UPDATE SET version = version + 1, actualizado = excluded.actualizado"
+                f"{asignaciones}",
+                (id_trabajo, time.time(), *campos.values())
+            )
+
+    def version(self, id_trabajo):
+        """Devuelve la versión del progreso de un trabajo (0 si todavía no tiene)."""
+        with self._lock:
+            fila = self._conexion.execute(
+                "SELECT version FROM progreso WHERE id_trabajo = ?", (id_trabajo,)
+            ).fetchone()
+        return fila[0] if fila else 0
+
+    def obtener(self, id_trabajo):
+        """
+        Devuelve el progreso de un trabajo.
+
+        Args:
+            id_trabajo (int): Id del trabajo.
+
+        Returns:
+            tuple[dict, int]: El progreso (`ESTADO_INICIAL` si todavía no tiene) y su versión.
+        """
+        with self._lock:
+            fila = self._conexion.execute(
+                f"SELECT {', '.join(_CAMPOS)}, version FROM progreso WHERE id_trabajo = ?", (id_trabajo,)
+            ).fetchone()
+        if fila is None:
+            return dict(ESTADO_INICIAL, fases={}), 0
+        mensaje, porcentaje, en_proceso, completado, fases, version = fila
+        return {
+            "mensaje": mensaje,
+            "porcentaje": round(porcentaje, 1),
+            "en_proceso": bool(en_proceso),
+            "completado": bool(completado),
+            "fases": json.loads(fases),
+        }, version
+
+    def cerrar(self):
+        """Cierra la conexión con la base de datos."""
+        self._conexion.close()
+
+
+class Progreso:
+    """
+    Notificación del progreso de un trabajo por fases, desde el propio trabajo.
+
+    Cada fase lleva la cuenta de los elementos hechos y del total (que puede crecer
+    mientras se descubren nuevos elementos). El porcentaje es la suma ponderada del
+    avance de cada fase, dentro del intervalo [inicio, fin], y nunca retrocede.
+    Las escrituras se agrupan: como mucho una cada INTERVALO_ESCRITURA segundos.
+
+    Uso:
+        progreso = Progreso.desde_entorno({"descarga": 0.5, "extraccion": 0.5}, inicio=10, fin=90)
+        progreso.sumar_total("descarga", 20)
+        progreso.avanzar("descarga")
+        progreso.guardar(forzar=True)
+    """
+
+    def __init__(self, id_trabajo, fases, inicio=0, fin=100, almacen=None):
+        self.id_trabajo = id_trabajo
+        self.pesos = dict(fases)
+        self.inicio = inicio
+        self.fin = fin
+        self.fases = {fase: {"hechos": 0, "total": 0} for fase in fases}
+        self.porcentaje = inicio
+        self._almacen = almacen
+        self._ultima_escritura = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def desde_entorno(cls, fases, inicio=0, fin=100):
+        """Crea el notificador del trabajo indicado en GREENMETRICS_JOB_ID (inactivo si no está definida)."""
+        id_trabajo = os.getenv(VARIABLE_ID_TRABAJO)
+        return cls(int(id_trabajo) if id_trabajo else None, fases, inicio, fin)
+
+    @property
+    def activo(self):
+        """Si hay un trabajo al que notificar el progreso."""
+        return self.id_trabajo is not None
+
+    def sumar_total(self, fase, cantidad=1):
+        """Añade `cantidad` elementos al total de una fase."""
+        with self._lock:
+            self.fases[fase]["total"] += cantidad
+        self.guardar()
+
+    def avanzar(self, fase, cantidad=1):
+        """Marca como hechos `cantidad` elementos de una fase."""
+        with self._lock:
+            self.fases[fase]["hechos"] += cantidad
+        self.guardar()
+
+    def _calcular_porcentaje(self):
+        """Calcula el porcentaje a partir del avance de cada fase, sin dejar que retroceda."""
+        avance = sum(
+            peso * min(1, self.fases[fase]["hechos"] / self.fases[fase]["total"])
+            for fase, peso in self.pesos.items() if self.fases[fase]["total"]
+        ) / (sum(self.pesos.values()) or 1)
+        self.porcentaje = max(self.porcentaje, self.inicio + (self.fin - self.inicio) * avance)
+        return self.porcentaje
+
+    def guardar(self, forzar=False):
+        """Escribe el progreso si ha pasado el intervalo mínimo desde la última escritura, o si se fuerza."""
+        if not self.activo:
+            return
+        with self._lock:
+            ahora = time.monotonic()
+            if not forzar and ahora - self._ultima_escritura < INTERVALO_ESCRITURA:
+                return
+            self._ultima_escritura = ahora
+            porcentaje = self._calcular_porcentaje()
+            fases = {fase: dict(cuenta) for fase, cuenta in self.fases.items()}
+            if self._almacen is None:
+                self._almacen = AlmacenProgreso()
+            self._almacen.actualizar(self.id_trabajo, porcentaje=porcentaje, fases=fases)
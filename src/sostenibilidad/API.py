@@ -1,16 +1,10 @@
 import os
-import requests
-import json
 import sys
+import time
 
-import pandas as pd
-from PyPDF2 import PdfReader
 from dotenv import load_dotenv
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from app import app, Busqueda, db  
-from sqlalchemy import text
-
 """
 Este script procesa guías docentes en formato PDF para extraer información sobre asignaturas,
 incluyendo su nombre, grado/máster, código y competencias curriculares de sostenibilidad.
@@ -23,10 +17,6 @@ la configuración de la API (URL base, clave API, modelo) cargada desde un archi
 """
 
 
-# Configurar la base de datos manualmente si es necesario
-app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv("DATABASE_URL")  
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-
 # Obtener la ruta absoluta del directorio `src`
 SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -35,207 +25,321 @@ if SRC_DIR not in sys.path:
     sys.path.append(SRC_DIR)
 
 from config import cargar_configuracion
+from cliente_llm import metricas
+from progreso import Progreso
+from sostenibilidad.procesadoAsignaturas import leer_guia
+from sostenibilidad.cache_texto import obtener_cache
+from sostenibilidad.clasificador import (
+    ClasificadorGuias, LLM_CONCURRENCIA, LLM_GUIAS_POR_PETICION, TEMPERATURA,
+)
+from sostenibilidad.cache_llm import CacheLLM, clave_respuesta
+from sostenibilidad.resultados_guias import EscritorResultados, RUTA_DIARIO, leer_diario
+from sostenibilidad.texto_prompt import preparar_texto, LLM_PRESUPUESTO_TOKENS
+from sostenibilidad.actualizar_sostenibilidad import actualizar_sostenibilidad, preparar_actualizaciones
 
 # Cargar variables desde .env, como no esta en el mismo directorio que el script, especifico la ubicación del fichero .env
 directorio = os.path.join(os.path.dirname(__file__), 'data', 'guias')
 load_dotenv()
 
 
+# Marcar como "No" sin llamar al modelo las guías sin asteriscos (LLM_PREFILTRO_ASTERISCOS=0 lo desactiva)
+PREFILTRO_ASTERISCOS = os.getenv("LLM_PREFILTRO_ASTERISCOS", "1") != "0"
+CLAVE_PREFILTRO = "prefiltro-asteriscos"
+
+# Peso de cada fase en el progreso del trabajo
+FASES_PROGRESO = {"lectura": 0.2, "llm": 0.8}
+
 # Definir rutas
 directorio = os.path.join("sostenibilidad","data", "guias")  # Carpeta con los archivos PDF
 archivo_salida = os.path.join("sostenibilidad","data", "resultados_guias.xlsx")  # Archivo de salida
 
 
-# Verificar si el directorio de los archivos PDF existe
-if not os.path.exists(directorio):
-    print(f"El directorio de los archivos PDF no existe: {directorio}")
-    sys.exit(1)  # Salir del programa si no existe el directorio
-
-# Verificar si el archivo de salida es una ruta válida
-if not os.path.isdir(os.path.dirname(archivo_salida)):
-    print(f" La carpeta de salida no existe: {os.path.dirname(archivo_salida)}")
-    sys.exit(1)  # Salir si no existe la carpeta
-
-
-
-# Listar los archivos PDF en el directorio
-archivos_guias = [f for f in os.listdir(directorio) if f.endswith('.pdf')]
-if not archivos_guias:
-    print("No se encontraron archivos PDF en el directorio especificado.")
-    sys.exit(1)  # Salir si no se encuentran archivos PDF
-    
-# Configuración de la API
-config = cargar_configuracion()
-base_url = config["base_url"]
-api_key = config["api_key"]
-myModel = config["model"]
-
-
-# Verificar que las configuraciones se cargan correctamente
-if not base_url or not api_key or not myModel:
-    print(" Las configuraciones de la API no están completas. Verifica tu archivo .env.")
-    sys.exit(1)
-
-
-
-# Crear DataFrame vacío
-resultados = pd.DataFrame(columns=["Name", "Degree_Master", "Code", "Competences"])
-
-for pdf_file in archivos_guias:
-    pdf_path = os.path.join(directorio, pdf_file)
-    
-    # Extraer texto del PDF
-    with open(pdf_path, "rb") as file:
-        reader = PdfReader(file)
-        pdf_text = " ".join([page.extract_text() for page in reader.pages[:2]])
-
-    if not pdf_text.strip():
-        print(f"Advertencia: No se pudo extraer texto del archivo {pdf_file}. Saltando...")
-        continue  # Si el PDF no tiene texto, pasamos al siguiente
-
-
-    # Construcción del prompt para la IAf
-    body = {
-        "model": myModel,
-        "messages": [
-            {
-                "role": "system",
-                "content": (
-                    "You will receive the data of a teaching guide in Spanish. Do not translate it to English. "
-                    "Extract and return only the following fields:\n"
-                    "1. The name of the subject (without commas)\n"
-                    "2. The degree\n"
-                    "3. The code\n"
-                    "4. The curricular sustainability competencies\n"
-                    "Find section with the following title  Competencias que debe adquirir el alumno/a al cursar la asignatura. Identify \n"
-                    "only the competencies listed there that have an asterisk (*). \n"
-                    " If no competencies have an asterisk, return 'None'.\n"
-                    "If at least one competency has an asterisk, return only those that have one and for each competency, analyze its\n" 
-                    "description and determine which of the following objectives it aligns with based on its content:\n"
-
-                        "1. Fin de la pobreza\n"
-                        "2. Hambre cero\n"
-                        "3. Salud y bienestar\n"
-                        "4. Educación de calidad\n"
-                        "5. Igualdad de género\n"
-                        "6. Agua limpia y saneamiento\n"
-                        "7. Energía asequible y no contaminante\n"
-                        "8. Trabajo decente y crecimiento económico\n"
-                        "9. Industria, innovación e infraestructura\n"
-                        "10. Reducción de las desigualdades\n"
-                        "11. Ciudades y comunidades sostenibles\n"
-                        "12. Producción y consumo responsables\n"
-                        "13. Acción por el clima\n"
-                        "14. Vida submarina\n"
-                        "15. Vida de ecosistemas terrestres\n"
-                        "16. Paz, justicia e instituciones sólidas\n"
-                        "17. Alianzas para lograr los objetivos\n"
-                    "If a competency clearly aligns with one or more objectives, list them next to the competency. SDG X (Y) - Competency Where:\n"
-                        "X is the number of the corresponding objective.\n"
-                        "Y is the name of the objective.\n"
-                        "Competency is the code of the competency\n"
-                    "If no clear alignment is found, leave that field empty. If no asterisk return None\n"
-                    "Return the four fields separated by commas in this format:\n"
-                    "Subject name, degree, code, Curricular sustainability competencies\n"
-                    "Ensure that you return ONLY these four fields in a single line, without extra text."
-                )
-            },
-            {
-                "role": "user",
-                "content": pdf_text
-            }
-        ],
-        "temperature": 0.2
+def comprobar_rutas(directorio, archivo_salida):
+    """
+    Comprueba que existen la carpeta de las guías y la carpeta de salida y
+    devuelve los PDFs que hay que clasificar. Termina el programa si algo falta.
+
+    Args:
+        directorio (str): Carpeta con los archivos PDF.
+        archivo_salida (str): Ruta del Excel de resultados.
+
+    Returns:
+        list[str]: Los nombres de los archivos PDF.
+    """
+    # Verificar si el directorio de los archivos PDF existe
+    if not os.path.exists(directorio):
+        print(f"El directorio de los archivos PDF no existe: {directorio}")
+        sys.exit(1)  # Salir del programa si no existe el directorio
+
+    # Verificar si el archivo de salida es una ruta válida
+    if not os.path.isdir(os.path.dirname(archivo_salida)):
+        print(f" La carpeta de salida no existe: {os.path.dirname(archivo_salida)}")
+        sys.exit(1)  # Salir si no existe la carpeta
+
+    # Listar los archivos PDF en el directorio
+    archivos_guias = [f for f in os.listdir(directorio) if f.endswith('.pdf')]
+    if not archivos_guias:
+        print("No se encontraron archivos PDF en el directorio especificado.")
+        sys.exit(1)  # Salir si no se encuentran archivos PDF
+    return archivos_guias
+
+
+def fila_sin_asteriscos(pdf_file, info):
+    """
+    Construye sin llamar al modelo el resultado de una guía que no puede ser sostenible.
+
+    Las competencias de sostenibilidad se marcan con un asterisco en la guía, y
+    `procesadoAsignaturas.py` ya ha buscado asteriscos en todas sus páginas. Si no
+    hay ninguno, el modelo respondería 'None', así que la guía se marca como "No"
+    con los campos de cabecera extraídos del PDF.
+
+    Args:
+        pdf_file (str): Nombre del PDF de la guía.
+        info (tuple | None): Información extraída de la guía (ver `extraer_info_pdf`).
+
+    Returns:
+        dict | None: La fila de resultados, o None si la guía tiene asteriscos o no
+            se conoce su código (y por tanto hay que enviarla al modelo).
+    """
+    if not PREFILTRO_ASTERISCOS or info is None:
+        return None
+    titulacion, denominacion, codigo, pagina_con_asteriscos = info
+    if pagina_con_asteriscos is not None or not codigo:
+        return None
+    return {
+        "Name": denominacion,
+        "Degree_Master": titulacion,
+        "Code": codigo,
+        "Competences": "None",
+        "Sostenibilidad": False,
+        "FileName": pdf_file.lower()
     }
 
-    # Convertir a JSON
-    body_json = json.dumps(body)
-
-    # Enviar solicitud a la IA
-    response = requests.post(
-        f"{base_url}/v1/chat/completions",
-        headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
-        data=body_json
-    )
-
-    # Verificar si la respuesta es válida
-    if response.status_code != 200:
-        print(f" Error en la API para {pdf_file}: {response.status_code} - {response.text}")
-        continue
-
-    # Extraer la respuesta de la IA
-    message_content = response.json().get('choices', [{}])[0].get('message', {}).get('content', '').strip()
 
+def leer_textos(directorio, archivos_guias, presupuesto=LLM_PRESUPUESTO_TOKENS, progreso=None):
+    """
+    Genera el texto que se envía al modelo de cada guía, saltando las que no tienen texto.
+
+    De las dos primeras páginas solo se envían la cabecera y el apartado de
+    competencias, dentro de un presupuesto de tokens (ver `texto_prompt.py`).
+    Las guías sin asteriscos llevan ya su resultado (ver `fila_sin_asteriscos`).
+
+    Args:
+        directorio (str): Carpeta con los archivos PDF.
+        archivos_guias (list[str]): Los nombres de los archivos PDF.
+        presupuesto (int): Número máximo de tokens del texto de cada guía.
+        progreso (Progreso | None): Notificador del progreso del trabajo. Las guías
+            que se saltan avanzan aquí la fase "lectura"; las demás, al consumirlas.
+
+    Yields:
+        tuple[str, str, dict | None]: Nombre del PDF, texto preparado a partir de sus
+            dos primeras páginas y, si no hace falta el modelo, el resultado de la guía.
+    """
+    tokens_enviados = tokens_originales = num_guias = 0
+    for pdf_file in archivos_guias:
+        pdf_path = os.path.join(directorio, pdf_file)
+
+        # Extraer texto del PDF (desde la caché si ya se analizó en procesadoAsignaturas.py)
+        paginas, info = leer_guia(pdf_path)
+        pdf_text = " ".join(paginas[:2])
+
+        if not pdf_text.strip():
+            print(f"Advertencia: No se pudo extraer texto del archivo {pdf_file}. Saltando...")
+            if progreso:
+                progreso.avanzar("lectura")
+            continue  # Si el PDF no tiene texto, pasamos al siguiente
+
+        texto, tokens, tokens_sin_recortar = preparar_texto(paginas[:2], info[:3] if info else None, presupuesto)
+        fila = fila_sin_asteriscos(pdf_file, info)
+        if fila is None:
+            print(f"Tokens para {pdf_file}: {tokens} (sin recortar: {tokens_sin_recortar})")
+            tokens_enviados += tokens
+            tokens_originales += tokens_sin_recortar
+            num_guias += 1
+        yield pdf_file, texto, fila
+
+    if num_guias:
+        print(f"Tokens de entrada: {tokens_enviados} en {num_guias} guías "
+              f"({tokens_enviados / num_guias:.0f} por guía, {tokens_originales} sin recortar)")
+
+
+def interpretar_respuesta(pdf_file, message_content):
+    """
+    Convierte la respuesta del modelo en una fila de resultados.
+
+    Args:
+        pdf_file (str): Nombre del PDF de la guía.
+        message_content (dict): Respuesta JSON del modelo, con las claves de `CAMPOS_GUIA`.
+
+    Returns:
+        dict: La fila de resultados.
+    """
     print(f"\n **Respuesta de la IA para {pdf_file}:**\n{message_content}\n")  # DEPURACIÓN
 
-    # Filtrar solo el contenido posterior a </think>
-    if "</think>" in message_content:
-        message_content = message_content.split("</think>")[-1].strip()  # Solo lo que sigue después de </think>
-
-    # Separar la respuesta por comas
-    contenido_separado = [x.strip() for x in message_content.split(",") if x.strip()]
-
-    # Validar si hay al menos 3 elementos (para evitar errores)
-    if len(contenido_separado) >= 3:
-        competences = contenido_separado[3] if len(contenido_separado) > 3 else "None"
-        
-        # Aquí detectamos si el curso es sostenible
-        es_sostenible = False
-        if competences and competences.lower() != "none":
-            es_sostenible = True
-    
-        # Añadimos sostenibilidad también en el DataFrame
-        nuevo_resultado = pd.DataFrame([{
-            "Name": contenido_separado[0],
-            "Degree_Master": contenido_separado[1],
-            "Code": contenido_separado[2],
-            "Competences": competences,
-            "Sostenibilidad": es_sostenible,
-            "FileName": pdf_file.lower()  # <-- AÑADIDO AQUÍ
-
-        }])
-        resultados = pd.concat([resultados, nuevo_resultado], ignore_index=True)
-    else:
-        print(f" Error: La respuesta de la IA no tiene el formato correcto. Recibido:\n{message_content}")
-
-# Convertir el valor booleano a "Sí" o "No" para el Excel
-resultados["Sostenibilidad"] = resultados["Sostenibilidad"].apply(lambda x: "Sí" if x else "No")
-
-# Guardar los resultados en CSV
-if not resultados.empty:
-    
-    resultados.to_excel(archivo_salida, index=False)
-    print(f"\n Archivo guardado correctamente en: {archivo_salida}")
-else:
-    print("\n No se guardaron datos porque ninguna respuesta fue válida.")
-
-
-with app.app_context():
-    # Verificar las columnas del DataFrame para asegurarse de que coinciden
-    print("Columnas del DataFrame:", resultados.columns)
-    for _, row in resultados.iterrows():
-        # Verificar que las columnas necesarias existen en el DataFrame
-        if 'Code' not in row or 'FileName' not in row or 'Sostenibilidad' not in row:
-            print("Columna faltante en la fila, asegurándose de que las columnas existan en el DataFrame")
-            continue
-        print(f"{row['Code']},{row['FileName']}")
-
-
-        # Verificación de la consulta
-        busqueda_existente = Busqueda.query.filter_by(
-            codigo_asignatura=row["Code"],
-            nombre_archivo=row["FileName"]  # ahora usamos el FileName directamente
-        )
-
-        # Imprimir la consulta SQL generada para depuración
-        print("Consulta SQL generada:", str(busqueda_existente.statement))
-
-        # Ejecutar la consulta y verificar si existe el resultado
-        busqueda_existente = busqueda_existente.first()
+    competences = message_content["competences"] or "None"
+
+    # Aquí detectamos si el curso es sostenible
+    es_sostenible = False
+    if competences and competences.lower() != "none":
+        es_sostenible = True
+
+    # Añadimos sostenibilidad también en el DataFrame
+    return {
+        "Name": message_content["name"],
+        "Degree_Master": message_content["degree"],
+        "Code": message_content["code"],
+        "Competences": competences,
+        "Sostenibilidad": es_sostenible,
+        "FileName": pdf_file.lower()  # <-- AÑADIDO AQUÍ
+    }
 
-        if busqueda_existente:
-            busqueda_existente.sostenibilidad = row["Sostenibilidad"]
-        else:
-            print(f"No encontrado para {row['Code']} {row['Name']}")
 
-    db.session.commit()
\ No newline at end of file
+def clasificar_guias(guias, config, concurrencia=LLM_CONCURRENCIA, cache=None, ruta_diario=RUTA_DIARIO,
+                     reanudar=True, guias_por_peticion=LLM_GUIAS_POR_PETICION, progreso=None):
+    """
+    Envía las guías al modelo con varias peticiones simultáneas y reúne los resultados.
+
+    Cada resultado se añade al diario `ruta_diario` en cuanto llega, para no perder
+    las clasificaciones terminadas si el proceso se interrumpe. Al reanudar, las
+    guías ya clasificadas con el mismo modelo y prompt no se vuelven a enviar.
+    Las guías que ya traen su resultado (sin asteriscos) no se envían al modelo.
+
+    Args:
+        guias (Iterable[tuple[str, str, dict | None]]): Nombre del PDF, texto y, si
+            no hace falta el modelo, resultado de cada guía (ver `leer_textos`).
+        config (dict): Configuración de la API (base_url, api_key, model).
+        concurrencia (int): Peticiones simultáneas al servidor.
+        cache (CacheLLM | None): Caché de respuestas del modelo.
+        ruta_diario (str): Fichero JSONL en el que se escriben los resultados.
+        reanudar (bool): Si se aprovechan los resultados que ya hay en el diario.
+        guias_por_peticion (int): Guías que se envían juntas en cada petición.
+        progreso (Progreso | None): Notificador del progreso del trabajo (fases
+            "lectura" y "llm").
+
+    Returns:
+        pd.DataFrame: Los resultados, en el orden de las guías.
+    """
+    inicio = time.perf_counter()
+    with EscritorResultados(ruta_diario, reanudar) as escritor, \
+            ClasificadorGuias(config["base_url"], config["api_key"], config["model"], concurrencia,
+                              cache=cache, guias_por_peticion=guias_por_peticion) as clasificador:
+        claves = {}
+        pendientes = []
+        llamadas_evitadas = 0
+        for pdf_file, pdf_text, fila_local in guias:
+            if progreso:
+                progreso.avanzar("lectura")
+            if fila_local is not None:
+                # Clave propia: si se desactiva el filtro, la guía se envía al modelo
+                claves[pdf_file] = clave_respuesta(CLAVE_PREFILTRO, "", None, pdf_text)
+                if not escritor.contiene(pdf_file, claves[pdf_file]):
+                    escritor.escribir(fila_local, pdf_file, claves[pdf_file])
+                llamadas_evitadas += 1
+                continue
+            claves[pdf_file] = clave_respuesta(config["model"], clasificador.prompt, TEMPERATURA, pdf_text)
+            if not escritor.contiene(pdf_file, claves[pdf_file]):
+                pendientes.append((pdf_file, pdf_text))
+        print(f"Guías sin asteriscos marcadas como 'No' sin llamar al modelo: {llamadas_evitadas}")
+        print(f"Diario: {len(claves) - llamadas_evitadas - len(pendientes)} guías ya clasificadas, "
+              f"{len(pendientes)} pendientes")
+        if progreso:
+            progreso.sumar_total("llm", len(pendientes))
+
+        for pdf_file, message_content, error in clasificador.clasificar_guias(pendientes):
+            if progreso:
+                progreso.avanzar("llm")
+            if error:
+                print(f" Error en la API para {pdf_file}: {error}")
+                continue
+
+            escritor.escribir(interpretar_respuesta(pdf_file, message_content), pdf_file, claves[pdf_file])
+        print(clasificador.resumen(time.perf_counter() - inicio))
+        print(metricas.resumen("clasificador"))
+        if progreso:
+            progreso.guardar(forzar=True)
+
+        # Los resultados finales salen del diario: incluyen los de ejecuciones anteriores
+        guias_actuales = list(claves.items())
+        escritor.compactar(guias_actuales)
+        return escritor.dataframe(guias_actuales)
+
+
+def guardar_resultados(resultados, archivo_salida):
+    """Guarda los resultados en el Excel de salida, con la sostenibilidad como "Sí" o "No"."""
+    # Convertir el valor booleano a "Sí" o "No" para el Excel
+    resultados["Sostenibilidad"] = resultados["Sostenibilidad"].apply(lambda x: "Sí" if x else "No")
+
+    # Guardar los resultados en CSV
+    if not resultados.empty:
+
+        resultados.to_excel(archivo_salida, index=False)
+        print(f"\n Archivo guardado correctamente en: {archivo_salida}")
+    else:
+        print("\n No se guardaron datos porque ninguna respuesta fue válida.")
+
+
+def actualizar_base_datos(resultados):
+    """Marca la sostenibilidad de cada asignatura clasificada en la tabla de búsquedas."""
+    return actualizar_sostenibilidad(preparar_actualizaciones(resultados))
+
+
+def main(refrescar_cache=False, modelo_refrescar=None, reanudar=True, desde_diario=False, progreso=None):
+    """
+    Clasifica las guías descargadas y guarda los resultados.
+
+    Args:
+        refrescar_cache (bool): Si se descartan las respuestas guardadas en la caché
+            para `modelo_refrescar` (o para el modelo configurado, si es None).
+        modelo_refrescar (str | None): Modelo cuyas respuestas se descartan.
+        reanudar (bool): Si se aprovechan las guías ya clasificadas en el diario.
+        desde_diario (bool): Si no se clasifica nada y el Excel y la base de datos
+            se reconstruyen a partir del diario existente.
+        progreso (Progreso | None): Notificador del progreso; por defecto, el del trabajo
+            indicado en el entorno (inactivo si el script se ejecuta a mano).
+    """
+    if desde_diario:
+        resultados = leer_diario(RUTA_DIARIO)
+        print(f"Resultados reconstruidos desde {RUTA_DIARIO}: {len(resultados)} guías")
+        guardar_resultados(resultados, archivo_salida)
+        actualizar_base_datos(resultados)
+        return
+
+    archivos_guias = comprobar_rutas(directorio, archivo_salida)
+
+    # Configuración de la API
+    config = cargar_configuracion()
+
+    # Verificar que las configuraciones se cargan correctamente
+    if not config["base_url"] or not config["api_key"] or not config["model"]:
+        print(" Las configuraciones de la API no están completas. Verifica tu archivo .env.")
+        sys.exit(1)
+
+    cache_llm = CacheLLM()
+    if refrescar_cache:
+        modelo_refrescar = modelo_refrescar or config["model"]
+        print(f"Se descartan {cache_llm.refrescar_modelo(modelo_refrescar)} respuestas guardadas de {modelo_refrescar}")
+        # Refrescar el modelo actual implica no reutilizar tampoco sus resultados del diario
+        reanudar = reanudar and modelo_refrescar != config["model"]
+
+    try:
+        if progreso is None:
+            # Progreso del trabajo de la aplicación que ejecuta el script, si lo hay
+            progreso = Progreso.desde_entorno(FASES_PROGRESO)
+        progreso.sumar_total("lectura", len(archivos_guias))
+        guias = leer_textos(directorio, archivos_guias, progreso=progreso)
+        resultados = clasificar_guias(guias, config, cache=cache_llm, reanudar=reanudar, progreso=progreso)
+    finally:
+        print(cache_llm.resumen())
+        cache_llm.cerrar()
+    print(obtener_cache().resumen())
+
+    guardar_resultados(resultados, archivo_salida)
+    actualizar_base_datos(resultados)
+
+
+if __name__ == "__main__":
+    # --refrescar-cache descarta las respuestas del modelo configurado; --refrescar-cache=<modelo>, las de otro
+    # --sin-reanudar clasifica de nuevo todas las guías; --desde-diario solo rehace el Excel y la base de datos
+    opcion = next((arg for arg in sys.argv[1:] if arg.startswith("--refrescar-cache")), None)
+    main(refrescar_cache=opcion is not None, modelo_refrescar=opcion.partition("=")[2] if opcion else None,
+         reanudar="--sin-reanudar" not in sys.argv, desde_diario="--desde-diario" in sys.argv)
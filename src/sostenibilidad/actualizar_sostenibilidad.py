@@ -0,0 +1,144 @@
+"""
+Actualización en bloque de la columna `sostenibilidad` de la tabla de búsquedas.
+
+Al final de `API.py` cada resultado hacía su propia consulta ORM
+(`Busqueda.query.filter_by(...).first()`), imprimía el SQL y modificaba el objeto:
+N viajes a la base de datos y N objetos en la sesión. Aquí los resultados se
+preparan como tuplas (código, nombre de archivo, sostenibilidad), las asignaturas
+existentes se consultan una sola vez y las coincidentes se actualizan con un
+único UPDATE ejecutado con executemany dentro de una transacción.
+
+Se puede usar sin clasificar nada, a partir de los resultados ya guardados:
+    python sostenibilidad/actualizar_sostenibilidad.py [ruta_resultados] [anho]
+
+`ruta_resultados` puede ser el Excel de resultados o el diario JSONL de `API.py`.
+"""
+
+import os
+import sys
+import time
+
+import pandas as pd
+from sqlalchemy import bindparam
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from persistencia import Busqueda, contexto_bd, db
+
+# Número de nombres de archivo por consulta IN al buscar las asignaturas existentes
+TAMANO_LOTE_CONSULTA = 500
+
+RUTA_RESULTADOS = os.path.join("sostenibilidad", "data", "resultados_guias.xlsx")
+
+
+def valor_sostenibilidad(valor):
+    """Convierte la sostenibilidad de un resultado (booleano o "Sí"/"No") al valor de la tabla."""
+    if isinstance(valor, str):
+        return "Sí" if valor.strip().lower() in ("sí", "si", "true") else "No"
+    return "Sí" if valor else "No"
+
+
+def preparar_actualizaciones(resultados):
+    """
+    Obtiene de los resultados de la clasificación las tuplas que hay que aplicar.
+
+    Args:
+        resultados (pd.DataFrame): Resultados con las columnas Code, FileName y Sostenibilidad.
+
+    Returns:
+        list[tuple[str, str, str]]: Código, nombre de archivo y sostenibilidad ("Sí"/"No")
+            de cada asignatura, sin repetidos (si una asignatura aparece varias veces,
+            prevalece el último resultado).
+    """
+    faltan = {"Code", "FileName", "Sostenibilidad"} - set(resultados.columns)
+    if faltan:
+        raise ValueError(f"Faltan columnas en los resultados: {', '.join(sorted(faltan))}")
+
+    actualizaciones = {}
+    for codigo, nombre_archivo, sostenible in resultados[["Code", "FileName", "Sostenibilidad"]].itertuples(index=False):
+        if pd.isna(codigo) or pd.isna(nombre_archivo):
+            continue
+        actualizaciones[(str(codigo), str(nombre_archivo))] = valor_sostenibilidad(sostenible)
+    return [(codigo, nombre_archivo, sostenible) for (codigo, nombre_archivo), sostenible in actualizaciones.items()]
+
+
+def actualizar_sostenibilidad(actualizaciones, anho=None):
+    """
+    Aplica la sostenibilidad de cada asignatura con un UPDATE en bloque.
+
+    Una asignatura se identifica, como antes, por su código y el nombre de su archivo.
+    Si no se indica `anho`, se actualizan las filas de todos los cursos que coincidan.
+
+    Args:
+        actualizaciones (list[tuple[str, str, str]]): Código, nombre de archivo y sostenibilidad.
+        anho (str | None): Curso académico al que se limita la actualización.
+
+    Returns:
+        dict: Asignaturas encontradas y no encontradas, filas actualizadas y segundos empleados.
+    """
+    inicio = time.perf_counter()
+    with contexto_bd():
+        tabla = Busqueda.__table__
+        filtro_anho = [tabla.c.anho == anho] if anho else []
+
+        # Qué pares (código, archivo) existen: una consulta por lote de nombres de archivo
+        nombres = sorted({nombre_archivo for _, nombre_archivo, _ in actualizaciones})
+        existentes = set()
+        for i in range(0, len(nombres), TAMANO_LOTE_CONSULTA):
+            # Atributos del modelo y no columnas de la tabla: así la sesión envía la consulta
+            # a la base de datos de `Busqueda` (bind 'busqueda') y no a la principal
+            consulta = db.select(Busqueda.codigo_asignatura, Busqueda.nombre_archivo).where(
+                tabla.c.nombre_archivo.in_(nombres[i:i + TAMANO_LOTE_CONSULTA]), *filtro_anho
+            )
+            existentes.update(tuple(fila) for fila in db.session.execute(consulta))
+
+        encontradas = [fila for fila in actualizaciones if fila[:2] in existentes]
+        no_encontradas = [fila for fila in actualizaciones if fila[:2] not in existentes]
+
+        filas_actualizadas = 0
+        if encontradas:
+            # Tabla en lugar del modelo: executemany de Core, sin objetos ORM en la sesión
+            sentencia = tabla.update().where(
+                tabla.c.codigo_asignatura == bindparam("b_codigo"),
+                tabla.c.nombre_archivo == bindparam("b_nombre_archivo"),
+                *filtro_anho
+            ).values(sostenibilidad=bindparam("b_sostenibilidad"))
+            parametros = [
+                {"b_codigo": codigo, "b_nombre_archivo": nombre_archivo, "b_sostenibilidad": sostenible}
+                for codigo, nombre_archivo, sostenible in encontradas
+            ]
+            resultado = db.session.execute(sentencia, parametros)
+            filas_actualizadas = resultado.rowcount
+            db.session.commit()
+
+    for codigo, nombre_archivo, _ in no_encontradas:
+        print(f"No encontrado para {codigo} {nombre_archivo}")
+
+    resumen = {
+        "encontradas": len(encontradas),
+        "no_encontradas": len(no_encontradas),
+        "filas_actualizadas": filas_actualizadas,
+        "segundos": time.perf_counter() - inicio,
+    }
+    print(f"Sostenibilidad: {resumen['encontradas']} asignaturas encontradas, "
+          f"{resumen['no_encontradas']} no encontradas, {resumen['filas_actualizadas']} filas actualizadas "
+          f"({resumen['segundos']:.2f} s)")
+    return resumen
+
+
+def leer_resultados(ruta):
+    """Lee los resultados de la clasificación desde el Excel de `API.py` o desde su diario JSONL."""
+    if ruta.endswith(".jsonl"):
+        from sostenibilidad.resultados_guias import leer_diario
+        return leer_diario(ruta)
+    return pd.read_excel(ruta)
+
+
+if __name__ == "__main__":
+    ruta_resultados = sys.argv[1] if len(sys.argv) > 1 else RUTA_RESULTADOS
+    anho = sys.argv[2] if len(sys.argv) > 2 else None
+
+    if not os.path.exists(ruta_resultados):
+        print(f"No existe el archivo de resultados: {ruta_resultados}")
+        sys.exit(1)
+
+    actualizar_sostenibilidad(preparar_actualizaciones(leer_resultados(ruta_resultados)), anho)
@@ -0,0 +1,73 @@
+"""
+Extracción de los campos de cabecera de una guía docente.
+
+La primera página de cada guía contiene la titulación, la denominación de la
+asignatura y su código, cada uno en la línea siguiente a su etiqueta:
+
+    Titulación
+    Grado en Ingeniería Informática
+    Código
+    5302
+    1. Denominación de la asignatura:
+    Bases de Datos
+
+Los tres campos se obtienen en una sola pasada sobre el texto con un único patrón
+precompilado. El patrón admite las variantes de maquetación que produce PyPDF2
+según la versión de la plantilla: acentos descompuestos, espacios o dos puntos
+tras la etiqueta, saltos de línea `\\r\\n` y el valor en la misma línea tras los
+dos puntos ("Código: 5302").
+"""
+
+import re
+import unicodedata
+
+CAMPOS_CABECERA = ("titulacion", "denominacion", "codigo")
+
+# Tras la etiqueta: el valor en la línea siguiente o, si hay dos puntos, en la misma línea.
+# El valor va dentro de una búsqueda anticipada para no consumirlo: así una etiqueta
+# que aparezca como valor de otra (una cabecera sin rellenar) también se reconoce.
+_PATRON_CABECERA = re.compile(
+    r"(?:"
+    r"(?P<titulacion>Titulaci[oó]n)"
+    r"|(?P<codigo>C[oó]digo)"
+    r"|(?P<denominacion>1.[ \t]*Denominaci[oó]n[ \t]+de[ \t]+la[ \t]+asignatura)"
+    r")"
+    r"(?:[ \t]*:?[ \t]*\r?\n|[ \t]*:[ \t]*(?=\S))"
+    r"(?=(?P<valor>[^\r\n]*))"
+)
+
+
+def extraer_cabecera(texto_primera_pagina):
+    """
+    Extrae la titulación, la denominación y el código de la primera página de una guía.
+
+    Si una etiqueta aparece varias veces se toma la primera aparición, y la búsqueda
+    termina en cuanto se han encontrado los tres campos.
+
+    Args:
+        texto_primera_pagina (str): El texto de la primera página con texto del PDF.
+
+    Returns:
+        tuple[str | None, str | None, str | None]: Titulación, denominación y código,
+            con None en los campos que no se encuentran.
+    """
+    # PyPDF2 devuelve a veces los acentos descompuestos ("o" + tilde combinada)
+    if not texto_primera_pagina.isascii():
+        texto_primera_pagina = unicodedata.normalize("NFC", texto_primera_pagina)
+
+    campos = {}
+    for match in _PATRON_CABECERA.finditer(texto_primera_pagina):
+        campo = _campo_de(match)
+        if campo not in campos:
+            campos[campo] = match.group("valor").strip()
+            if len(campos) == len(CAMPOS_CABECERA):
+                break
+
+    return tuple(campos.get(campo) for campo in CAMPOS_CABECERA)
+
+
+def _campo_de(match):
+    """Devuelve el nombre del campo cuya etiqueta ha reconocido `match`."""
+    for campo in CAMPOS_CABECERA:
+        if match.group(campo) is not None:
+            return campo
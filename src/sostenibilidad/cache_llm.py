@@ -0,0 +1,148 @@
+"""
+Caché persistente de las respuestas del modelo de lenguaje.
+
+Al repetir `API.py` todas las guías se volvían a enviar al modelo aunque no
+hubiera cambiado nada. Esta caché guarda cada respuesta indexada por el hash
+SHA-256 de todo lo que la determina: modelo, prompt de sistema, temperatura y
+texto enviado. Una guía sin cambios no genera ninguna petición al modelo, y
+cambiar el prompt o el modelo invalida de forma natural las respuestas anteriores.
+
+La caché es una base de datos SQLite en modo WAL con un número máximo de entradas
+(variable de entorno LLM_CACHE_MAX_ENTRADAS, por defecto 50000). Al superarlo se
+eliminan las respuestas usadas hace más tiempo.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+RUTA_CACHE_LLM = os.path.join("sostenibilidad", "data", "cache_llm.db")
+LLM_CACHE_MAX_ENTRADAS = int(os.getenv("LLM_CACHE_MAX_ENTRADAS", 50000))
+# Cada cuántas respuestas nuevas se comprueba el tamaño de la caché
+_INTERVALO_PODA = 500
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS respuestas (
+    clave TEXT PRIMARY KEY,
+    modelo TEXT NOT NULL,
+    respuesta TEXT NOT NULL,
+    creada REAL NOT NULL,
+    usada REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS respuestas_usada ON respuestas (usada);
+CREATE INDEX IF NOT EXISTS respuestas_modelo ON respuestas (modelo);
+"""
+
+
+def clave_respuesta(modelo, prompt_sistema, temperatura, texto):
+    """
+    Calcula la clave de caché de una petición al modelo.
+
+    Args:
+        modelo (str): Nombre del modelo.
+        prompt_sistema (str): Prompt de sistema de la petición.
+        temperatura (float): Temperatura de la petición.
+        texto (str): Texto enviado como mensaje de usuario.
+
+    Returns:
+        str: El hash SHA-256 en hexadecimal.
+    """
+    contenido = json.dumps([modelo, prompt_sistema, temperatura, texto], ensure_ascii=False)
+    return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+
+class CacheLLM:
+    """
+    Acceso a la caché de respuestas del modelo, con contadores de aciertos y fallos.
+    Se puede usar desde varios hilos a la vez.
+    """
+
+    def __init__(self, ruta=RUTA_CACHE_LLM, max_entradas=LLM_CACHE_MAX_ENTRADAS):
+        self.ruta = ruta
+        self.max_entradas = max_entradas
+        self.aciertos = 0
+        self.fallos = 0
+        self.eliminadas = 0
+        self._nuevas = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+        self._conexion = sqlite3.connect(ruta, timeout=30, check_same_thread=False)
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.executescript(_ESQUEMA)
+
+    def obtener(self, clave):
+        """
+        Busca una respuesta en la caché y, si está, la marca como usada.
+
+        Args:
+            clave (str): Clave calculada con `clave_respuesta`.
+
+        Returns:
+            str | None: La respuesta guardada, o None si no está.
+        """
+        with self._lock, self._conexion:
+            fila = self._conexion.execute("SELECT respuesta FROM respuestas WHERE clave = ?", (clave,)).fetchone()
+            if fila is None:
+                self.fallos += 1
+                return None
+            self._conexion.execute("UPDATE respuestas SET usada = ? WHERE clave = ?", (time.time(), clave))
+            self.aciertos += 1
+        return fila[0]
+
+    def guardar(self, clave, modelo, respuesta):
+        """
+        Guarda la respuesta del modelo a una petición.
+
+        Args:
+            clave (str): Clave calculada con `clave_respuesta`.
+            modelo (str): Nombre del modelo que generó la respuesta.
+            respuesta (str): Contenido de la respuesta.
+        """
+        ahora = time.time()
+        with self._lock, self._conexion:
+            self._conexion.execute(
+                "INSERT OR REPLACE INTO respuestas VALUES (?, ?, ?, ?, ?)",
+                (clave, modelo, respuesta, ahora, ahora)
+            )
+            self._nuevas += 1
+            if self._nuevas % _INTERVALO_PODA == 0:
+                self._podar()
+
+    def _podar(self):
+        """Elimina las respuestas usadas hace más tiempo si se supera el máximo de entradas."""
+        sobrantes = self._conexion.execute("SELECT COUNT(*) FROM respuestas").fetchone()[0] - self.max_entradas
+        if sobrantes > 0:
+            self._conexion.execute(
+                "DELETE FROM respuestas WHERE clave IN (SELECT clave FROM respuestas ORDER BY usada LIMIT ?)",
+                (sobrantes,)
+            )
+            self.eliminadas += sobrantes
+
+    def refrescar_modelo(self, modelo):
+        """
+        Elimina las respuestas de un modelo para que se vuelvan a pedir.
+
+        Args:
+            modelo (str): Nombre del modelo.
+
+        Returns:
+            int: Número de respuestas eliminadas.
+        """
+        with self._lock, self._conexion:
+            return self._conexion.execute("DELETE FROM respuestas WHERE modelo = ?", (modelo,)).rowcount
+
+    def resumen(self):
+        """Devuelve un texto con los aciertos y fallos de la caché."""
+        total = self.aciertos + self.fallos
+        porcentaje = 100 * self.aciertos / total if total else 0
+        return (f"Caché de respuestas del modelo: {self.aciertos} aciertos, {self.fallos} fallos "
+                f"({porcentaje:.0f}% de aciertos), {self.eliminadas} respuestas antiguas eliminadas")
+
+    def cerrar(self):
+        """Aplica el límite de entradas y cierra la conexión con la base de datos."""
+        with self._lock, self._conexion:
+            self._podar()
+        self._conexion.close()
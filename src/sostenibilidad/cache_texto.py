@@ -0,0 +1,142 @@
+"""
+Caché persistente del texto extraído de las guías docentes.
+
+Las guías se analizan con PyPDF2 en `procesadoAsignaturas.py` y otra vez en
+`API.py`. Esta caché guarda, por cada PDF, el texto de sus primeras páginas
+(comprimido con zlib; el del resto no se conserva) y los campos de cabecera ya
+extraídos, indexados por el hash SHA-256
+del contenido del fichero. Así cada PDF se analiza una sola vez en toda su vida,
+aunque se ejecuten varios scripts o se repita un curso académico.
+
+La caché es una base de datos SQLite en modo WAL, por lo que pueden usarla a la
+vez varios procesos (por ejemplo, los del pool de extracción).
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import zlib
+
+RUTA_CACHE = os.path.join("sostenibilidad", "data", "cache_texto.db")
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS guias (
+    sha256 TEXT PRIMARY KEY,
+    num_paginas INTEGER NOT NULL,
+    titulacion TEXT,
+    denominacion TEXT,
+    codigo TEXT,
+    pagina_con_asteriscos INTEGER
+);
+CREATE TABLE IF NOT EXISTS paginas (
+    sha256 TEXT NOT NULL,
+    num INTEGER NOT NULL,
+    texto BLOB NOT NULL,
+    PRIMARY KEY (sha256, num)
+);
+"""
+
+
+def hash_archivo(ruta):
+    """
+    Calcula el hash SHA-256 del contenido de un fichero.
+
+    Args:
+        ruta (str): Ruta del fichero.
+
+    Returns:
+        str: El hash en hexadecimal.
+    """
+    sha256 = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(1024 * 1024), b""):
+            sha256.update(bloque)
+    return sha256.hexdigest()
+
+
+class CacheTexto:
+    """
+    Acceso a la caché de texto extraído, con contadores de aciertos y fallos.
+    """
+
+    def __init__(self, ruta=RUTA_CACHE):
+        self.ruta = ruta
+        self.aciertos = 0
+        self.fallos = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+        self._conexion = sqlite3.connect(ruta, timeout=30, check_same_thread=False)
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.executescript(_ESQUEMA)
+
+    def obtener(self, sha256):
+        """
+        Busca una guía en la caché.
+
+        Args:
+            sha256 (str): Hash del contenido del PDF.
+
+        Returns:
+            tuple[list[str], tuple] | None: El texto de cada página y la tupla
+                (titulación, denominación, código, página con asteriscos), o None si no está.
+        """
+        with self._lock:
+            guia = self._conexion.execute(
+                "SELECT num_paginas, titulacion, denominacion, codigo, pagina_con_asteriscos "
+                "FROM guias WHERE sha256 = ?", (sha256,)
+            ).fetchone()
+            if guia is None:
+                self.fallos += 1
+                return None
+            filas = self._conexion.execute(
+                "SELECT num, texto FROM paginas WHERE sha256 = ? ORDER BY num", (sha256,)
+            ).fetchall()
+            self.aciertos += 1
+
+        paginas = [""] * guia[0]
+        for num, texto in filas:
+            paginas[num] = zlib.decompress(texto).decode("utf-8")
+        return paginas, tuple(guia[1:])
+
+    def guardar(self, sha256, paginas, cabecera):
+        """
+        Guarda el texto de las páginas y la cabecera extraída de una guía.
+
+        Args:
+            sha256 (str): Hash del contenido del PDF.
+            paginas (list[str]): Texto de cada página (cadena vacía si no tiene texto).
+            cabecera (tuple): Titulación, denominación, código y página con asteriscos.
+        """
+        filas = [
+            (sha256, num, zlib.compress(texto.encode("utf-8")))
+            for num, texto in enumerate(paginas) if texto
+        ]
+        with self._lock, self._conexion:
+            self._conexion.execute(
+                "INSERT OR REPLACE INTO guias VALUES (?, ?, ?, ?, ?, ?)",
+                (sha256, len(paginas), *cabecera)
+            )
+            self._conexion.execute("DELETE FROM paginas WHERE sha256 = ?", (sha256,))
+            self._conexion.executemany("INSERT INTO paginas VALUES (?, ?, ?)", filas)
+
+    def resumen(self):
+        """Devuelve un texto con los aciertos y fallos de la caché."""
+        total = self.aciertos + self.fallos
+        porcentaje = 100 * self.aciertos / total if total else 0
+        return f"Caché de texto: {self.aciertos} aciertos, {self.fallos} fallos ({porcentaje:.0f}% de aciertos)"
+
+    def cerrar(self):
+        """Cierra la conexión con la base de datos."""
+        self._conexion.close()
+
+
+_cache_proceso = None
+
+
+def obtener_cache():
+    """Devuelve la instancia de la caché del proceso actual, creándola si hace falta."""
+    global _cache_proceso
+    if _cache_proceso is None:
+        _cache_proceso = CacheTexto()
+    return _cache_proceso
@@ -0,0 +1,308 @@
+"""
+Clasificación concurrente de guías docentes con el modelo de lenguaje.
+
+`API.py` enviaba una petición bloqueante a `/v1/chat/completions` por guía, una
+detrás de otra, y el servidor local (LM Studio) quedaba parado entre llamadas.
+Este módulo mantiene varias peticiones en vuelo a la vez con el cliente compartido
+de `cliente_llm` (pool de conexiones, tiempo máximo por petición, reintentos con
+espera exponencial ante respuestas 429 y 5xx y limitador de ritmo). Los
+resultados se devuelven en el mismo
+orden que las guías. Si se le pasa una `CacheLLM`, las guías cuya respuesta ya
+está en la caché no generan ninguna petición.
+
+Las respuestas se piden en JSON con un esquema, y se validan y reparan con
+`ClienteLLM.pedir_json`.
+
+Con LLM_GUIAS_POR_PETICION mayor que 1, cada petición lleva K guías y pide un
+resultado por guía, de modo que el prompt de sistema se envía una vez cada K
+guías. Las guías cuyo resultado falta en la respuesta, o cuya petición falla,
+se vuelven a pedir de una en una.
+
+Configuración (variables de entorno):
+    - LLM_CONCURRENCIA: guías que se clasifican a la vez (por defecto 4). Las
+      peticiones simultáneas al servidor están limitadas además por
+      LLM_MAX_CONEXIONES (ver `cliente_llm`).
+    - LLM_GUIAS_POR_PETICION: guías enviadas en cada petición (por defecto 1).
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from cliente_llm import ErrorLLM, LLM_TIMEOUT, obtener_cliente
+from sostenibilidad.cache_llm import clave_respuesta
+
+LLM_CONCURRENCIA = int(os.getenv("LLM_CONCURRENCIA", 4))
+LLM_GUIAS_POR_PETICION = int(os.getenv("LLM_GUIAS_POR_PETICION", 1))
+
+TEMPERATURA = 0.2
+
+# Instrucciones comunes a la petición de una guía y a la de varias guías
+_INSTRUCCIONES = (
+    "Do not translate it to English. "
+    "Extract and return only the following fields:\n"
+    "1. The name of the subject (without commas)\n"
+    "2. The degree\n"
+    "3. The code\n"
+    "4. The curricular sustainability competencies\n"
+    "Find section with the following title  Competencias que debe adquirir el alumno/a al cursar la asignatura. Identify \n"
+    "only the competencies listed there that have an asterisk (*). \n"
+    " If no competencies have an asterisk, return 'None'.\n"
+    "If at least one competency has an asterisk, return only those that have one and for each competency, analyze its\n"
+    "description and determine which of the following objectives it aligns with based on its content:\n"
+
+        "1. Fin de la pobreza\n"
+        "2. Hambre cero\n"
+        "3. Salud y bienestar\n"
+        "4. Educación de calidad\n"
+        "5. Igualdad de género\n"
+        "6. Agua limpia y saneamiento\n"
+        "7. Energía asequible y no contaminante\n"
+        "8. Trabajo decente y crecimiento económico\n"
+        "9. Industria, innovación e infraestructura\n"
+        "10. Reducción de las desigualdades\n"
+        "11. Ciudades y comunidades sostenibles\n"
+        "12. Producción y consumo responsables\n"
+        "13. Acción por el clima\n"
+        "14. Vida submarina\n"
+        "15. Vida de ecosistemas terrestres\n"
+        "16. Paz, justicia e instituciones sólidas\n"
+        "17. Alianzas para lograr los objetivos\n"
+    "If a competency clearly aligns with one or more objectives, list them next to the competency. SDG X (Y) - Competency Where:\n"
+        "X is the number of the corresponding objective.\n"
+        "Y is the name of the objective.\n"
+        "Competency is the code of the competency\n"
+    "If no clear alignment is found, leave that field empty. If no asterisk return None\n"
+)
+
+PROMPT_SISTEMA = (
+    "You will receive the data of a teaching guide in Spanish. " + _INSTRUCCIONES +
+    "Return ONLY a JSON object with these keys: 'name' (the subject name), 'degree', 'code' and "
+    "'competences' (the curricular sustainability competencies, or 'None')."
+)
+
+PROMPT_SISTEMA_LOTE = (
+    "You will receive several teaching guides in Spanish. Each guide starts with a line "
+    "'### GUIDE <id>'. Process each guide independently. " + _INSTRUCCIONES +
+    "Return ONLY a JSON object with a 'results' list containing one element per guide with these keys: "
+    "'id' (the number of the guide), 'name', 'degree', 'code' and 'competences' "
+    "(the curricular sustainability competencies, or 'None')."
+)
+
+CAMPOS_GUIA = ("name", "degree", "code", "competences")
+
+# Esquema de la respuesta para una guía
+ESQUEMA_GUIA = {
+    "type": "object",
+    "properties": {campo: {"type": "string"} for campo in CAMPOS_GUIA},
+    "required": list(CAMPOS_GUIA),
+}
+
+# Esquema de la respuesta de una petición con varias guías
+ESQUEMA_LOTE = {
+    "type": "object",
+    "properties": {
+        "results": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"id": {"type": "integer"}, **ESQUEMA_GUIA["properties"]},
+                "required": ["id", *CAMPOS_GUIA],
+            },
+        },
+    },
+    "required": ["results"],
+}
+
+
+def texto_lote(textos):
+    """Devuelve el mensaje de usuario de una petición con varias guías, numeradas desde 1."""
+    return "\n\n".join(f"### GUIDE {i}\n{texto}" for i, texto in enumerate(textos, start=1))
+
+
+def interpretar_lote(datos, num_guias):
+    """
+    Reparte por guía los resultados de la respuesta a una petición con varias guías.
+
+    Args:
+        datos (dict): Respuesta del modelo, ya validada con `ESQUEMA_LOTE`.
+        num_guias (int): Número de guías enviadas en la petición.
+
+    Returns:
+        dict[int, dict]: Resultado de cada guía, por su número (desde 1), con las
+            claves de `CAMPOS_GUIA`. Los números fuera de rango o repetidos se descartan.
+    """
+    resultados = {}
+    for elemento in datos["results"]:
+        numero = elemento["id"]
+        if 1 <= numero <= num_guias and numero not in resultados:
+            resultados[numero] = {campo: elemento[campo].strip() for campo in CAMPOS_GUIA}
+    return resultados
+
+
+class ClasificadorGuias:
+    """
+    Envía las guías al modelo con varias peticiones simultáneas.
+
+    La respuesta de cada guía es un diccionario con las claves de `CAMPOS_GUIA`.
+
+    Uso:
+        with ClasificadorGuias(base_url, api_key, modelo) as clasificador:
+            for nombre, respuesta, error in clasificador.clasificar_guias(guias):
+                ...
+    """
+
+    def __init__(self, base_url, api_key, modelo, concurrencia=LLM_CONCURRENCIA,
+                 timeout=LLM_TIMEOUT, cache=None,
+                 guias_por_peticion=LLM_GUIAS_POR_PETICION):
+        self.cliente = obtener_cliente({"base_url": base_url, "api_key": api_key, "model": modelo})
+        self.modelo = modelo
+        self.cache = cache
+        self.guias_por_peticion = max(1, guias_por_peticion)
+        # Prompt con el que se obtienen las respuestas (forma parte de las claves de caché y del diario)
+        self.prompt = PROMPT_SISTEMA_LOTE if self.guias_por_peticion > 1 else PROMPT_SISTEMA
+        self.concurrencia = max(1, concurrencia)
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self.peticiones = 0
+        self.errores = 0
+        self.segundos_peticiones = 0.0
+        self.guias_en_lote = 0
+        self.guias_repetidas = 0
+
+    def _pedir(self, sistema, usuario, esquema, nombre_esquema):
+        """Envía una petición al modelo y devuelve su respuesta JSON validada."""
+        inicio = time.perf_counter()
+        try:
+            return self.cliente.pedir_json(sistema, usuario, esquema, nombre_esquema, temperatura=TEMPERATURA,
+                                           timeout=self.timeout, llamador="clasificador")
+        finally:
+            with self._lock:
+                self.peticiones += 1
+                self.segundos_peticiones += time.perf_counter() - inicio
+
+    def clasificar(self, texto):
+        """
+        Clasifica el texto de una guía, usando la respuesta guardada en la caché si la hay.
+
+        Args:
+            texto (str): El texto de la guía que se envía al modelo.
+
+        Returns:
+            dict: La respuesta del modelo, con las claves de `CAMPOS_GUIA`.
+
+        Raises:
+            ErrorLLM: Si la petición falla tras los reintentos, el servidor responde con
+                un error o la respuesta no cumple `ESQUEMA_GUIA` ni tras repararla.
+        """
+        clave = None
+        if self.cache is not None:
+            # Clave del prompt que se envía (`_clasificar_lote` también la busca)
+            clave = clave_respuesta(self.modelo, PROMPT_SISTEMA, TEMPERATURA, texto)
+            guardada = self.cache.obtener(clave)
+            if guardada is not None:
+                return json.loads(guardada)
+
+        datos = self._pedir(PROMPT_SISTEMA, texto, ESQUEMA_GUIA, "guia")
+        respuesta = {campo: datos[campo].strip() for campo in CAMPOS_GUIA}
+        if clave is not None:
+            self.cache.guardar(clave, self.modelo, json.dumps(respuesta, ensure_ascii=False))
+        return respuesta
+
+    def _clasificar_guia(self, guia):
+        """Clasifica una guía sin propagar excepciones, para no detener el resto del lote."""
+        nombre, texto = guia
+        try:
+            return nombre, self.clasificar(texto), None
+        except ErrorLLM as e:
+            with self._lock:
+                self.errores += 1
+            return nombre, None, str(e)
+
+    def _clasificar_lote(self, lote):
+        """
+        Clasifica varias guías con una sola petición. Las respuestas guardadas en la
+        caché se reutilizan y las guías que faltan en la respuesta se piden de una en una.
+
+        Cada respuesta se guarda con la clave del prompt con el que se ha pedido: las
+        del lote con PROMPT_SISTEMA_LOTE y las pedidas de una en una con PROMPT_SISTEMA.
+        Antes de enviar el lote se buscan las dos.
+        """
+        resultados = {}
+        claves = {}
+        for nombre, texto in lote:
+            if self.cache is not None:
+                claves[nombre] = clave_respuesta(self.modelo, PROMPT_SISTEMA_LOTE, TEMPERATURA, texto)
+                for clave in (claves[nombre], clave_respuesta(self.modelo, PROMPT_SISTEMA, TEMPERATURA, texto)):
+                    guardada = self.cache.obtener(clave)
+                    if guardada is not None:
+                        resultados[nombre] = json.loads(guardada)
+                        break
+
+        pendientes = [(nombre, texto) for nombre, texto in lote if nombre not in resultados]
+        if len(pendientes) > 1:
+            try:
+                datos = self._pedir(PROMPT_SISTEMA_LOTE, texto_lote([texto for _, texto in pendientes]),
+                                    ESQUEMA_LOTE, "guias")
+                for numero, resultado in interpretar_lote(datos, len(pendientes)).items():
+                    nombre = pendientes[numero - 1][0]
+                    resultados[nombre] = resultado
+                    if nombre in claves:
+                        self.cache.guardar(claves[nombre], self.modelo, json.dumps(resultado, ensure_ascii=False))
+            except ErrorLLM as e:
+                print(f"Error en la petición de {len(pendientes)} guías, se piden de una en una: {e}")
+
+        salida = []
+        for nombre, texto in lote:
+            if nombre in resultados:
+                with self._lock:
+                    self.guias_en_lote += 1
+                salida.append((nombre, resultados[nombre], None))
+            else:
+                with self._lock:
+                    self.guias_repetidas += 1
+                salida.append(self._clasificar_guia((nombre, texto)))
+        return salida
+
+    def clasificar_guias(self, guias):
+        """
+        Clasifica un conjunto de guías con `concurrencia` peticiones simultáneas,
+        de `guias_por_peticion` guías cada una.
+
+        Args:
+            guias (Iterable[tuple[str, str]]): Nombre del PDF y texto de cada guía.
+
+        Yields:
+            tuple[str, dict | None, str | None]: Nombre del PDF, respuesta del modelo
+                (None si falló) y mensaje de error, en el mismo orden que las guías.
+        """
+        with ThreadPoolExecutor(max_workers=self.concurrencia) as executor:
+            if self.guias_por_peticion == 1:
+                yield from executor.map(self._clasificar_guia, guias)
+                return
+            guias = list(guias)
+            lotes = [guias[i:i + self.guias_por_peticion] for i in range(0, len(guias), self.guias_por_peticion)]
+            for resultados in executor.map(self._clasificar_lote, lotes):
+                yield from resultados
+
+    def resumen(self, segundos_totales):
+        """Devuelve un texto con el rendimiento de la clasificación."""
+        media = self.segundos_peticiones / self.peticiones if self.peticiones else 0
+        ritmo = self.peticiones / segundos_totales if segundos_totales else 0
+        resumen = (f"Clasificación: {self.peticiones} peticiones ({self.errores} con error) en {segundos_totales:.1f} s, "
+                   f"{ritmo:.2f} peticiones/s, {media:.1f} s por petición, concurrencia {self.concurrencia}")
+        if self.guias_por_peticion > 1:
+            resumen += (f"; {self.guias_por_peticion} guías por petición, {self.guias_en_lote} resueltas en lote, "
+                        f"{self.guias_repetidas} pedidas de una en una")
+        return resumen
+
+    def cerrar(self):
+        """No cierra nada: la sesión HTTP es la del cliente compartido, que siguen usando otros llamadores."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.cerrar()
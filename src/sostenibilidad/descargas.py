@@ -0,0 +1,289 @@
+"""
+Etapa de descarga concurrente de las guías docentes.
+
+Las guías se descargan con un número acotado de hilos que comparten una única
+sesión HTTP, de modo que las conexiones keep-alive con el servidor se reutilizan
+entre descargas. Además del límite global de hilos, se limita el número de
+descargas simultáneas contra un mismo servidor para no saturarlo.
+
+Un manifiesto en disco (`ManifiestoGuias`) guarda, por cada PDF, la URL, las
+cabeceras ETag/Last-Modified, el tamaño y el hash SHA-256 del contenido. Con él
+las guías ya descargadas se piden de forma condicional y, si el servidor responde
+304 o el contenido no ha cambiado, no se vuelven a escribir.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+# Valores por defecto, configurables mediante variables de entorno
+MAX_DESCARGAS = int(os.getenv("MAX_DESCARGAS", 8))
+MAX_DESCARGAS_POR_HOST = int(os.getenv("MAX_DESCARGAS_POR_HOST", 4))
+TIMEOUT_DESCARGA = 30
+NOMBRE_MANIFIESTO = "manifiesto.json"
+
+DESCARGADA = "descargada"
+SIN_CAMBIOS = "sin_cambios"
+ERROR = "error"
+
+
+def crear_sesion(max_conexiones=MAX_DESCARGAS):
+    """
+    Crea una sesión HTTP con un pool de conexiones reutilizables.
+
+    Args:
+        max_conexiones (int): Número máximo de conexiones abiertas por servidor.
+
+    Returns:
+        requests.Session: La sesión configurada.
+    """
+    sesion = requests.Session()
+    adaptador = HTTPAdapter(pool_connections=max_conexiones, pool_maxsize=max_conexiones)
+    sesion.mount("https://", adaptador)
+    sesion.mount("http://", adaptador)
+    return sesion
+
+
+class LimitadorPorHost:
+    """
+    Limita el número de descargas simultáneas contra un mismo servidor.
+    """
+
+    def __init__(self, maximo):
+        self.maximo = maximo
+        self._semaforos = {}
+        self._lock = threading.Lock()
+
+    def semaforo(self, url):
+        """Devuelve el semáforo asociado al servidor de la URL."""
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._semaforos:
+                self._semaforos[host] = threading.BoundedSemaphore(self.maximo)
+            return self._semaforos[host]
+
+
+class ManifiestoGuias:
+    """
+    Registro en disco de las guías descargadas, para poder pedirlas de forma condicional.
+
+    Cada entrada, indexada por el nombre del PDF, guarda la URL de descarga, las
+    cabeceras ETag y Last-Modified devueltas por el servidor, el tamaño en bytes y
+    el hash SHA-256 del contenido.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._lock = threading.Lock()
+        try:
+            with open(ruta, "r", encoding="utf-8") as f:
+                self._entradas = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self._entradas = {}
+
+    def cabeceras_condicionales(self, url, ruta_archivo):
+        """
+        Devuelve las cabeceras para pedir la guía solo si ha cambiado.
+
+        Solo se usan si el PDF sigue en disco con el tamaño registrado y la URL es la
+        misma (una guía de otro curso académico se descarga siempre).
+
+        Returns:
+            dict: Cabeceras If-None-Match / If-Modified-Since, o vacío si no aplican.
+        """
+        with self._lock:
+            entrada = self._entradas.get(os.path.basename(ruta_archivo))
+        if not entrada or entrada.get("url") != url:
+            return {}
+        if not os.path.exists(ruta_archivo) or os.path.getsize(ruta_archivo) != entrada.get("bytes"):
+            return {}
+        cabeceras = {}
+        if entrada.get("etag"):
+            cabeceras["If-None-Match"] = entrada["etag"]
+        if entrada.get("last_modified"):
+            cabeceras["If-Modified-Since"] = entrada["last_modified"]
+        return cabeceras
+
+    def sha256(self, ruta_archivo):
+        """Devuelve el hash registrado para el PDF, o None si no está en el manifiesto."""
+        with self._lock:
+            return self._entradas.get(os.path.basename(ruta_archivo), {}).get("sha256")
+
+    def registrar(self, url, ruta_archivo, response, sha256, num_bytes):
+        """Guarda (o actualiza) la entrada de una guía tras una respuesta correcta."""
+        entrada = {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "bytes": num_bytes,
+            "sha256": sha256,
+        }
+        with self._lock:
+            self._entradas[os.path.basename(ruta_archivo)] = entrada
+
+    def guardar(self):
+        """Escribe el manifiesto de forma atómica."""
+        with self._lock:
+            temporal = f"{self.ruta}.tmp"
+            with open(temporal, "w", encoding="utf-8") as f:
+                json.dump(self._entradas, f, indent=2)
+            os.replace(temporal, self.ruta)
+
+
+def _guardar_pdf(ruta_archivo, contenido):
+    """Escribe el PDF en un temporal y lo renombra, para no dejar ficheros a medias."""
+    temporal = f"{ruta_archivo}.part"
+    with open(temporal, "wb") as f:
+        f.write(contenido)
+    os.replace(temporal, ruta_archivo)
+
+
+def _mismo_tamano(ruta_archivo, num_bytes):
+    """Indica si el PDF está en disco con el tamaño indicado."""
+    try:
+        return os.path.getsize(ruta_archivo) == num_bytes
+    except OSError:
+        return False
+
+
+def descargar_guia(sesion, url, ruta_archivo, limitador=None, manifiesto=None):
+    """
+    Descarga una guía docente y la guarda en disco.
+
+    Si se proporciona un manifiesto, la petición es condicional: una respuesta 304,
+    o un contenido con el mismo hash que el registrado, deja el PDF existente intacto.
+
+    Args:
+        sesion (requests.Session): Sesión HTTP compartida.
+        url (str): URL de descarga de la guía.
+        ruta_archivo (str): Ruta donde se guardará el PDF.
+        limitador (LimitadorPorHost, optional): Limitador de descargas por servidor.
+        manifiesto (ManifiestoGuias, optional): Manifiesto de guías ya descargadas.
+
+    Returns:
+        dict: Resultado de la descarga con la ruta, el estado (`DESCARGADA`,
+              `SIN_CAMBIOS` o `ERROR`), los bytes recibidos y el tiempo empleado en segundos.
+    """
+    inicio = time.perf_counter()
+    resultado = {"ruta": ruta_archivo, "url": url, "ok": False, "estado": ERROR, "bytes": 0, "segundos": 0.0}
+    semaforo = limitador.semaforo(url) if limitador else threading.BoundedSemaphore(1)
+    cabeceras = manifiesto.cabeceras_condicionales(url, ruta_archivo) if manifiesto else {}
+    try:
+        with semaforo:
+            response = sesion.get(url, headers=cabeceras, timeout=TIMEOUT_DESCARGA)
+            response.raise_for_status()
+            contenido = response.content
+
+        resultado["ok"] = True
+        resultado["bytes"] = len(contenido)
+        if response.status_code == 304:
+            resultado["estado"] = SIN_CAMBIOS
+        else:
+            sha256 = hashlib.sha256(contenido).hexdigest()
+            # Aunque el servidor no envíe ETag ni Last-Modified (y la petición no haya
+            # sido condicional), un contenido idéntico al que ya está en disco no se reescribe
+            if manifiesto and manifiesto.sha256(ruta_archivo) == sha256 and _mismo_tamano(ruta_archivo, len(contenido)):
+                resultado["estado"] = SIN_CAMBIOS
+            else:
+                _guardar_pdf(ruta_archivo, contenido)
+                resultado["estado"] = DESCARGADA
+            if manifiesto:
+                manifiesto.registrar(url, ruta_archivo, response, sha256, len(contenido))
+    except (requests.exceptions.RequestException, OSError) as e:
+        resultado["ok"] = False
+        resultado["estado"] = ERROR
+        resultado["error"] = str(e)
+    resultado["segundos"] = time.perf_counter() - inicio
+
+    if resultado["estado"] == DESCARGADA:
+        print(f"Guía descargada: {ruta_archivo} ({resultado['segundos']:.2f} s)")
+    elif resultado["estado"] == SIN_CAMBIOS:
+        print(f"Guía sin cambios: {ruta_archivo} ({resultado['segundos']:.2f} s)")
+    else:
+        print(f"Error al descargar el archivo {url}: {resultado['error']}")
+    return resultado
+
+
+class DescargadorGuias:
+    """
+    Etapa de descarga concurrente alimentada con los enlaces descubiertos.
+
+    Las descargas se encolan con `enviar` a medida que se encuentran los enlaces,
+    por lo que se solapan con el descubrimiento. Al cerrar el descargador se espera
+    a que terminen todas, se guarda el manifiesto y se imprime un resumen de tiempos.
+
+    Uso:
+        with DescargadorGuias(ruta_manifiesto=ruta, max_descargas=8) as descargador:
+            descargador.enviar(url, ruta)
+        resultados = descargador.resultados
+    """
+
+    def __init__(self, ruta_manifiesto=None, max_descargas=MAX_DESCARGAS, max_por_host=MAX_DESCARGAS_POR_HOST):
+        self.sesion = crear_sesion(max_descargas)
+        self.limitador = LimitadorPorHost(max_por_host)
+        self.manifiesto = ManifiestoGuias(ruta_manifiesto) if ruta_manifiesto else None
+        self._executor = ThreadPoolExecutor(max_workers=max_descargas, thread_name_prefix="descarga")
+        self._futuros = []
+        self._inicio = time.perf_counter()
+        self.resultados = []
+
+    def enviar(self, url, ruta_archivo):
+        """
+        Encola la descarga de una guía.
+
+        Returns:
+            concurrent.futures.Future: Futuro con el resultado de `descargar_guia`.
+        """
+        futuro = self._executor.submit(descargar_guia, self.sesion, url, ruta_archivo,
+                                       self.limitador, self.manifiesto)
+        self._futuros.append(futuro)
+        return futuro
+
+    def cerrar(self):
+        """Espera a que terminen las descargas pendientes, guarda el manifiesto y libera la sesión."""
+        self._executor.shutdown(wait=True)
+        self.sesion.close()
+        if self.manifiesto:
+            self.manifiesto.guardar()
+        self.resultados = [futuro.result() for futuro in self._futuros]
+        resumir_descargas(self.resultados, time.perf_counter() - self._inicio)
+        return self.resultados
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.cerrar()
+
+
+def resumir_descargas(resultados, segundos_totales):
+    """
+    Imprime un resumen de las descargas realizadas.
+
+    Args:
+        resultados (list[dict]): Resultados devueltos por `descargar_guia`.
+        segundos_totales (float): Tiempo total de la etapa de descarga.
+    """
+    if not resultados:
+        print("No se ha descargado ninguna guía.")
+        return
+    descargadas = sum(1 for r in resultados if r["estado"] == DESCARGADA)
+    sin_cambios = sum(1 for r in resultados if r["estado"] == SIN_CAMBIOS)
+    errores = sum(1 for r in resultados if r["estado"] == ERROR)
+    media = sum(r["segundos"] for r in resultados) / len(resultados)
+    lenta = max(resultados, key=lambda r: r["segundos"])
+    megas = sum(r["bytes"] for r in resultados) / (1024 * 1024)
+    print(
+        f"Descargas: {descargadas} nuevas o actualizadas, {sin_cambios} sin cambios, "
+        f"{errores} con error, {megas:.1f} MB recibidos "
+        f"en {segundos_totales:.1f} s (media {media:.2f} s por guía, "
+        f"más lenta {lenta['segundos']:.2f} s: {os.path.basename(lenta['ruta'])})"
+    )
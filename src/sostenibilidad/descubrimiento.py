@@ -0,0 +1,133 @@
+"""
+Descubrimiento de los enlaces a las guías docentes de cada titulación.
+
+Por defecto la página de guías se descarga con HTTP plano y los enlaces se extraen
+con un parser HTML (lxml), sin arrancar ningún navegador. Solo si el HTML estático
+no contiene enlaces (porque la página los genera con JavaScript) se recurre al
+pool de navegadores de `navegador.py`, que se crea bajo demanda.
+
+Modos disponibles (variable de entorno MODO_DESCUBRIMIENTO):
+    - "auto": HTTP y, si no hay enlaces, Selenium (por defecto).
+    - "http": solo HTTP, nunca se arranca un navegador.
+    - "selenium": solo Selenium, como antes.
+"""
+
+import os
+import threading
+from urllib.parse import urljoin
+
+import requests
+from bs4 import BeautifulSoup
+
+MODO_DESCUBRIMIENTO = os.getenv("MODO_DESCUBRIMIENTO", "auto")
+MAX_DESCUBRIMIENTOS = int(os.getenv("MAX_DESCUBRIMIENTOS", 4))
+TIMEOUT_PAGINA = 20
+MODOS_VALIDOS = ("auto", "http", "selenium")
+
+
+def url_guias(basic_link):
+    """Devuelve la URL de la página de guías docentes de una titulación."""
+    return f"{basic_link}/informacion-basica/guias-docentes"
+
+
+def obtener_enlaces_guias_http(sesion, basic_link, timeout=TIMEOUT_PAGINA):
+    """
+    Obtiene los enlaces a las guías a partir del HTML estático de la página.
+
+    Los enlaces se resuelven a URLs absolutas igual que hace el navegador con el
+    atributo `href`, de forma que los registros resultantes son idénticos.
+
+    Args:
+        sesion (requests.Session): Sesión HTTP con la que se descarga la página.
+        basic_link (str): Enlace base de la titulación.
+        timeout (int): Segundos máximos de espera de la respuesta.
+
+    Returns:
+        list[str]: Los enlaces absolutos que contienen 'asignatura', en orden de aparición.
+
+    Raises:
+        requests.exceptions.RequestException: Si la página no se puede descargar.
+    """
+    response = sesion.get(url_guias(basic_link), timeout=timeout)
+    response.raise_for_status()
+    soup = BeautifulSoup(response.text, "lxml")
+
+    base = soup.find("base", href=True)
+    url_base = urljoin(response.url, base["href"]) if base else response.url
+    return [urljoin(url_base, enlace["href"]) for enlace in soup.select("a[href*=asignatura]")]
+
+
+class DescubridorGuias:
+    """
+    Obtiene los enlaces a las guías de cada titulación con HTTP y, si hace falta, con Selenium.
+
+    Uso:
+        with DescubridorGuias(sesion) as descubridor:
+            enlaces = descubridor.obtener_enlaces(basic_link)
+    """
+
+    def __init__(self, sesion=None, modo=MODO_DESCUBRIMIENTO, num_navegadores=None):
+        if modo not in MODOS_VALIDOS:
+            raise ValueError(f"Modo de descubrimiento no válido: {modo}")
+        self.modo = modo
+        self.num_navegadores = num_navegadores
+        self._sesion_propia = sesion is None
+        self.sesion = sesion or requests.Session()
+        self._pool = None
+        self._lock = threading.Lock()
+        self._lock_contadores = threading.Lock()
+        self.paginas_http = 0
+        self.paginas_selenium = 0
+
+    def _pool_navegadores(self):
+        """Crea el pool de navegadores la primera vez que se necesita."""
+        with self._lock:
+            if self._pool is None:
+                # Importación diferida: en modo HTTP no hace falta Selenium
+                from sostenibilidad.navegador import PoolNavegadores
+                if self.num_navegadores:
+                    self._pool = PoolNavegadores(self.num_navegadores)
+                else:
+                    self._pool = PoolNavegadores()
+            return self._pool
+
+    def obtener_enlaces(self, basic_link):
+        """
+        Devuelve los enlaces a las guías de una titulación.
+
+        Args:
+            basic_link (str): Enlace base de la titulación.
+
+        Returns:
+            list[str]: Los enlaces absolutos a las asignaturas.
+        """
+        if self.modo != "selenium":
+            try:
+                enlaces = obtener_enlaces_guias_http(self.sesion, basic_link)
+            except requests.exceptions.RequestException as e:
+                print(f"Error al obtener {url_guias(basic_link)}: {e}")
+                enlaces = []
+            if enlaces or self.modo == "http":
+                with self._lock_contadores:
+                    self.paginas_http += 1
+                return enlaces
+            print(f"Sin enlaces en el HTML estático de {basic_link}, se usa el navegador.")
+
+        with self._lock_contadores:
+            self.paginas_selenium += 1
+        return self._pool_navegadores().obtener_enlaces_guias(basic_link)
+
+    def cerrar(self):
+        """Cierra el pool de navegadores (si se llegó a crear) y la sesión propia."""
+        if self._pool is not None:
+            self._pool.cerrar()
+            self._pool = None
+        if self._sesion_propia:
+            self.sesion.close()
+        print(f"Páginas de guías obtenidas: {self.paginas_http} por HTTP, {self.paginas_selenium} con navegador.")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.cerrar()
@@ -6,12 +6,33 @@ import os
 # Definir la ruta absoluta a la carpeta 'data' dentro de 'src/sostenibilidad'
 ruta_data = os.path.join("sostenibilidad", "data")
 
-# Crear la carpeta "data" dentro de "sostenibilidad" si no existe
-if not os.path.exists(ruta_data):
-    os.makedirs(ruta_data)
-    print(f"Carpeta 'data' creada en: {ruta_data}")
-else:
-    print(f"Carpeta 'data' ya existe en: {ruta_data}")
+# Páginas de la UBU con los enlaces a las titulaciones y filtros que se aplican a sus enlaces
+FUENTES = {
+    'grado': {
+        "host": "www.ubu.es",
+        "path": "/grados-ordenados-por-ramas-de-conocimiento",
+        "filtro_incluir": ["grado"],
+        "filtro_excluir": ["grados", "acceso-admision", "mailto", "decreto", "servicio-de"],
+        "archivo_salida": "enlaces_filtrados_grados_ubu.xlsx",
+    },
+    'master': {
+        "host": "www.ubu.es",
+        "path": "/estudios/oferta-de-estudios/masteres-universitarios-oficiales",
+        "filtro_incluir": ["master"],
+        "filtro_excluir": ["masteres", "mailto", "acceso-admision", "decreto", "servicio-de", "international-students"],
+        "archivo_salida": "enlaces_filtrados_masteres_ubu.xlsx",
+    },
+}
+
+def crear_carpeta_data():
+    """
+    Crea la carpeta "data" dentro de "sostenibilidad" si no existe.
+    """
+    if not os.path.exists(ruta_data):
+        os.makedirs(ruta_data)
+        print(f"Carpeta 'data' creada en: {ruta_data}")
+    else:
+        print(f"Carpeta 'data' ya existe en: {ruta_data}")
 
 def obtener_html(host, path):
     """
@@ -35,24 +56,20 @@ def obtener_html(host, path):
     else:
         raise Exception(f"Error al obtener la página: {response.status}")
 
-def procesar_enlaces(host, path, filtro_incluir, filtro_excluir, archivo_salida):
+def obtener_enlaces(host, path, filtro_incluir, filtro_excluir):
     """
-    Extrae enlaces de una URL dada, los filtra basándose en criterios de inclusión y exclusión,
-    convierte los enlaces relativos a absolutos y guarda los resultados en un archivo Excel.
+    Extrae los enlaces de una URL dada, los filtra basándose en criterios de inclusión
+    y exclusión y convierte los enlaces relativos a absolutos.
 
     Args:
         host (str): El nombre de host del sitio web.
         path (str): La ruta a la página específica.
         filtro_incluir (list[str]): Una lista de cadenas; los enlaces deben contener al menos una de ellas.
         filtro_excluir (list[str]): Una lista de cadenas; los enlaces no deben contener ninguna de ellas.
-        archivo_salida (str): El nombre del archivo Excel de salida (ej. "enlaces_filtrados_grados_ubu.xlsx").
-                              Este archivo se guardará en el directorio 'data'.
+
+    Returns:
+        list[str]: Los enlaces absolutos filtrados, en orden de aparición.
     """
-    # Verificar si la carpeta de salida existe antes de intentar guardar el archivo
-    if not os.path.exists(ruta_data):
-        print(f"Error: La carpeta de salida no existe: {ruta_data}")
-        return
-    
     # Obtener el HTML
     html = obtener_html(host, path)
     
@@ -67,12 +84,19 @@ def procesar_enlaces(host, path, filtro_incluir, filtro_excluir, archivo_salida)
     ]
     
     # Convertir enlaces relativos a absolutos
-    enlaces_absolutos = [
+    return [
         enlace if enlace.startswith("http") else f"https://{host}{enlace}"
         for enlace in enlaces_filtrados
     ]
-    
-    # Guardar los enlaces en un archivo Excel dentro de la carpeta "data"
+
+def guardar_enlaces(enlaces_absolutos, archivo_salida):
+    """
+    Guarda los enlaces en un archivo Excel dentro de la carpeta "data".
+
+    Args:
+        enlaces_absolutos (list[str]): Los enlaces a guardar.
+        archivo_salida (str): El nombre del archivo Excel de salida.
+    """
     archivo_completo = os.path.join(ruta_data, archivo_salida)
     try:
         df = pd.DataFrame(enlaces_absolutos, columns=["link"])
@@ -81,18 +105,57 @@ def procesar_enlaces(host, path, filtro_incluir, filtro_excluir, archivo_salida)
     except Exception as e:
         print(f"Error al guardar el archivo Excel: {e}")
 
-# Procesar los enlaces de los grados
-host_grados = "www.ubu.es"
-path_grados = "/grados-ordenados-por-ramas-de-conocimiento"
-filtro_incluir_grados = ["grado"]
-filtro_excluir_grados = ["grados", "acceso-admision", "mailto", "decreto", "servicio-de"]
-archivo_salida_grados = "enlaces_filtrados_grados_ubu.xlsx"
-procesar_enlaces(host_grados, path_grados, filtro_incluir_grados, filtro_excluir_grados, archivo_salida_grados)
-
-# Procesar los enlaces de los másteres
-host_masteres = "www.ubu.es"
-path_masteres = "/estudios/oferta-de-estudios/masteres-universitarios-oficiales"
-filtro_incluir_masteres = ["master"]
-filtro_excluir_masteres = ["masteres", "mailto", "acceso-admision", "decreto", "servicio-de", "international-students"]
-archivo_salida_masteres = "enlaces_filtrados_masteres_ubu.xlsx"
-procesar_enlaces(host_masteres, path_masteres, filtro_incluir_masteres, filtro_excluir_masteres, archivo_salida_masteres)
+def procesar_enlaces(host, path, filtro_incluir, filtro_excluir, archivo_salida):
+    """
+    Extrae enlaces de una URL dada, los filtra basándose en criterios de inclusión y exclusión,
+    convierte los enlaces relativos a absolutos y guarda los resultados en un archivo Excel.
+
+    Args:
+        host (str): El nombre de host del sitio web.
+        path (str): La ruta a la página específica.
+        filtro_incluir (list[str]): Una lista de cadenas; los enlaces deben contener al menos una de ellas.
+        filtro_excluir (list[str]): Una lista de cadenas; los enlaces no deben contener ninguna de ellas.
+        archivo_salida (str): El nombre del archivo Excel de salida (ej. "enlaces_filtrados_grados_ubu.xlsx").
+                              Este archivo se guardará en el directorio 'data'.
+    """
+    # Verificar si la carpeta de salida existe antes de intentar guardar el archivo
+    if not os.path.exists(ruta_data):
+        print(f"Error: La carpeta de salida no existe: {ruta_data}")
+        return
+
+    guardar_enlaces(obtener_enlaces(host, path, filtro_incluir, filtro_excluir), archivo_salida)
+
+def obtener_titulaciones(tipo_estudio):
+    """
+    Genera los enlaces de las titulaciones de un tipo de estudio sin pasar por Excel.
+
+    Los enlaces de cada página se entregan en cuanto se descarga, de modo que las
+    etapas siguientes pueden empezar con los grados mientras se piden los másteres.
+
+    Args:
+        tipo_estudio (str): El tipo de estudio ('master', 'grado', 'ambos').
+
+    Yields:
+        tuple[str, str]: Pares (enlace, tipo_programa); con 'ambos' primero
+                         los grados y después los másteres.
+
+    Raises:
+        ValueError: Si el tipo de estudio no es válido.
+    """
+    tipos = {'grado': ['grado'], 'master': ['master'], 'ambos': ['grado', 'master']}.get(tipo_estudio)
+    if not tipos:
+        raise ValueError("Tipo de estudio no válido.")
+
+    for tipo in tipos:
+        fuente = FUENTES[tipo]
+        enlaces = obtener_enlaces(fuente["host"], fuente["path"], fuente["filtro_incluir"], fuente["filtro_excluir"])
+        for enlace in enlaces:
+            yield enlace, tipo
+
+if __name__ == "__main__":
+    crear_carpeta_data()
+
+    # Procesar los enlaces de los grados y de los másteres
+    for fuente in FUENTES.values():
+        procesar_enlaces(fuente["host"], fuente["path"], fuente["filtro_incluir"],
+                         fuente["filtro_excluir"], fuente["archivo_salida"])
@@ -1,17 +1,21 @@
 import os
 import sys
 import pandas as pd
-import requests
-from bs4 import BeautifulSoup
-from sqlalchemy.exc import IntegrityError
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
 import time
+from sqlalchemy import insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from concurrent.futures import ThreadPoolExecutor
 
 # Configure the root directory of the project for imports
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from app import app, Busqueda, db  
+from persistencia import Busqueda, contexto_bd, db
+from sostenibilidad.descargas import DescargadorGuias, MAX_DESCARGAS, MAX_DESCARGAS_POR_HOST, NOMBRE_MANIFIESTO
+from sostenibilidad.descubrimiento import DescubridorGuias, MODO_DESCUBRIMIENTO, MAX_DESCUBRIMIENTOS
+
+# Rows sent per executemany batch when saving the subjects
+TAMANO_LOTE_BD = 500
 
 def get_excel_data(file_path, program_type=None):
     """Reads the Excel file and adds the program type."""
@@ -20,95 +24,123 @@ def get_excel_data(file_path, program_type=None):
         data['tipo_programa'] = program_type
     return data
 
-def setup_chrome_driver():
-    """Sets up and returns a headless Chrome WebDriver."""
-    chrome_options = Options()
-    chrome_options.add_argument("--headless")
-    chrome_options.add_argument("--disable-gpu")
-    chrome_options.add_argument("--no-sandbox")
-    return webdriver.Chrome(options=chrome_options)
-
-def download_file(url, file_path):
-    """Downloads a file from the given URL and saves it to the specified file path."""
-    try:
-        response = requests.get(url)
-        response.raise_for_status()
-        with open(file_path, "wb") as f:
-            f.write(response.content)
-        print(f"Guía descargada: {file_path}")
-    except requests.exceptions.RequestException as e:
-        print(f"Error al descargar el archivo: {e}")
-
-def process_program_data(degrees, anho, tipo_estudio, ruta_data, ruta_guias):
-    """Processes data for each program and stores the results."""
+def process_program_data(degrees, anho, tipo_estudio, ruta_data, ruta_guias,
+                         max_descargas=MAX_DESCARGAS, max_por_host=MAX_DESCARGAS_POR_HOST,
+                         modo_descubrimiento=MODO_DESCUBRIMIENTO, max_descubrimientos=MAX_DESCUBRIMIENTOS):
+    """
+    Processes data for each program and stores the results.
+
+    The program pages are fetched with plain HTTP (falling back to a pool of
+    headless browsers only when the static HTML has no links, see
+    `DescubridorGuias`) and the guides are downloaded concurrently by a
+    `DescargadorGuias` while the remaining degrees are still being crawled.
+    Guides already on disk are requested conditionally using the download
+    manifest kept in `ruta_guias`.
+    """
     subject_data = []
-    for i, degree in degrees.iterrows():
-        basic_link = str(degree[0])
-        modalidad = "online" if "online" in basic_link else "presencial"
-        driver = setup_chrome_driver()
-        url = f"{basic_link}/informacion-basica/guias-docentes"
-        driver.get(url)
-
-        # Allow page to load
-        time.sleep(5)
-
-        # Find all links to the guides
-        enlaces = driver.find_elements(By.XPATH, "//a[contains(@href, 'asignatura')]")
-        for enlace in enlaces:
-            url_asignatura = enlace.get_attribute('href')
-            print(f"Enlace encontrado: {url_asignatura}")
-            anho2 = anho.split('-')[0]
-            url_descarga = f"https://ubuvirtual.ubu.es/mod/guiadocente/get_guiadocente.php?asignatura={url_asignatura.split('asignatura=')[-1].split('&')[0]}&cursoacademico={anho2}"
-
-            # Define the file name and path
-            codigo_asignatura = url_asignatura.split("asignatura=")[-1].split("&")[0]
-            nombre_archivo = f"{codigo_asignatura}_{modalidad}.pdf"
-            ruta_archivo = os.path.join(ruta_guias, nombre_archivo)
-
-            # Download the file
-            download_file(url_descarga, ruta_archivo)
-
-            subject_data.append({
-                "basic_link": basic_link,
-                "codigo_asignatura": codigo_asignatura,
-                "modalidad": modalidad,
-                "nombre_archivo": nombre_archivo,
-                "tipo_programa": degree.get('tipo_programa', tipo_estudio)  # <- Aquí está la magia
-
-                
-            })
-        
-        driver.quit()
+    # A guide listed under several degrees is downloaded only once, as in pipeline.py:
+    # two workers writing the same file at the same time would clash
+    guias_enviadas = set()
+    ruta_manifiesto = os.path.join(ruta_guias, NOMBRE_MANIFIESTO)
+    with DescargadorGuias(ruta_manifiesto, max_descargas=max_descargas, max_por_host=max_por_host) as descargador, \
+            DescubridorGuias(descargador.sesion, modo=modo_descubrimiento) as descubridor, \
+            ThreadPoolExecutor(max_workers=max_descubrimientos) as executor:
+        basic_links = [str(degree[0]) for _, degree in degrees.iterrows()]
+        # map() keeps the order of the degrees, so subject_data is built in the same order as before
+        enlaces_por_grado = executor.map(descubridor.obtener_enlaces, basic_links)
+        for (_, degree), basic_link, enlaces in zip(degrees.iterrows(), basic_links, enlaces_por_grado):
+            tipo_programa = degree.get('tipo_programa', tipo_estudio)  # <- Aquí está la magia
+            for url_descarga, data in build_subject_records(basic_link, tipo_programa, enlaces, anho):
+                # Queue the download
+                if data["nombre_archivo"] not in guias_enviadas:
+                    guias_enviadas.add(data["nombre_archivo"])
+                    descargador.enviar(url_descarga, os.path.join(ruta_guias, data["nombre_archivo"]))
+                subject_data.append(data)
 
     return subject_data
 
-def save_to_database(subject_data, anho, degrees, tipo_estudio):
-    """Saves the subject data to the database if not already present."""
-    for data in subject_data:
+def build_subject_records(basic_link, tipo_programa, enlaces, anho):
+    """Builds the (download URL, subject record) pairs from the guide links of a program."""
+    modalidad = "online" if "online" in basic_link else "presencial"
+    anho2 = anho.split('-')[0]
+    registros = []
+    for url_asignatura in enlaces:
+        print(f"Enlace encontrado: {url_asignatura}")
+        codigo_asignatura = url_asignatura.split("asignatura=")[-1].split("&")[0]
+        url_descarga = f"https://ubuvirtual.ubu.es/mod/guiadocente/get_guiadocente.php?asignatura={codigo_asignatura}&cursoacademico={anho2}"
+
+        # Define the file name
+        nombre_archivo = f"{codigo_asignatura}_{modalidad}.pdf"
+
+        registros.append((url_descarga, {
+            "basic_link": basic_link,
+            "codigo_asignatura": codigo_asignatura,
+            "modalidad": modalidad,
+            "nombre_archivo": nombre_archivo,
+            "tipo_programa": tipo_programa
+        }))
+    return registros
+
+def save_to_database(subject_data, anho, degrees, tipo_estudio, tamano_lote=TAMANO_LOTE_BD):
+    """
+    Saves the subject data to the database if not already present.
+
+    The existing (codigo_asignatura, modalidad) keys of the year are loaded with a
+    single query and only the new rows are inserted, in batched executemany
+    statements (INSERT ... ON CONFLICT DO NOTHING where the database supports it)
+    inside a single transaction.
+
+    Returns:
+        dict: Number of rows inserted and skipped, and the elapsed time in seconds.
+    """
+    inicio = time.perf_counter()
+    with contexto_bd():
+        existentes = {
+            tuple(fila)
+            for fila in db.session.query(Busqueda.codigo_asignatura, Busqueda.modalidad).filter_by(anho=anho)
+        }
+
+        nuevos = []
+        for data in subject_data:
+            clave = (data['codigo_asignatura'], data['modalidad'])
+            if clave in existentes:
+                continue
+            existentes.add(clave)
+            nuevos.append({
+                "anho": anho,
+                "tipo_programa": data.get('tipo_programa', tipo_estudio),
+                "codigo_asignatura": data['codigo_asignatura'],
+                "nombre_archivo": data['nombre_archivo'],
+                "modalidad": data['modalidad'],
+            })
+
+        sentencia = build_insert_ignoring_duplicates()
         try:
-            with app.app_context():
-                registro_existente = Busqueda.query.filter_by(
-                    anho=anho,
-                    codigo_asignatura=data['codigo_asignatura'],
-                    modalidad=data['modalidad']
-                ).first()
-                
-                if not registro_existente:
-                    tipo_programa = data.get('tipo_programa', tipo_estudio)
-
-                    nuevo_registro = Busqueda(
-                        anho=anho,
-                        tipo_programa=tipo_programa,
-                        codigo_asignatura=data['codigo_asignatura'],
-                        nombre_archivo=data['nombre_archivo'],
-                        modalidad=data['modalidad']
-                    )
-                    db.session.add(nuevo_registro)
-                    db.session.commit()
-                else:
-                    print(f"El registro para {data['codigo_asignatura']} ({data['modalidad']}) ya existe, ignorado.")
-        except IntegrityError:
-            print(f"Error de integridad para {data['codigo_asignatura']} ({data['modalidad']}).")
+            for i in range(0, len(nuevos), tamano_lote):
+                db.session.execute(sentencia, nuevos[i:i + tamano_lote])
+            db.session.commit()
+        except IntegrityError as e:
+            db.session.rollback()
+            print(f"Error de integridad al guardar las asignaturas de {anho}: {e}")
+            nuevos = []
+
+    resumen = {
+        "insertados": len(nuevos),
+        "ignorados": len(subject_data) - len(nuevos),
+        "segundos": time.perf_counter() - inicio,
+    }
+    print(f"Base de datos: {resumen['insertados']} registros insertados, "
+          f"{resumen['ignorados']} ya existentes ignorados ({resumen['segundos']:.2f} s)")
+    return resumen
+
+def build_insert_ignoring_duplicates():
+    """Returns an INSERT for Busqueda that ignores unique-key conflicts when the dialect allows it."""
+    dialecto = db.session.get_bind(mapper=Busqueda.__mapper__).dialect.name
+    if dialecto == "postgresql":
+        return postgresql_insert(Busqueda).on_conflict_do_nothing()
+    if dialecto == "sqlite":
+        return sqlite_insert(Busqueda).on_conflict_do_nothing()
+    return insert(Busqueda)
 
 def save_to_excel(subject_data, ruta_data, tipo_estudio):
     """Saves the processed data to an Excel file."""
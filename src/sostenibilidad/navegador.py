@@ -0,0 +1,142 @@
+"""
+Pool de navegadores Chrome sin interfaz para recorrer las páginas de las titulaciones.
+
+Arrancar un navegador es la parte más lenta del descubrimiento de guías, por lo que
+el pool inicia N instancias una sola vez y las presta a los hilos de trabajo, que
+las devuelven al terminar cada titulación. En lugar de esperas fijas se usan
+esperas explícitas sobre el localizador de los enlaces a las guías.
+"""
+
+import os
+import queue
+import time
+from contextlib import contextmanager
+
+from selenium import webdriver
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+
+NUM_NAVEGADORES = int(os.getenv("NUM_NAVEGADORES", 2))
+TIMEOUT_ENLACES = 15
+# Segundos sin ningún enlace tras los que se da por hecho que la página no tiene guías
+ESPERA_SIN_ENLACES = 5
+XPATH_ENLACES_GUIAS = "//a[contains(@href, 'asignatura')]"
+
+
+def setup_chrome_driver():
+    """Sets up and returns a headless Chrome WebDriver."""
+    chrome_options = Options()
+    chrome_options.add_argument("--headless")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--no-sandbox")
+    return webdriver.Chrome(options=chrome_options)
+
+
+class _EnlacesEstables:
+    """
+    Condición de espera que se cumple cuando hay enlaces a guías y su número
+    no ha cambiado entre dos sondeos consecutivos (la página ha terminado de pintarlos),
+    o cuando la página sigue sin enlaces tras `espera_sin_enlaces` segundos. Los
+    enlaces encontrados quedan en `enlaces`.
+    """
+
+    def __init__(self, espera_sin_enlaces=ESPERA_SIN_ENLACES):
+        self.espera_sin_enlaces = espera_sin_enlaces
+        self.enlaces = []
+        self._anterior = -1
+        self._inicio = time.monotonic()
+
+    def __call__(self, driver):
+        self.enlaces = driver.find_elements(By.XPATH, XPATH_ENLACES_GUIAS)
+        if not self.enlaces:
+            self._anterior = 0
+            return time.monotonic() - self._inicio >= self.espera_sin_enlaces
+        estables = len(self.enlaces) == self._anterior
+        self._anterior = len(self.enlaces)
+        return estables
+
+
+def obtener_enlaces_guias(driver, basic_link, timeout=TIMEOUT_ENLACES):
+    """
+    Abre la página de guías docentes de una titulación y devuelve los enlaces a las asignaturas.
+
+    Args:
+        driver (webdriver.Chrome): Navegador con el que se carga la página.
+        basic_link (str): Enlace base de la titulación.
+        timeout (int): Segundos máximos de espera a que aparezcan los enlaces.
+
+    Returns:
+        list[str]: Los atributos `href` de los enlaces encontrados, o una lista vacía
+                   si la página no tiene enlaces a guías.
+    """
+    driver.get(f"{basic_link}/informacion-basica/guias-docentes")
+    condicion = _EnlacesEstables()
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=0.5).until(condicion)
+    except TimeoutException:
+        print(f"No se encontraron guías en {basic_link}")
+        return []
+    if not condicion.enlaces:
+        print(f"No se encontraron guías en {basic_link}")
+        return []
+    return [enlace.get_attribute('href') for enlace in condicion.enlaces]
+
+
+class PoolNavegadores:
+    """
+    Conjunto fijo de navegadores reutilizables entre titulaciones.
+
+    Uso:
+        with PoolNavegadores(2) as pool:
+            enlaces = pool.obtener_enlaces_guias(basic_link)
+    """
+
+    def __init__(self, tamano=NUM_NAVEGADORES):
+        self.tamano = tamano
+        self._navegadores = []
+        self._libres = queue.Queue()
+        try:
+            for _ in range(tamano):
+                driver = setup_chrome_driver()
+                self._navegadores.append(driver)
+                self._libres.put(driver)
+        except Exception:
+            # Si un navegador no arranca, se cierran los que ya estaban abiertos
+            self.cerrar()
+            raise
+
+    @contextmanager
+    def navegador(self):
+        """Presta un navegador libre y lo devuelve al pool al terminar."""
+        driver = self._libres.get()
+        try:
+            yield driver
+        finally:
+            self._libres.put(driver)
+
+    def obtener_enlaces_guias(self, basic_link, timeout=TIMEOUT_ENLACES):
+        """Ejecuta `obtener_enlaces_guias` con un navegador del pool."""
+        with self.navegador() as driver:
+            try:
+                return obtener_enlaces_guias(driver, basic_link, timeout)
+            except WebDriverException as e:
+                print(f"Error del navegador en {basic_link}: {e}")
+                return []
+
+    def cerrar(self):
+        """Cierra todos los navegadores del pool."""
+        for driver in self._navegadores:
+            try:
+                driver.quit()
+            except WebDriverException as e:
+                # Se siguen cerrando los demás
+                print(f"Error al cerrar un navegador: {e}")
+        self._navegadores = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.cerrar()
@@ -0,0 +1,237 @@
+"""
+Pipeline en streaming para obtener y procesar las guías docentes de un curso académico.
+
+Sustituye a la ejecución encadenada de `grados.py`, `guias_docentes.py` y
+`procesadoAsignaturas.py`, que se comunicaban mediante ficheros Excel y debían
+esperar a que terminase la etapa anterior. Aquí las cuatro etapas se ejecutan a
+la vez en el mismo proceso y se comunican mediante colas acotadas:
+
+    titulaciones -> descubrimiento de guías -> descarga del PDF -> extracción del PDF
+
+Si se ejecuta como trabajo de la aplicación, notifica el progreso de cada etapa
+(titulaciones recorridas, guías descargadas y PDFs procesados) con `Progreso`.
+
+De este modo la extracción de las primeras guías empieza mientras todavía se
+están recorriendo las titulaciones siguientes. Los ficheros Excel intermedios se
+siguen generando como exportaciones opcionales para los informes que los leen.
+
+Uso:
+    python pipeline.py <anho> <tipo_estudio> [--sin-excel]
+"""
+
+import os
+import queue
+import sys
+import threading
+import time
+
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from sostenibilidad.grados import FUENTES, crear_carpeta_data, guardar_enlaces, obtener_titulaciones
+from sostenibilidad.guias_docentes import build_subject_records, save_to_database, save_to_excel
+from sostenibilidad.procesadoAsignaturas import (
+    crear_pool_procesos, guardar_excel, procesar_tarea, MAX_PROCESOS_PDF, COLUMNAS_EXTRAIDAS,
+)
+from sostenibilidad.descargas import (
+    LimitadorPorHost, ManifiestoGuias, crear_sesion, descargar_guia, resumir_descargas,
+    MAX_DESCARGAS, MAX_DESCARGAS_POR_HOST, NOMBRE_MANIFIESTO,
+)
+from sostenibilidad.descubrimiento import DescubridorGuias, MAX_DESCUBRIMIENTOS, MODO_DESCUBRIMIENTO
+from progreso import Progreso
+
+# Tamaño máximo de cada cola entre etapas
+TAMANO_COLA = 200
+# Peso de cada fase en el progreso del trabajo
+FASES_PROGRESO = {"titulaciones": 0.2, "descarga": 0.4, "extraccion": 0.4}
+
+# Marca de fin que recibe cada hilo de una etapa cuando la anterior ha terminado
+_FIN = object()
+
+
+def _lanzar_etapa(nombre, trabajo, num_hilos, entrada):
+    """
+    Arranca los hilos de una etapa. Cada hilo consume elementos de `entrada`
+    y aplica `trabajo` sobre ellos hasta recibir la marca de fin.
+
+    Returns:
+        list[threading.Thread]: Los hilos arrancados.
+    """
+    def bucle():
+        while True:
+            elemento = entrada.get()
+            if elemento is _FIN:
+                return
+            try:
+                trabajo(elemento)
+            except Exception as e:
+                print(f"Error en la etapa de {nombre}: {e}")
+
+    hilos = [threading.Thread(target=bucle, name=f"{nombre}-{i}", daemon=True) for i in range(num_hilos)]
+    for hilo in hilos:
+        hilo.start()
+    return hilos
+
+
+def _cerrar_etapa(hilos, salida=None, hilos_siguientes=0):
+    """Espera a que terminen los hilos de una etapa y envía la marca de fin a la siguiente."""
+    for hilo in hilos:
+        hilo.join()
+    for _ in range(hilos_siguientes):
+        salida.put(_FIN)
+
+
+def ejecutar_pipeline(anho, tipo_estudio, exportar_excel=True,
+                      max_descubrimientos=MAX_DESCUBRIMIENTOS, max_descargas=MAX_DESCARGAS,
+                      max_por_host=MAX_DESCARGAS_POR_HOST, max_procesos=MAX_PROCESOS_PDF,
+                      modo_descubrimiento=MODO_DESCUBRIMIENTO, progreso=None):
+    """
+    Obtiene, descarga y procesa las guías docentes de un curso académico.
+
+    Args:
+        anho (str): El año académico (ej. "2023-2024").
+        tipo_estudio (str): El tipo de estudio ('master', 'grado', 'ambos').
+        exportar_excel (bool): Si se generan también los ficheros Excel intermedios.
+        max_descubrimientos (int): Hilos que obtienen los enlaces a las guías.
+        max_descargas (int): Hilos de descarga de PDFs.
+        max_por_host (int): Descargas simultáneas máximas contra un mismo servidor.
+        max_procesos (int): Procesos que extraen la información de los PDFs.
+        modo_descubrimiento (str): Modo de `DescubridorGuias` ('auto', 'http', 'selenium').
+        progreso (Progreso | None): Notificador del progreso; por defecto, el del trabajo
+            indicado en el entorno (inactivo si el script se ejecuta a mano).
+
+    Returns:
+        pd.DataFrame: Las asignaturas con la información extraída de sus guías.
+    """
+    inicio = time.perf_counter()
+    if progreso is None:
+        # El 10 % inicial y el 90 % final los marca la aplicación
+        progreso = Progreso.desde_entorno(FASES_PROGRESO, inicio=10, fin=90)
+    crear_carpeta_data()
+    ruta_data = os.path.join("sostenibilidad", "data")
+    ruta_guias = os.path.join(ruta_data, "guias")
+    os.makedirs(ruta_guias, exist_ok=True)
+
+    cola_titulaciones = queue.Queue(TAMANO_COLA)
+    cola_descargas = queue.Queue(TAMANO_COLA)
+    cola_extraccion = queue.Queue(TAMANO_COLA)
+
+    titulaciones = {}
+    registros = {}
+    info_guias = {}
+    resultados_descarga = []
+    guias_vistas = set()
+    aciertos_cache = {True: 0, False: 0}
+    lock = threading.Lock()
+
+    sesion = crear_sesion(max_descargas)
+    limitador = LimitadorPorHost(max_por_host)
+    manifiesto = ManifiestoGuias(os.path.join(ruta_guias, NOMBRE_MANIFIESTO))
+    descubridor = DescubridorGuias(sesion, modo=modo_descubrimiento)
+    # La extracción es intensiva en CPU: los hilos de la etapa solo alimentan un pool de procesos
+    procesos = crear_pool_procesos(max_procesos)
+
+    def descubrir(titulacion):
+        orden, basic_link, tipo_programa = titulacion
+        enlaces = descubridor.obtener_enlaces(basic_link)
+        for posicion, (url_descarga, data) in enumerate(build_subject_records(basic_link, tipo_programa, enlaces, anho)):
+            with lock:
+                registros[(orden, posicion)] = data
+                # Una misma guía puede aparecer en varias titulaciones: se descarga una sola vez
+                nueva = data["nombre_archivo"] not in guias_vistas
+                guias_vistas.add(data["nombre_archivo"])
+            if nueva:
+                progreso.sumar_total("descarga")
+                cola_descargas.put((url_descarga, data["nombre_archivo"]))
+        progreso.avanzar("titulaciones")
+
+    def descargar(guia):
+        url_descarga, nombre_archivo = guia
+        resultado = descargar_guia(sesion, url_descarga, os.path.join(ruta_guias, nombre_archivo), limitador, manifiesto)
+        with lock:
+            resultados_descarga.append(resultado)
+        if resultado["ok"]:
+            progreso.sumar_total("extraccion")
+            cola_extraccion.put(nombre_archivo)
+        progreso.avanzar("descarga")
+
+    def extraer(nombre_archivo):
+        info, error, acierto = procesos.submit(procesar_tarea, (nombre_archivo, nombre_archivo, ruta_guias)).result()
+        with lock:
+            aciertos_cache[acierto] += 1
+            if not error:
+                info_guias[nombre_archivo] = info
+        if error:
+            print(error)
+        progreso.avanzar("extraccion")
+
+    hilos_descubrimiento = _lanzar_etapa("descubrimiento", descubrir, max_descubrimientos, cola_titulaciones)
+    hilos_descarga = _lanzar_etapa("descarga", descargar, max_descargas, cola_descargas)
+    hilos_extraccion = _lanzar_etapa("extracción", extraer, max_procesos, cola_extraccion)
+
+    try:
+        # Etapa 1: las titulaciones se publican según se obtiene cada página
+        for orden, (basic_link, tipo_programa) in enumerate(obtener_titulaciones(tipo_estudio)):
+            titulaciones[orden] = (basic_link, tipo_programa)
+            progreso.sumar_total("titulaciones")
+            cola_titulaciones.put((orden, basic_link, tipo_programa))
+    finally:
+        for _ in range(max_descubrimientos):
+            cola_titulaciones.put(_FIN)
+        _cerrar_etapa(hilos_descubrimiento, cola_descargas, max_descargas)
+        _cerrar_etapa(hilos_descarga, cola_extraccion, max_procesos)
+        _cerrar_etapa(hilos_extraccion)
+        procesos.shutdown()
+        descubridor.cerrar()
+        sesion.close()
+        manifiesto.guardar()
+        progreso.guardar(forzar=True)
+
+    resumir_descargas(resultados_descarga, time.perf_counter() - inicio)
+    print(f"Caché de texto: {aciertos_cache[True]} aciertos, {aciertos_cache[False]} PDFs analizados")
+
+    # Se restablece el orden original (titulación, posición del enlace)
+    subject_data = [registros[clave] for clave in sorted(registros)]
+    save_to_database(subject_data, anho, None, tipo_estudio)
+
+    asignaturas = pd.DataFrame(subject_data)
+    sin_info = (None,) * len(COLUMNAS_EXTRAIDAS)
+    asignaturas[COLUMNAS_EXTRAIDAS] = pd.DataFrame(
+        [info_guias.get(data["nombre_archivo"], sin_info) for data in subject_data],
+        index=asignaturas.index, columns=COLUMNAS_EXTRAIDAS
+    ).astype(object)
+
+    if exportar_excel:
+        exportar_excels(titulaciones, subject_data, asignaturas, tipo_estudio, ruta_data)
+
+    print(f"Pipeline completado: {len(titulaciones)} titulaciones, {len(subject_data)} asignaturas, "
+          f"{len(info_guias)} guías procesadas en {time.perf_counter() - inicio:.1f} s")
+    return asignaturas
+
+
+def exportar_excels(titulaciones, subject_data, asignaturas, tipo_estudio, ruta_data):
+    """
+    Genera los mismos ficheros Excel que producían los tres scripts por separado.
+
+    Args:
+        titulaciones (dict[int, tuple[str, str]]): Enlace y tipo de cada titulación, por orden.
+        subject_data (list[dict]): Los registros de asignaturas.
+        asignaturas (pd.DataFrame): Las asignaturas con la información extraída.
+        tipo_estudio (str): El tipo de estudio ('master', 'grado', 'ambos').
+        ruta_data (str): La ruta al directorio de datos.
+    """
+    for tipo, fuente in FUENTES.items():
+        enlaces = [link for link, tipo_programa in titulaciones.values() if tipo_programa == tipo]
+        if enlaces:
+            guardar_enlaces(enlaces, fuente["archivo_salida"])
+    save_to_excel(subject_data, ruta_data, tipo_estudio)
+    guardar_excel(asignaturas, tipo_estudio, ruta_data)
+
+
+if __name__ == "__main__":
+    argumentos = [arg for arg in sys.argv[1:] if arg != "--sin-excel"]
+    if len(argumentos) != 2:
+        print("Uso correcto: python pipeline.py <anho> <tipo_estudio> [--sin-excel]")
+        sys.exit(1)
+
+    ejecutar_pipeline(argumentos[0], argumentos[1], exportar_excel="--sin-excel" not in sys.argv)
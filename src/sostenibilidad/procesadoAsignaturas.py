@@ -2,11 +2,23 @@
 import pandas as pd
 import os
 import sys
-import re
+import multiprocessing
+from contextlib import closing
+from concurrent.futures import ProcessPoolExecutor
 from PyPDF2 import PdfReader
 
 # Agregar el directorio raíz de tu proyecto al sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from sostenibilidad.cache_texto import hash_archivo, obtener_cache
+from sostenibilidad.cabecera_guia import extraer_cabecera
+
+# Número de procesos de extracción (por defecto, uno por núcleo)
+MAX_PROCESOS_PDF = int(os.getenv("MAX_PROCESOS_PDF", 0)) or os.cpu_count() or 1
+
+# Páginas iniciales cuyo texto se conserva (las que envía API.py al modelo)
+PAGINAS_CON_TEXTO = 2
+
+COLUMNAS_EXTRAIDAS = ["titulacion", "denominacion", "codigo", "pagina_con_asteriscos"]
 
 def obtener_ruta_excel(tipo_estudio, ruta_data):
     """
@@ -39,6 +51,103 @@ def obtener_ruta_excel(tipo_estudio, ruta_data):
     
     return ruta_excel
 
+def iterar_paginas(ruta_pdf):
+    """
+    Genera de forma perezosa el texto de cada página de un archivo PDF.
+
+    PyPDF2 solo analiza una página cuando se accede a ella, así que quien consume
+    el iterador decide cuánto texto conserva y puede dejar de leer en cualquier momento.
+
+    Args:
+        ruta_pdf (str): La ruta completa al archivo PDF.
+
+    Yields:
+        str: El texto de cada página, en orden (cadena vacía si la página no tiene texto).
+    """
+    with open(ruta_pdf, "rb") as file:
+        reader = PdfReader(file)
+        for page in reader.pages:
+            yield page.extract_text() or ""
+
+def leer_paginas(ruta_pdf):
+    """
+    Extrae con PyPDF2 el texto de todas las páginas de un archivo PDF.
+
+    Args:
+        ruta_pdf (str): La ruta completa al archivo PDF.
+
+    Returns:
+        list[str]: El texto de cada página, en orden (cadena vacía si la página no tiene texto).
+    """
+    return list(iterar_paginas(ruta_pdf))
+
+def analizar_guia(ruta_pdf, contar_asteriscos=True, paginas_con_texto=PAGINAS_CON_TEXTO):
+    """
+    Recorre las páginas de una guía una sola vez sin retener su texto.
+
+    Solo se conserva el texto de las `paginas_con_texto` primeras páginas (las que
+    usa `API.py`) y el de la primera página con texto, de la que sale la cabecera.
+    Del resto solo se comprueba si contienen asteriscos. Si no se necesita la página
+    con asteriscos, la lectura se detiene en cuanto se tienen esas primeras páginas.
+
+    Args:
+        ruta_pdf (str): La ruta completa al archivo PDF.
+        contar_asteriscos (bool): Si se busca la última página con asteriscos, lo que
+            obliga a recorrer el PDF entero.
+        paginas_con_texto (int): Número de páginas iniciales cuyo texto se devuelve.
+
+    Returns:
+        tuple[list[str], tuple | None]: El texto de cada página leída (cadena vacía salvo en
+            las primeras páginas y en la primera con texto) y la información de
+            `extraer_info_pdf` (None si el PDF no tiene texto; la página con asteriscos
+            es None si `contar_asteriscos` es False).
+    """
+    paginas = []
+    primera_pagina = None
+    num_con_texto = 0
+    pagina_con_asteriscos = None
+
+    with closing(iterar_paginas(ruta_pdf)) as iterador:
+        for num, texto in enumerate(iterador):
+            paginas.append(texto if num < paginas_con_texto or primera_pagina is None else "")
+            if texto:
+                # La numeración cuenta solo las páginas con texto, como en `extraer_info_pdf`
+                num_con_texto += 1
+                if primera_pagina is None:
+                    primera_pagina = texto
+                if "*" in texto:
+                    pagina_con_asteriscos = num_con_texto
+            if not contar_asteriscos and primera_pagina is not None and num + 1 >= paginas_con_texto:
+                break
+
+    if primera_pagina is None:
+        return paginas, None
+    return paginas, (*extraer_cabecera(primera_pagina), pagina_con_asteriscos if contar_asteriscos else None)
+
+def leer_guia(ruta_pdf):
+    """
+    Obtiene el texto de las primeras páginas y la información de cabecera de una guía,
+    usando la caché de texto extraído para analizar cada PDF una sola vez.
+
+    Args:
+        ruta_pdf (str): La ruta completa al archivo PDF.
+
+    Returns:
+        tuple[list[str], tuple | None]: El texto de cada página (ver `analizar_guia`:
+            solo se conserva el de las `PAGINAS_CON_TEXTO` primeras) y la información
+            devuelta por `extraer_info_pdf` (None si el PDF no tiene texto).
+    """
+    cache = obtener_cache()
+    sha256 = hash_archivo(ruta_pdf)
+    guardado = cache.obtener(sha256)
+    if guardado:
+        paginas, info = guardado
+        return paginas, (info if any(paginas) else None)
+
+    paginas, info = analizar_guia(ruta_pdf)
+    cache.guardar(sha256, paginas, info or (None,) * len(COLUMNAS_EXTRAIDAS))
+    return paginas, info
+
 def leer_pdf(ruta_pdf):
     """
     Lee el texto de cada página de un archivo PDF.
@@ -50,9 +159,7 @@ def leer_pdf(ruta_pdf):
         list[str]: Una lista de strings, donde cada string es el texto extraído
                    de una página del PDF. Las páginas sin texto son omitidas.
     """
-    with open(ruta_pdf, "rb") as file:
-        reader = PdfReader(file)
-        return [page.extract_text() for page in reader.pages if page.extract_text()]
+    return [texto for texto in iterar_paginas(ruta_pdf) if texto]
 
 def extraer_info_pdf(pdf_text):
     """
@@ -71,16 +178,7 @@ def extraer_info_pdf(pdf_text):
             - pagina_con_asteriscos (int | None): El número de la primera página que contiene
                                                  al menos un asterisco, o None si ninguna página lo contiene.
     """
-    def extraer_patron(patron):
-        """
-        Función auxiliar para buscar un patrón regex en el texto de la primera página.
-        """
-        match = re.search(patron, pdf_text[0])
-        return match.group().strip() if match else None
-
-    denominacion = extraer_patron(r"(?<=1. Denominación de la asignatura:\n).*")
-    titulacion = extraer_patron(r"(?<=Titulación\n).*")
-    codigo = extraer_patron(r"(?<=Código\n).*")
+    titulacion, denominacion, codigo = extraer_cabecera(pdf_text[0])
 
     asteriscos = [text.count("*") for text in pdf_text if text]
     pagina_con_asteriscos = max((i + 1 for i, count in enumerate(asteriscos) if count > 0), default=None)
@@ -117,11 +215,86 @@ def procesar_fila(index, row, ruta_guias):
     if not os.path.exists(ruta_pdf):
         raise FileNotFoundError(f"El archivo {ruta_pdf} no existe.")
 
-    pdf_text = leer_pdf(ruta_pdf)
-    if not pdf_text:
+    return extraer_info_guia(ruta_pdf)
+
+def extraer_info_guia(ruta_pdf):
+    """
+    Lee un PDF de guía docente y extrae su información.
+
+    Args:
+        ruta_pdf (str): La ruta completa al archivo PDF.
+
+    Returns:
+        tuple[str | None, str | None, str | None, int | None]: Titulación, denominación,
+            código y página con asteriscos (ver `extraer_info_pdf`).
+
+    Raises:
+        ValueError: Si no se pudo extraer texto del PDF.
+    """
+    _, info = leer_guia(ruta_pdf)
+    if info is None:
         raise ValueError(f"No se pudo extraer texto del PDF: {ruta_pdf}")
 
-    return extraer_info_pdf(pdf_text)
+    return info
+
+def procesar_tarea(tarea):
+    """
+    Procesa una fila dentro de un proceso del pool sin propagar excepciones,
+    para que un PDF erróneo no detenga el resto del lote.
+
+    Args:
+        tarea (tuple[int, str, str]): Índice de la fila, nombre del PDF y ruta de las guías.
+
+    Returns:
+        tuple[tuple, str | None, bool]: La información extraída (o cuatro None), el mensaje
+            de error, si lo hubo, y si el PDF se encontró en la caché de texto.
+    """
+    index, nombre_pdf, ruta_guias = tarea
+    cache = obtener_cache()
+    aciertos_previos = cache.aciertos
+    try:
+        info, error = procesar_fila(index, {"nombre_archivo": nombre_pdf}, ruta_guias), None
+    except Exception as e:
+        info, error = (None,) * len(COLUMNAS_EXTRAIDAS), f"Error en el archivo para fila {index}: {str(e)}"
+    return info, error, cache.aciertos > aciertos_previos
+
+def crear_pool_procesos(max_procesos=MAX_PROCESOS_PDF):
+    """
+    Crea el pool de procesos de extracción.
+
+    Los procesos se arrancan con "spawn" y no con "fork": la extracción también se
+    ejecuta dentro de la aplicación, un proceso con varios hilos, y un proceso hijo
+    creado con fork heredaría los locks que otros hilos tuvieran en ese momento y la
+    conexión SQLite de la caché de texto (`cache_texto`) del proceso padre.
+
+    Args:
+        max_procesos (int): Número máximo de procesos.
+
+    Returns:
+        ProcessPoolExecutor: El pool.
+    """
+    return ProcessPoolExecutor(max_workers=max_procesos, mp_context=multiprocessing.get_context("spawn"))
+
+def extraer_en_paralelo(tareas, max_procesos=MAX_PROCESOS_PDF):
+    """
+    Procesa las guías repartiéndolas entre varios procesos.
+
+    Las tareas se envían en bloques (`chunksize`) para reducir la comunicación entre
+    procesos; con un único proceso, o una sola tarea, se procesan en el proceso actual.
+
+    Args:
+        tareas (list[tuple[int, str, str]]): Tareas para `procesar_tarea`.
+        max_procesos (int): Número máximo de procesos.
+
+    Returns:
+        list[tuple[tuple, str | None, bool]]: Los resultados, en el mismo orden que las tareas.
+    """
+    if max_procesos <= 1 or len(tareas) <= 1:
+        return [procesar_tarea(tarea) for tarea in tareas]
+
+    chunksize = max(1, len(tareas) // (max_procesos * 4))
+    with crear_pool_procesos(max_procesos) as executor:
+        return list(executor.map(procesar_tarea, tareas, chunksize=chunksize))
 
 def guardar_excel(asignaturas, tipo_estudio, ruta_data):
     """
@@ -149,40 +322,41 @@ def guardar_excel(asignaturas, tipo_estudio, ruta_data):
     ruta_excel_actualizado = os.path.join(ruta_data, salida)
     asignaturas.to_excel(ruta_excel_actualizado, index=False)
 
-def procesar_asignaturas(tipo_estudio):
+def procesar_asignaturas(tipo_estudio, max_procesos=MAX_PROCESOS_PDF):
     """
     Función principal para procesar las asignaturas.
 
-    Carga el archivo Excel de entrada, inicializa nuevas columnas para la información
-    a extraer, itera sobre cada fila, llama a `procesar_fila` para obtener los datos
-    del PDF asociado y actualiza el DataFrame. Finalmente, guarda el DataFrame procesado.
+    Carga el archivo Excel de entrada, reparte los PDFs asociados a cada fila entre
+    varios procesos (`extraer_en_paralelo`) y añade al DataFrame, en una única
+    asignación, las columnas con la información extraída. Finalmente, guarda el
+    DataFrame procesado.
 
     Args:
         tipo_estudio (str): El tipo de estudio ('master', 'grado', 'ambos').
+        max_procesos (int, optional): Número de procesos de extracción. Por defecto, uno por núcleo.
     """
     ruta_data = os.path.join("sostenibilidad", "data")
     ruta_excel = obtener_ruta_excel(tipo_estudio, ruta_data)
     asignaturas = pd.read_excel(ruta_excel)
 
-    asignaturas["titulacion"] = None
-    asignaturas["denominacion"] = None
-    asignaturas["codigo"] = None
-    asignaturas["pagina_con_asteriscos"] = None
-
     ruta_guias = os.path.join(ruta_data, "guias")
 
-    for index, row in asignaturas.iterrows():
-        try:
-            titulacion, denominacion, codigo, pagina_con_asteriscos = procesar_fila(index, row, ruta_guias)
-
-            asignaturas.at[index, "titulacion"] = titulacion
-            asignaturas.at[index, "denominacion"] = denominacion
-            asignaturas.at[index, "codigo"] = codigo
-            asignaturas.at[index, "pagina_con_asteriscos"] = pagina_con_asteriscos
-
-        except Exception as e:
-            print(f"Error en el archivo para fila {index}: {str(e)}")
-            continue
+    tareas = [
+        (index, nombre_pdf, ruta_guias)
+        for index, nombre_pdf in zip(asignaturas.index, asignaturas["nombre_archivo"])
+    ]
+    resultados = extraer_en_paralelo(tareas, max_procesos)
+
+    for _, error, _ in resultados:
+        if error:
+            print(error)
+    aciertos = sum(1 for _, _, acierto in resultados if acierto)
+    print(f"Caché de texto: {aciertos} aciertos, {len(resultados) - aciertos} PDFs analizados")
+
+    # Asignación de todas las columnas de una vez
+    asignaturas[COLUMNAS_EXTRAIDAS] = pd.DataFrame(
+        [info for info, _, _ in resultados], index=asignaturas.index, columns=COLUMNAS_EXTRAIDAS
+    ).astype(object)
 
     guardar_excel(asignaturas, tipo_estudio, ruta_data)
 
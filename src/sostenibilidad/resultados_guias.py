@@ -0,0 +1,151 @@
+"""
+Diario de los resultados de la clasificación de guías, con reanudación.
+
+Cada resultado se añade como una línea JSON a un fichero de diario en cuanto
+llega la respuesta del modelo, y se vuelca a disco inmediatamente. Si `API.py`
+se interrumpe a mitad, las clasificaciones ya terminadas siguen en el diario y
+la siguiente ejecución solo envía al modelo las guías que faltan. Al terminar,
+los resultados se reconstruyen una sola vez desde el diario como DataFrame para
+el Excel y la base de datos.
+"""
+
+import json
+import os
+
+import pandas as pd
+
+RUTA_DIARIO = os.path.join("sostenibilidad", "data", "resultados_guias.jsonl")
+
+COLUMNAS_RESULTADOS = ["Name", "Degree_Master", "Code", "Competences", "Sostenibilidad", "FileName"]
+
+
+class EscritorResultados:
+    """
+    Diario de resultados que sirve también de punto de control.
+
+    Cada línea guarda, junto al resultado, el nombre de la guía y la clave de la
+    petición (modelo, prompt, temperatura y texto, ver `clave_respuesta`). Al
+    reanudar, las guías cuya clave ya está en el diario no se vuelven a clasificar,
+    y los resultados finales se reconstruyen a partir del diario.
+
+    Uso:
+        with EscritorResultados(ruta) as escritor:
+            if not escritor.contiene(nombre, clave):
+                escritor.escribir(fila, nombre, clave)
+        resultados = escritor.dataframe(guias)
+    """
+
+    def __init__(self, ruta=RUTA_DIARIO, reanudar=True):
+        self.ruta = ruta
+        self.filas = {}
+        self.reanudadas = 0
+        os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+        if reanudar and os.path.exists(ruta):
+            for registro in _leer_registros(ruta):
+                if "_guia" in registro and "_clave" in registro:
+                    self.filas[(registro["_guia"], registro["_clave"])] = registro
+            self.reanudadas = len(self.filas)
+        self._fichero = open(ruta, "a" if reanudar else "w", encoding="utf-8")
+        if self._fichero.tell() and not _termina_en_salto(ruta):
+            # La última línea quedó a medias: el siguiente registro empieza en una línea nueva
+            self._fichero.write("\n")
+
+    def contiene(self, nombre, clave):
+        """Indica si la guía ya se clasificó con la misma petición."""
+        return (nombre, clave) in self.filas
+
+    def escribir(self, fila, nombre, clave):
+        """
+        Añade un resultado al diario y lo vuelca a disco antes de volver.
+
+        Args:
+            fila (dict): El resultado de una guía, con las claves de `COLUMNAS_RESULTADOS`.
+            nombre (str): Nombre del PDF de la guía.
+            clave (str): Clave de la petición enviada al modelo.
+        """
+        registro = {**fila, "_guia": nombre, "_clave": clave}
+        self._fichero.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        self._fichero.flush()
+        os.fsync(self._fichero.fileno())
+        self.filas[(nombre, clave)] = registro
+
+    def dataframe(self, guias):
+        """
+        Construye de una sola vez el DataFrame de resultados a partir del diario.
+
+        Args:
+            guias (Iterable[tuple[str, str]]): Nombre y clave de petición de las guías
+                de la ejecución actual, en orden.
+
+        Returns:
+            pd.DataFrame: Los resultados de esas guías que están en el diario.
+        """
+        filas = [self.filas[guia] for guia in guias if guia in self.filas]
+        return pd.DataFrame(filas, columns=COLUMNAS_RESULTADOS)
+
+    def compactar(self, guias):
+        """
+        Reescribe el diario con solo los resultados de las guías indicadas, descartando
+        los de ejecuciones con otro modelo, otro prompt o guías que ya no existen.
+
+        Args:
+            guias (Iterable[tuple[str, str]]): Nombre y clave de petición de las guías que se conservan.
+        """
+        registros = [self.filas[guia] for guia in guias if guia in self.filas]
+        temporal = f"{self.ruta}.tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            for registro in registros:
+                f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        self._fichero.close()
+        os.replace(temporal, self.ruta)
+        self._fichero = open(self.ruta, "a", encoding="utf-8")
+
+    def cerrar(self):
+        """Cierra el fichero del diario."""
+        self._fichero.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.cerrar()
+
+
+def _termina_en_salto(ruta):
+    """Indica si el fichero termina en un salto de línea."""
+    with open(ruta, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+def _leer_registros(ruta):
+    """
+    Lee las líneas de un diario. Una línea incompleta (por una interrupción
+    mientras se escribía) se ignora.
+    """
+    registros = []
+    with open(ruta, encoding="utf-8") as f:
+        for linea in f:
+            try:
+                registros.append(json.loads(linea))
+            except json.JSONDecodeError:
+                print(f"Línea incompleta en {ruta}, se ignora.")
+    return registros
+
+
+def leer_diario(ruta=RUTA_DIARIO):
+    """
+    Lee los resultados guardados en un diario.
+
+    Args:
+        ruta (str): Ruta del fichero de diario.
+
+    Returns:
+        pd.DataFrame: Los resultados, en el orden en que se escribieron. Si una guía
+            aparece varias veces (diario sin compactar), se toma su último resultado.
+    """
+    registros = {}
+    for i, registro in enumerate(_leer_registros(ruta)):
+        registros.pop(registro.get("_guia", i), None)
+        registros[registro.get("_guia", i)] = registro
+    return pd.DataFrame(list(registros.values()), columns=COLUMNAS_RESULTADOS)
@@ -0,0 +1,170 @@
+"""
+Preparación del texto de cada guía antes de enviarlo al modelo.
+
+`API.py` enviaba el texto completo de las dos primeras páginas del PDF, aunque el
+modelo solo necesita los campos de cabecera y el apartado "Competencias que debe
+adquirir el alumno/a". Aquí se construye un texto reducido con:
+
+    - La titulación, la denominación y el código de la asignatura.
+    - El apartado de competencias, hasta el siguiente apartado numerado.
+
+Se eliminan las cabeceras y pies de página (líneas que se repiten al principio o
+al final de varias páginas), los números de página ("Página 2", "2 de 5", "2/5")
+y los espacios sobrantes, y el resultado se limita a un presupuesto de tokens por
+petición (variable de entorno LLM_PRESUPUESTO_TOKENS, por defecto 1200). Las
+líneas con asteriscos, que marcan las competencias de sostenibilidad, y las
+competencias ("CG1 ...", "CE3. ...") no se eliminan nunca, aunque se repitan.
+Si el apartado de competencias no se encuentra, se envía el texto original limpio
+dentro del mismo presupuesto, también precedido de los campos de cabecera.
+
+Los tokens se estiman a partir del número de caracteres (unos 4 por token), que
+basta para acotar el tamaño sin depender del tokenizador de cada modelo.
+"""
+
+import os
+import re
+
+LLM_PRESUPUESTO_TOKENS = int(os.getenv("LLM_PRESUPUESTO_TOKENS", 1200))
+CARACTERES_POR_TOKEN = 4
+
+# "3. Competencias que debe adquirir el alumno/a al cursar la asignatura"
+_INICIO_COMPETENCIAS = re.compile(
+    r"^[ \t]*(?:(?P<numero>\d{1,2})\.[ \t]*)?Competencias\s+que\s+debe\s+adquirir\s+el\s+alumno",
+    re.IGNORECASE | re.MULTILINE
+)
+# Solo números de página con forma de número de página: una línea con solo dígitos
+# puede ser el valor de un campo (el código de la asignatura)
+_NUMERO_PAGINA = re.compile(r"^(?:P[áa]gina\s+\d+(?:\s*(?:de|/)\s*\d+)?|\d+\s*(?:de|/)\s*\d+)$", re.IGNORECASE)
+# Una competencia: "CG1 ...", "CE3. ...", "CT-2: ..."
+_COMPETENCIA = re.compile(r"^[A-Z]{1,4}[-.]?\d+\b")
+_ESPACIOS = re.compile(r"[ \t]+")
+
+_ETIQUETAS_CABECERA = ("Titulación", "Denominación de la asignatura", "Código")
+
+# Líneas del principio y del final de cada página en las que se buscan cabeceras y pies
+LINEAS_CABECERA_PIE = 3
+
+
+def estimar_tokens(texto):
+    """Devuelve una estimación del número de tokens de un texto."""
+    return -(-len(texto) // CARACTERES_POR_TOKEN)
+
+
+def _normalizar_linea(linea):
+    """Colapsa los espacios de una línea y elimina los de los extremos."""
+    return _ESPACIOS.sub(" ", linea).strip()
+
+
+def _protegida(linea):
+    """Indica si una línea no se puede eliminar: tiene asteriscos o es una competencia."""
+    return "*" in linea or bool(_COMPETENCIA.match(linea))
+
+
+def lineas_repetidas(paginas):
+    """
+    Devuelve las cabeceras y pies de página: las líneas que aparecen entre las
+    LINEAS_CABECERA_PIE primeras o últimas de más de una página. Las líneas con
+    asteriscos y las competencias no se consideran nunca cabeceras.
+    """
+    vistas = set()
+    repetidas = set()
+    for pagina in paginas:
+        lineas = [linea for linea in map(_normalizar_linea, pagina.splitlines()) if linea]
+        extremos = set(lineas[:LINEAS_CABECERA_PIE] + lineas[-LINEAS_CABECERA_PIE:])
+        repetidas |= extremos & vistas
+        vistas |= extremos
+    return {linea for linea in repetidas if not _protegida(linea)}
+
+
+def limpiar_texto(texto, repetidas=frozenset()):
+    """
+    Elimina del texto extraído de un PDF las líneas que no aportan al modelo:
+    líneas vacías, números de página, cabeceras y pies de página y líneas duplicadas.
+    Las líneas con asteriscos y las competencias se conservan siempre.
+
+    Args:
+        texto (str): Texto extraído de una o varias páginas.
+        repetidas (set[str]): Líneas que se repiten en varias páginas, y que se eliminan.
+
+    Returns:
+        str: El texto limpio, con una línea por línea útil.
+    """
+    vistas = set()
+    lineas = []
+    for linea in texto.splitlines():
+        linea = _normalizar_linea(linea)
+        if not linea or _NUMERO_PAGINA.match(linea):
+            continue
+        if not _protegida(linea) and (linea in repetidas or linea in vistas):
+            continue
+        vistas.add(linea)
+        lineas.append(linea)
+    return "\n".join(lineas)
+
+
+def localizar_competencias(texto):
+    """
+    Localiza el apartado de competencias de una guía.
+
+    El apartado termina en el siguiente apartado numerado (si el de competencias es
+    el "3.", en la primera línea que empieza por "4."). Si no tiene número, se toma
+    hasta el final del texto.
+
+    Args:
+        texto (str): Texto de las primeras páginas de la guía.
+
+    Returns:
+        str | None: El texto del apartado, desde su título, o None si no se encuentra.
+    """
+    inicio = _INICIO_COMPETENCIAS.search(texto)
+    if not inicio:
+        return None
+
+    fin = len(texto)
+    if inicio.group("numero"):
+        siguiente = re.compile(rf"^[ \t]*{int(inicio.group('numero')) + 1}\.[ \t]*\S", re.MULTILINE)
+        encontrado = siguiente.search(texto, inicio.end())
+        if encontrado:
+            fin = encontrado.start()
+    return texto[inicio.start():fin]
+
+
+def recortar_a_presupuesto(texto, presupuesto):
+    """Recorta el texto por líneas completas para que no supere `presupuesto` tokens."""
+    maximo = presupuesto * CARACTERES_POR_TOKEN
+    if len(texto) <= maximo:
+        return texto
+    recortado = texto[:maximo]
+    # Se corta en el último salto de línea si así no se pierde más de la mitad del texto
+    corte = recortado.rfind("\n")
+    return recortado[:corte] if corte > maximo // 2 else recortado
+
+
+def preparar_texto(paginas, cabecera=None, presupuesto=LLM_PRESUPUESTO_TOKENS):
+    """
+    Construye el texto que se envía al modelo para una guía.
+
+    Args:
+        paginas (list[str]): Texto de las primeras páginas de la guía.
+        cabecera (tuple | None): Titulación, denominación y código ya extraídos de la guía.
+        presupuesto (int): Número máximo de tokens del texto.
+
+    Returns:
+        tuple[str, int, int]: El texto preparado, sus tokens estimados y los tokens
+            estimados del texto original.
+    """
+    original = " ".join(paginas)
+    texto = "\n".join(paginas)
+    repetidas = lineas_repetidas(paginas)
+
+    lineas_cabecera = [
+        f"{etiqueta}: {valor}"
+        for etiqueta, valor in zip(_ETIQUETAS_CABECERA, cabecera or ())
+        if valor
+    ]
+    competencias = localizar_competencias(texto)
+    cuerpo = limpiar_texto(texto if competencias is None else competencias, repetidas)
+    preparado = "\n".join(lineas_cabecera + [cuerpo])
+
+    preparado = recortar_a_presupuesto(preparado, presupuesto)
+    return preparado, estimar_tokens(preparado), estimar_tokens(original)
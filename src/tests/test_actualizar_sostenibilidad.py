@@ -0,0 +1,56 @@
+"""
+Pruebas de `actualizar_sostenibilidad` con la base de datos principal y la de
+búsquedas en ficheros SQLite distintos, como en producción.
+
+Uso (desde el directorio `src`):
+    python -m pytest tests
+"""
+
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("flask_sqlalchemy")
+pytest.importorskip("pandas")
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from flask import Flask
+
+from persistencia import Busqueda, configurar_bd, db
+from sostenibilidad.actualizar_sostenibilidad import actualizar_sostenibilidad
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """Aplicación con la base de datos principal y la de búsquedas en dos ficheros distintos."""
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'principal.db'}")
+    monkeypatch.setenv("DATABASE_BINDS", f"sqlite:///{tmp_path / 'busqueda.db'}")
+    app = Flask(__name__)
+    configurar_bd(app)
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            Busqueda(anho="2023-2024", codigo_asignatura="1234", nombre_archivo="1234.pdf", modalidad="presencial"),
+            Busqueda(anho="2024-2025", codigo_asignatura="1234", nombre_archivo="1234.pdf", modalidad="presencial"),
+        ])
+        db.session.commit()
+        yield app
+        db.session.remove()
+
+
+def test_actualiza_en_la_base_de_datos_de_busquedas(app):
+    resumen = actualizar_sostenibilidad([("1234", "1234.pdf", "Sí"), ("9999", "9999.pdf", "No")])
+
+    assert resumen["encontradas"] == 1
+    assert resumen["no_encontradas"] == 1
+    assert resumen["filas_actualizadas"] == 2
+    assert {fila.sostenibilidad for fila in db.session.query(Busqueda)} == {"Sí"}
+
+
+def test_limita_la_actualizacion_al_curso(app):
+    resumen = actualizar_sostenibilidad([("1234", "1234.pdf", "Sí")], anho="2024-2025")
+
+    assert resumen["filas_actualizadas"] == 1
+    sostenibilidad = dict(db.session.query(Busqueda.anho, Busqueda.sostenibilidad))
+    assert sostenibilidad == {"2023-2024": None, "2024-2025": "Sí"}
@@ -0,0 +1,57 @@
+"""
+Pruebas de la extracción de la cabecera de las guías (`cabecera_guia.py`) con
+textos de ejemplo de las distintas variantes de maquetación.
+
+`benchmarks/bench_cabecera.py` usa los mismos ejemplos y el método anterior para
+comparar ambos sobre el corpus de guías descargadas.
+
+Uso (desde el directorio `src`):
+    python -m pytest tests
+"""
+
+import os
+import re
+import sys
+import unicodedata
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from sostenibilidad.cabecera_guia import extraer_cabecera
+
+# Textos con variantes de maquetación y la cabecera que se espera obtener de ellos
+EJEMPLOS = [
+    ("Titulación\nGrado en Historia\nCódigo\n1234\n1. Denominación de la asignatura:\nArqueología\n",
+     ("Grado en Historia", "Arqueología", "1234")),
+    ("Titulación\r\nGrado en Historia\r\nCódigo\r\n1234\r\n1. Denominación de la asignatura:\r\nArqueología\r\n",
+     ("Grado en Historia", "Arqueología", "1234")),
+    ("Titulación:\nGrado en Historia\nCódigo: 1234\n1. Denominación de la asignatura: Arqueología\n",
+     ("Grado en Historia", "Arqueología", "1234")),
+    (unicodedata.normalize("NFD", "Titulación\nGrado en Química\nCódigo\n5678\n"),
+     ("Grado en Química", None, "5678")),
+    ("Titulación\nCódigo\n1234\n",
+     ("Código", None, "1234")),
+    ("Guía docente sin cabecera", (None, None, None)),
+]
+
+
+def extraer_cabecera_antes(texto):
+    """Extracción de la cabecera tal y como se hacía antes de `cabecera_guia.py`."""
+    def extraer_patron(patron):
+        match = re.search(patron, texto)
+        return match.group().strip() if match else None
+
+    denominacion = extraer_patron(r"(?<=1. Denominación de la asignatura:\n).*")
+    titulacion = extraer_patron(r"(?<=Titulación\n).*")
+    codigo = extraer_patron(r"(?<=Código\n).*")
+    return titulacion, denominacion, codigo
+
+
+def test_los_ejemplos_dan_la_cabecera_esperada():
+    for texto, esperado in EJEMPLOS:
+        assert extraer_cabecera(texto) == esperado, texto
+
+
+def test_se_conservan_los_campos_que_extraia_el_metodo_anterior():
+    for texto, _ in EJEMPLOS:
+        antes, despues = extraer_cabecera_antes(texto), extraer_cabecera(texto)
+        for campo_antes, campo_despues in zip(antes, despues):
+            assert campo_antes is None or campo_antes == campo_despues, texto
@@ -0,0 +1,76 @@
+"""
+Pruebas de la preparación del texto de las guías (`texto_prompt.py`).
+
+Uso (desde el directorio `src`):
+    python -m pytest tests
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from sostenibilidad.texto_prompt import limpiar_texto, lineas_repetidas, preparar_texto
+
+CABECERA_PAGINA = "Universidad de Burgos\nGuía docente 2024-2025"
+PIE_PAGINA = "Escuela Politécnica Superior"
+
+
+def pagina(cuerpo, numero):
+    """Texto de una página con la cabecera y el pie que se repiten en todas."""
+    return f"{CABECERA_PAGINA}\n{cuerpo}\n{PIE_PAGINA}\nPágina {numero} de 2"
+
+
+def test_los_asteriscos_se_conservan_en_las_competencias():
+    paginas = [
+        pagina("3. Competencias que debe adquirir el alumno/a\nCG1 Analizar problemas\n*", 1),
+        pagina("CE2 Diseñar soluciones sostenibles\n*\n4. Objetivos\nObjetivo 1", 2),
+    ]
+
+    texto, _, _ = preparar_texto(paginas)
+
+    assert texto.count("*") == 2
+    assert "CG1 Analizar problemas" in texto
+    assert "CE2 Diseñar soluciones sostenibles" in texto
+    assert "Objetivo 1" not in texto
+
+
+def test_se_eliminan_cabeceras_pies_y_numeros_de_pagina():
+    paginas = [pagina("Titulación\nGrado en Historia", 1), pagina("Otro contenido", 2)]
+
+    assert lineas_repetidas(paginas) == {"Universidad de Burgos", "Guía docente 2024-2025",
+                                         "Escuela Politécnica Superior"}
+    texto = limpiar_texto("\n".join(paginas), lineas_repetidas(paginas))
+    assert texto == "Titulación\nGrado en Historia\nOtro contenido"
+
+
+def test_una_linea_repetida_en_mitad_de_la_pagina_no_es_cabecera():
+    relleno = "\n".join(f"Línea {i}" for i in range(8))
+    paginas = [f"{relleno}\nTexto común\n{relleno}", f"Inicio\n{relleno}\nTexto común\n{relleno}\nFin"]
+
+    assert "Texto común" not in lineas_repetidas(paginas)
+
+
+def test_las_competencias_repetidas_se_conservan():
+    texto = limpiar_texto("CB1 Comprender\n*\nCB1 Comprender\n*\nRepetida\nRepetida")
+
+    assert texto == "CB1 Comprender\n*\nCB1 Comprender\n*\nRepetida"
+
+
+def test_el_codigo_de_la_asignatura_no_es_un_numero_de_pagina():
+    texto = limpiar_texto("Código\n5100\nPágina 1\n2 de 5\n3/5")
+
+    assert texto == "Código\n5100"
+
+
+def test_la_cabecera_se_incluye_sin_apartado_de_competencias():
+    cabecera = ("Grado en Historia", "Arqueología", "5100")
+
+    texto, _, _ = preparar_texto(["Sin apartado de competencias\n*"], cabecera)
+
+    assert texto.splitlines() == [
+        "Titulación: Grado en Historia",
+        "Denominación de la asignatura: Arqueología",
+        "Código: 5100",
+        "Sin apartado de competencias",
+        "*",
+    ]
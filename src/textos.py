@@ -83,6 +83,10 @@ textos = {
         'perfil': 'Profile',
         'proceso_completado': 'Process successfully completed for the year',
         'progreso_titulo': 'Process Progress',
+        'fases_progreso': {'titulaciones': 'Degrees explored', 'descarga': 'Guides downloaded',
+                           'extraccion': 'PDFs processed', 'lectura': 'Guides read', 'llm': 'Guides classified'},
+        'trabajo_terminado_con_error': 'The process has finished with an error.',
+        'trabajo_cancelado': 'The process has been cancelled.',
         'rango_incorrecto': 'The year range must be exactly 3 years (Example: 2021-2023).',
         'realizar_busqueda_nueva': 'Search',
         'rol_administrador':'Administrator',
@@ -192,6 +196,10 @@ textos = {
         'perfil': 'Perfil',
         'proceso_completado': 'Proceso completado exitosamente para el año',
         'progreso_titulo': 'Progreso del Proceso',
+        'fases_progreso': {'titulaciones': 'Titulaciones recorridas', 'descarga': 'Guías descargadas',
+                           'extraccion': 'PDFs procesados', 'lectura': 'Guías leídas', 'llm': 'Guías clasificadas'},
+        'trabajo_terminado_con_error': 'El proceso ha terminado con un error.',
+        'trabajo_cancelado': 'El proceso se ha cancelado.',
         'rango_incorrecto': 'El rango de años debe ser de exactamente 3 años (Ejemplo: 2021-2023).',
         'realizar_busqueda_nueva': 'Realizar una búsqueda',
         'rol_administrador':'Administrador',
@@ -0,0 +1,429 @@
+"""
+Cola persistente de trabajos en segundo plano con un número fijo de workers.
+
+`app.py` lanzaba un `threading.Thread` por cada búsqueda de guías, clasificación
+con la API o generación de informe, cada uno con su `subprocess.run`: no había
+límite al número de procesos pesados a la vez, una misma búsqueda se podía lanzar
+dos veces y los trabajos se perdían al reiniciar la aplicación.
+
+Aquí los trabajos se guardan en una base de datos SQLite (`instance/trabajos.db`)
+y los ejecuta un conjunto fijo de workers:
+
+    - Cada tipo de trabajo tiene un límite de trabajos simultáneos.
+    - Un trabajo idéntico a otro pendiente o en curso no se vuelve a encolar: se
+      devuelve el existente.
+    - Los trabajos que estaban en curso cuando se detuvo la aplicación vuelven a
+      quedar pendientes al arrancar.
+    - Un trabajo pendiente o en curso se puede cancelar; si está ejecutando un
+      script, se termina el subproceso.
+    - Los scripts reciben el id de su trabajo en la variable de entorno
+      GREENMETRICS_JOB_ID, para notificar su progreso (ver `progreso.py`).
+
+Cada script se puede ejecutar de dos modos:
+    - "proceso" (por defecto): se llama a su función principal en el propio
+      proceso de la aplicación. Los módulos de los scripts (pandas, selenium,
+      docx...) se importan una sola vez al arrancar los workers, y cada trabajo
+      empieza sin el coste de arrancar un intérprete e importarlos de nuevo.
+      Un trabajo en curso no se puede interrumpir: al cancelarlo queda marcado
+      como cancelado, pero termina de ejecutarse.
+    - "subproceso": se lanza `python <script>` como hasta ahora, aislado de la
+      aplicación y con cancelación inmediata.
+
+Configuración (variables de entorno):
+    - TRABAJOS_WORKERS: trabajos que se ejecutan a la vez en total (por defecto 3).
+    - TRABAJOS_MODO: "proceso" o "subproceso" (por defecto "proceso").
+"""
+
+import hashlib
+import importlib
+import json
+import os
+import sqlite3
+import subprocess
+import threading
+import time
+
+MODO_PROCESO = "proceso"
+MODO_SUBPROCESO = "subproceso"
+
+RUTA_TRABAJOS = os.path.join("instance", "trabajos.db")
+TRABAJOS_WORKERS = int(os.getenv("TRABAJOS_WORKERS", 3))
+TRABAJOS_MODO = os.getenv("TRABAJOS_MODO", MODO_PROCESO)
+# Segundos de espera entre comprobaciones de la cola cuando no hay nada que hacer
+INTERVALO_ESPERA = 5
+# Segundos que se espera a que un subproceso cancelado termine antes de matarlo
+ESPERA_TERMINAR = 10
+# Variable de entorno con la que los scripts de un trabajo reciben su id
+VARIABLE_ID_TRABAJO = "GREENMETRICS_JOB_ID"
+
+PENDIENTE = "pendiente"
+EN_CURSO = "en_curso"
+COMPLETADO = "completado"
+ERROR = "error"
+CANCELADO = "cancelado"
+ESTADOS_ACTIVOS = (PENDIENTE, EN_CURSO)
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS trabajos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    tipo TEXT NOT NULL,
+    argumentos TEXT NOT NULL,
+    clave TEXT NOT NULL,
+    estado TEXT NOT NULL,
+    mensaje TEXT NOT NULL DEFAULT '',
+    creado REAL NOT NULL,
+    iniciado REAL,
+    terminado REAL
+);
+CREATE INDEX IF NOT EXISTS trabajos_estado ON trabajos (estado, id);
+-- Un solo trabajo activo por clave: es lo que evita los duplicados
+CREATE UNIQUE INDEX IF NOT EXISTS trabajos_clave_activa ON trabajos (clave)
+    WHERE estado IN ('pendiente', 'en_curso');
+"""
+
+
+class TrabajoCancelado(Exception):
+    """El trabajo se ha cancelado mientras se ejecutaba."""
+
+
+def clave_trabajo(tipo, argumentos):
+    """
+    Calcula la clave con la que se detectan los trabajos duplicados.
+
+    Args:
+        tipo (str): Tipo de trabajo.
+        argumentos (dict): Argumentos que identifican el trabajo.
+
+    Returns:
+        str: El hash SHA-256 en hexadecimal.
+    """
+    contenido = json.dumps([tipo, argumentos], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+
+class ColaTrabajos:
+    """
+    Cola de trabajos guardada en SQLite y ejecutada por `workers` hilos.
+
+    Cada tipo de trabajo se registra con la función que lo ejecuta y su límite de
+    trabajos simultáneos. La función recibe los argumentos del trabajo, su id en
+    `id_trabajo` y, en `ejecutar_comando`, una función que ejecuta un script según
+    el modo de la cola: como subproceso, que se puede cancelar, o llamando a la
+    función equivalente en el propio proceso.
+
+    Uso:
+        cola = ColaTrabajos()
+        cola.registrar("informe", ejecutar_informe, limite=2, modulos=["generar_informe.general"])
+        cola.iniciar()
+        id_trabajo, nuevo = cola.encolar("informe", {"anho": "2023-2024", "informe": "6_1", "excel": ""})
+    """
+
+    def __init__(self, ruta=RUTA_TRABAJOS, workers=TRABAJOS_WORKERS, modo=TRABAJOS_MODO):
+        if modo not in (MODO_PROCESO, MODO_SUBPROCESO):
+            raise ValueError(f"Modo de ejecución de trabajos desconocido: {modo}")
+        self.ruta = ruta
+        self.workers = max(1, workers)
+        self.modo = modo
+        self._tipos = {}
+        self._modulos = []
+        self._en_curso = {}
+        self._procesos = {}
+        self._cancelados = set()
+        self._hilos = []
+        self._activa = False
+        self._condicion = threading.Condition()
+        os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+        self._conexion = sqlite3.connect(ruta, timeout=30, check_same_thread=False)
+        self._conexion.row_factory = sqlite3.Row
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.executescript(_ESQUEMA)
+
+    def registrar(self, tipo, funcion, limite=1, modulos=()):
+        """
+        Registra un tipo de trabajo.
+
+        Args:
+            tipo (str): Nombre del tipo de trabajo.
+            funcion (Callable): Función que ejecuta el trabajo. Recibe los argumentos
+                del trabajo como argumentos con nombre, más `id_trabajo` y `ejecutar_comando`.
+            limite (int): Trabajos de este tipo que se pueden ejecutar a la vez.
+            modulos (Iterable[str]): Módulos que usa el trabajo en el modo "proceso",
+                que se importan al arrancar los workers.
+        """
+        with self._condicion:
+            self._tipos[tipo] = (funcion, max(1, limite))
+            self._en_curso.setdefault(tipo, 0)
+            self._modulos.extend(modulos)
+
+    def iniciar(self):
+        """
+        Arranca los workers. Los trabajos que quedaron en curso en una ejecución
+        anterior de la aplicación vuelven a quedar pendientes. Se puede llamar varias veces.
+        """
+        with self._condicion:
+            if self._activa:
+                return
+            self._activa = True
+            with self._conexion:
+                recuperados = self._conexion.execute(
+                    "UPDATE trabajos SET estado = ?, iniciado = NULL, mensaje = ? WHERE estado = ?",
+                    (PENDIENTE, "Reanudado tras reiniciar la aplicación", EN_CURSO)
+                ).rowcount
+            if recuperados:
+                print(f"Trabajos: {recuperados} trabajos interrumpidos vuelven a la cola")
+            for i in range(self.workers):
+                hilo = threading.Thread(target=self._worker, name=f"trabajos-{i}", daemon=True)
+                hilo.start()
+                self._hilos.append(hilo)
+            if self.modo == MODO_PROCESO and self._modulos:
+                threading.Thread(target=self._precargar, name="trabajos-precarga", daemon=True).start()
+
+    def _precargar(self):
+        """Importa los módulos de los trabajos para que el primero no pague el coste de importarlos."""
+        inicio = time.perf_counter()
+        precargados = 0
+        for modulo in self._modulos:
+            try:
+                importlib.import_module(modulo)
+                precargados += 1
+            except Exception as e:
+                # El trabajo que lo use dará el error al ejecutarse
+                print(f"Trabajos: no se pudo precargar {modulo}: {e}")
+        print(f"Trabajos: {precargados} módulos precargados en {time.perf_counter() - inicio:.1f} s")
+
+    def detener(self):
+        """Detiene los workers cuando terminen el trabajo que están ejecutando."""
+        with self._condicion:
+            self._activa = False
+            self._condicion.notify_all()
+        for hilo in self._hilos:
+            hilo.join()
+        self._hilos = []
+
+    def encolar(self, tipo, argumentos, clave=None):
+        """
+        Añade un trabajo a la cola, salvo que ya haya uno idéntico pendiente o en curso.
+
+        Args:
+            tipo (str): Tipo de trabajo, registrado con `registrar`.
+            argumentos (dict): Argumentos con los que se llama a la función del tipo.
+                Se guardan como JSON.
+            clave (dict | None): Argumentos que identifican el trabajo al buscar
+                duplicados; por defecto, todos.
+
+        Returns:
+            tuple[int, bool]: El id del trabajo y si se ha creado (False si ya había
+                uno idéntico activo, cuyo id se devuelve).
+
+        Raises:
+            ValueError: Si el tipo de trabajo no está registrado.
+        """
+        if tipo not in self._tipos:
+            raise ValueError(f"Tipo de trabajo desconocido: {tipo}")
+        clave = clave_trabajo(tipo, argumentos if clave is None else clave)
+
+        with self._condicion:
+            try:
+                with self._conexion:
+                    cursor = self._conexion.execute(
+                        "INSERT INTO trabajos (tipo, argumentos, clave, estado, creado) VALUES (?, ?, ?, ?, ?)",
+                        (tipo, json.dumps(argumentos, ensure_ascii=False), clave, PENDIENTE, time.time())
+                    )
+            except sqlite3.IntegrityError:
+                fila = self._conexion.execute(
+                    "SELECT id FROM trabajos WHERE clave = ? AND estado IN (?, ?)", (clave, *ESTADOS_ACTIVOS)
+                ).fetchone()
+                return fila["id"], False
+            self._condicion.notify_all()
+            return cursor.lastrowid, True
+
+    def obtener(self, id_trabajo):
+        """
+        Devuelve un trabajo.
+
+        Args:
+            id_trabajo (int): Id del trabajo.
+
+        Returns:
+            dict | None: El trabajo, o None si no existe.
+        """
+        with self._condicion:
+            fila = self._conexion.execute("SELECT * FROM trabajos WHERE id = ?", (id_trabajo,)).fetchone()
+        return _a_diccionario(fila) if fila else None
+
+    def listar(self, estado=None, limite=100):
+        """
+        Devuelve los trabajos más recientes.
+
+        Args:
+            estado (str | None): Si se indica, solo los trabajos en ese estado.
+            limite (int): Número máximo de trabajos.
+
+        Returns:
+            list[dict]: Los trabajos, del más reciente al más antiguo.
+        """
+        consulta = "SELECT * FROM trabajos"
+        parametros = []
+        if estado:
+            consulta += " WHERE estado = ?"
+            parametros.append(estado)
+        consulta += " ORDER BY id DESC LIMIT ?"
+        parametros.append(limite)
+        with self._condicion:
+            filas = self._conexion.execute(consulta, parametros).fetchall()
+        return [_a_diccionario(fila) for fila in filas]
+
+    def cancelar(self, id_trabajo):
+        """
+        Cancela un trabajo pendiente o en curso. Si está ejecutando un script, se
+        termina el subproceso.
+
+        Args:
+            id_trabajo (int): Id del trabajo.
+
+        Returns:
+            bool: True si se ha cancelado, False si el trabajo no existe o ya había terminado.
+        """
+        with self._condicion:
+            with self._conexion:
+                cancelado = self._conexion.execute(
+                    "UPDATE trabajos SET estado = ?, terminado = ?, mensaje = ? WHERE id = ? AND estado IN (?, ?)",
+                    (CANCELADO, time.time(), "Cancelado", id_trabajo, *ESTADOS_ACTIVOS)
+                ).rowcount
+            if not cancelado:
+                return False
+            self._cancelados.add(id_trabajo)
+            proceso = self._procesos.get(id_trabajo)
+        if proceso is not None:
+            proceso.terminate()
+        return True
+
+    def ejecutar_comando(self, id_trabajo, comando, funcion=None, argumentos=None):
+        """
+        Ejecuta un script de un trabajo según el modo de la cola.
+
+        En el modo "subproceso", o si no se indica `funcion`, el script se ejecuta
+        como subproceso, de modo que se pueda cancelar, y recibe el id del trabajo
+        en la variable de entorno GREENMETRICS_JOB_ID. En el modo "proceso" se llama
+        a `funcion(**argumentos)`, que hace lo mismo que el script.
+
+        Args:
+            id_trabajo (int): Id del trabajo que ejecuta el script.
+            comando (list[str]): Comando y argumentos.
+            funcion (Callable | None): Función equivalente al script.
+            argumentos (dict | None): Argumentos con nombre de `funcion`.
+
+        Raises:
+            TrabajoCancelado: Si el trabajo se cancela antes o durante la ejecución.
+            subprocess.CalledProcessError: Si el script termina con error.
+        """
+        if self.modo == MODO_PROCESO and funcion is not None:
+            self._ejecutar_funcion(id_trabajo, comando, funcion, argumentos or {})
+            return
+
+        with self._condicion:
+            if id_trabajo in self._cancelados:
+                raise TrabajoCancelado()
+            proceso = subprocess.Popen(comando, env={**os.environ, VARIABLE_ID_TRABAJO: str(id_trabajo)})
+            self._procesos[id_trabajo] = proceso
+        try:
+            codigo = proceso.wait()
+        finally:
+            with self._condicion:
+                self._procesos.pop(id_trabajo, None)
+                cancelado = id_trabajo in self._cancelados
+            if cancelado and proceso.poll() is None:
+                try:
+                    proceso.wait(ESPERA_TERMINAR)
+                except subprocess.TimeoutExpired:
+                    proceso.kill()
+        if cancelado:
+            raise TrabajoCancelado()
+        if codigo != 0:
+            raise subprocess.CalledProcessError(codigo, comando)
+
+    def _ejecutar_funcion(self, id_trabajo, comando, funcion, argumentos):
+        """
+        Ejecuta en el propio proceso la función equivalente a un script. Como el script,
+        termina con `subprocess.CalledProcessError` si la función llama a `sys.exit`
+        con un código de error.
+        """
+        with self._condicion:
+            if id_trabajo in self._cancelados:
+                raise TrabajoCancelado()
+        try:
+            funcion(**argumentos)
+        except SystemExit as e:
+            # Los scripts usan sys.exit para abandonar; no debe terminar el worker
+            if e.code not in (None, 0):
+                raise subprocess.CalledProcessError(e.code if isinstance(e.code, int) else 1, comando) from e
+        with self._condicion:
+            if id_trabajo in self._cancelados:
+                raise TrabajoCancelado()
+
+    def _siguiente(self):
+        """Marca como en curso el trabajo pendiente más antiguo cuyo tipo no ha llegado a su límite."""
+        tipos_libres = [tipo for tipo, (_, limite) in self._tipos.items() if self._en_curso[tipo] < limite]
+        if not tipos_libres:
+            return None
+        marcas = ", ".join("?" for _ in tipos_libres)
+        with self._conexion:
+            fila = self._conexion.execute(
+                f"SELECT * FROM trabajos WHERE estado = ? AND tipo IN ({marcas}) ORDER BY id LIMIT 1",
+                (PENDIENTE, *tipos_libres)
+            ).fetchone()
+            if fila is None:
+                return None
+            self._conexion.execute(
+                "UPDATE trabajos SET estado = ?, iniciado = ? WHERE id = ?", (EN_CURSO, time.time(), fila["id"])
+            )
+        self._en_curso[fila["tipo"]] += 1
+        return fila
+
+    def _worker(self):
+        """Bucle de cada worker: toma trabajos de la cola y los ejecuta."""
+        while True:
+            with self._condicion:
+                fila = None
+                while self._activa and fila is None:
+                    fila = self._siguiente()
+                    if fila is None:
+                        self._condicion.wait(INTERVALO_ESPERA)
+                if fila is None:
+                    return
+                funcion = self._tipos[fila["tipo"]][0]
+            self._ejecutar(fila, funcion)
+
+    def _ejecutar(self, fila, funcion):
+        """Ejecuta un trabajo y guarda su estado final."""
+        id_trabajo = fila["id"]
+        estado, mensaje = COMPLETADO, ""
+        try:
+            funcion(id_trabajo=id_trabajo,
+                    ejecutar_comando=lambda comando, funcion=None, argumentos=None: self.ejecutar_comando(
+                        id_trabajo, comando, funcion, argumentos),
+                    **json.loads(fila["argumentos"]))
+        except TrabajoCancelado:
+            estado, mensaje = CANCELADO, "Cancelado"
+        except Exception as e:
+            estado, mensaje = ERROR, str(e)
+            print(f"Error en el trabajo {id_trabajo} ({fila['tipo']}): {e}")
+        finally:
+            with self._condicion:
+                with self._conexion:
+                    # Un trabajo cancelado mientras se ejecutaba ya tiene su estado final
+                    self._conexion.execute(
+                        "UPDATE trabajos SET estado = ?, mensaje = ?, terminado = ? WHERE id = ? AND estado = ?",
+                        (estado, mensaje, time.time(), id_trabajo, EN_CURSO)
+                    )
+                self._en_curso[fila["tipo"]] -= 1
+                self._cancelados.discard(id_trabajo)
+                self._condicion.notify_all()
+
+
+def _a_diccionario(fila):
+    """Convierte una fila de la tabla de trabajos en un diccionario serializable."""
+    trabajo = dict(fila)
+    trabajo["argumentos"] = json.loads(trabajo["argumentos"])
+    del trabajo["clave"]
+    return trabajo